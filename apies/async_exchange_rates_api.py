@@ -0,0 +1,72 @@
+from apies.base_api.async_base_api import AsyncBaseAPI
+from apies.exchange_rates_api import ExchangeRatesApi
+
+
+class AsyncExchangeRatesApi(AsyncBaseAPI):
+    """
+    Asynchronous Exchange Rates API class, a counterpart of ExchangeRatesApi.
+
+    Attributes
+    ----------
+    _endpoint : str
+        Exchange Rates API endpoint, which provides specific functionality.
+
+    Methods
+    -------
+    send_exchange_rate_request(base, *symbols)
+        Coroutine, forms a dictionary of parameters and passes it with the
+        access key to the 'send_get_request' method.
+    """
+
+    def __init__(self, endpoint: str, scheme: str, host: str, api_version: str,
+                 **kwargs):
+        """
+        Constructs all the necessary attributes for the AsyncExchangeRatesApi
+        object.
+
+        Parameters
+        ----------
+        endpoint : str
+            Exchange Rates API endpoint, which provides specific functionality.
+        scheme : str
+            Host scheme.
+        host : str
+            Base API host to work with.
+        api_version : str
+            Version of using API.
+        **kwargs
+            Connection pool and timeout parameters of AsyncBaseAPI.
+        """
+
+        super().__init__(scheme=scheme, host=host, api_version=api_version,
+                         **kwargs)
+        self._endpoint = endpoint
+
+    async def send_exchange_rate_request(self, base: str, *symbols: str,
+                                         status_code: int) -> dict:
+        """
+        Forms a dictionary of parameters and passes it with the access key to
+        the 'send_get_request' method.
+
+        Parameters
+        ----------
+        base : str
+            Base currency for comparison (three-letter currency code).
+        *symbols : str
+            A number of currencies for comparison with base one (three-letter
+            currency code for each)
+        status_code : int
+            An expected status code of the response.
+
+        Returns
+        -------
+        data : dict
+            Dictionary with data taken from the response.
+        """
+
+        params = {"access_key": ExchangeRatesApi.get_key(), "base": base}
+        if len(symbols):
+            params["symbols"] = ",".join([symbol.upper() for symbol in symbols])
+        response = await self.send_get_request(
+            path=self._endpoint, params=params, status_code=status_code)
+        return response.json()
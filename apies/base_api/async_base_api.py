@@ -0,0 +1,137 @@
+import logging
+
+from apies.base_api.async_http import AsyncConnectionPool, AsyncResponse
+from apies.base_api.base_api import BaseAPI
+
+
+class AsyncBaseAPI:
+    """
+    Asynchronous base API class for sending requests, a counterpart of
+    BaseAPI which does not block the event loop.
+
+    Attributes
+    ----------
+    _scheme : str
+        Host scheme.
+    _host : str
+        Base API host to work with.
+    _api_version : str
+        Version of using API.
+    _pool : AsyncConnectionPool
+        Keep-alive connection pool used for sending requests.
+    _owns_pool : bool
+        True if the pool was created by the object itself (in that case
+        'close' closes it).
+
+    Methods
+    -------
+    send_get_request(path, params, status_code=None)
+        Coroutine, sends a get-request to API and returns AsyncResponse
+        object. Optional - status code check, if status code is not as
+        expected - exception is raised.
+    prepare_url(path, params):
+        Forms a URL for a request (same as BaseAPI.prepare_url).
+    close()
+        Coroutine, closes the pool, if it is owned by the object.
+    """
+
+    logger = logging.getLogger("AsyncBaseAPI")
+
+    prepare_url = BaseAPI.prepare_url
+
+    def __init__(self, scheme, host, api_version, pool=None,
+                 max_connections_per_host=10, keep_alive=True,
+                 connect_timeout=None, read_timeout=None):
+        """
+        Constructs all the necessary attributes for the AsyncBaseAPI object.
+
+        If the pool is not passed, a new one is created with the connection
+        parameters. Pass the same pool to several objects (of one event loop)
+        to share its connections between them.
+
+        Parameters
+        ----------
+        scheme : str
+            Host scheme.
+        host : str
+            Base API host to work with.
+        api_version : str
+            Version of using API.
+        pool : AsyncConnectionPool, optional
+            A pool to send requests with.
+        max_connections_per_host : int
+            The maximum number of simultaneous connections to one host.
+        keep_alive : bool
+            Whether to keep connections alive between requests.
+        connect_timeout : float, optional
+            Timeout (in seconds) of establishing a connection, None - no
+            timeout.
+        read_timeout : float, optional
+            Timeout (in seconds) of receiving the response, None - no timeout.
+        """
+
+        self._scheme = scheme
+        self._host = host
+        self._api_version = api_version
+        self._owns_pool = pool is None
+        if pool is None:
+            pool = AsyncConnectionPool(
+                max_connections_per_host=max_connections_per_host,
+                keep_alive=keep_alive, connect_timeout=connect_timeout,
+                read_timeout=read_timeout)
+        self._pool = pool
+
+    async def send_get_request(self, path: str, params: dict,
+                               status_code=None) -> AsyncResponse:
+        """
+        Sends a get-request to API and returns AsyncResponse object.
+        Optional - status code check, if status code is not as expected -
+        exception is raised.
+
+        Parameters
+        ----------
+        path : str
+            Path for the get-request.
+        params : dict
+            A dict of required parameters and their values.
+        status_code : int
+            An expected status code of the response.
+
+        Returns
+        -------
+        response : AsyncResponse
+            The response from the request.
+
+        Raises
+        ------
+        RuntimeError
+            Raises if response status code is not as expected.
+        """
+
+        final_url = self.prepare_url(path, params)
+        response = await self._pool.get(final_url)
+        if status_code:
+            response_status_code = response.status_code
+            if response_status_code == status_code:
+                self.logger.info("{url_for_logs} - GET - {code}:".format(
+                    url_for_logs=final_url.split("?")[0],
+                    code=status_code))
+            else:
+                raise RuntimeError("An error occurred, the status code does not"
+                                   " match the expected one: "
+                                   "{code} (expected - {expected_code}".
+                                   format(code=response_status_code,
+                                          expected_code=status_code))
+        return response
+
+    async def close(self):
+        """
+        Closes the pool, if it is owned by the object.
+
+        Returns
+        -------
+        None
+        """
+
+        if self._owns_pool:
+            await self._pool.close()
@@ -0,0 +1,217 @@
+import asyncio
+import json
+import ssl
+from urllib.parse import urlsplit
+
+
+class AsyncResponse:
+    """
+    Response of AsyncConnectionPool.
+
+    Attributes
+    ----------
+    status_code : int
+        Status code of the response.
+    headers : dict
+        Response headers (lower-case names).
+    content : bytes
+        Response body.
+
+    Methods
+    -------
+    json()
+        Deserializes the body as JSON.
+    """
+
+    __slots__ = ("status_code", "headers", "content")
+
+    def __init__(self, status_code: int, headers: dict, content: bytes):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+
+    def json(self):
+        return json.loads(self.content.decode("utf-8"))
+
+
+class AsyncConnectionPool:
+    """
+    Minimal non-blocking HTTP/1.1 client over asyncio streams, which keeps
+    connections alive and reuses them between requests.
+
+    The pool must be used from one event loop.
+
+    Attributes
+    ----------
+    _max_connections_per_host : int
+        The maximum number of simultaneous connections to one host.
+    _keep_alive : bool
+        Whether to keep connections alive between requests.
+    _connect_timeout : float or None
+        Timeout (in seconds) of establishing a connection.
+    _read_timeout : float or None
+        Timeout (in seconds) of receiving the response.
+    _idle : dict
+        (scheme, host, port) -> list of idle (reader, writer) pairs.
+    _limits : dict
+        (scheme, host, port) -> asyncio.Semaphore limiting the connections.
+
+    Methods
+    -------
+    get(url, headers=None)
+        Coroutine, sends a GET request and returns AsyncResponse object.
+    close()
+        Closes all idle connections.
+    """
+
+    def __init__(self, max_connections_per_host=10, keep_alive=True,
+                 connect_timeout=None, read_timeout=None):
+        """
+        Constructs all the necessary attributes for the AsyncConnectionPool
+        object.
+
+        Parameters
+        ----------
+        max_connections_per_host : int
+            The maximum number of simultaneous connections to one host.
+        keep_alive : bool
+            Whether to keep connections alive between requests.
+        connect_timeout : float, optional
+            Timeout (in seconds) of establishing a connection.
+        read_timeout : float, optional
+            Timeout (in seconds) of receiving the response.
+        """
+
+        self._max_connections_per_host = max_connections_per_host
+        self._keep_alive = keep_alive
+        self._connect_timeout = connect_timeout
+        self._read_timeout = read_timeout
+        self._ssl_context = None
+        self._idle = {}
+        self._limits = {}
+
+    async def get(self, url: str, headers=None) -> AsyncResponse:
+        """
+        Sends a GET request and returns AsyncResponse object.
+
+        An idle connection to the host is reused, if there is one. If a reused
+        connection turns out to be closed by the server, the request is
+        repeated once on a new connection.
+
+        Parameters
+        ----------
+        url : str
+            Full URL of the request.
+        headers : dict, optional
+            Additional request headers.
+
+        Returns
+        -------
+        response : AsyncResponse
+            The response from the request.
+        """
+
+        parts = urlsplit(url)
+        secure = parts.scheme == "https"
+        port = parts.port or (443 if secure else 80)
+        key = (parts.scheme, parts.hostname, port)
+        target = parts.path or "/"
+        if parts.query:
+            target += "?" + parts.query
+        request_headers = {"Host": parts.netloc, "Accept": "application/json",
+                           "Connection": "keep-alive" if self._keep_alive
+                           else "close"}
+        request_headers.update(headers or {})
+        request = "GET {target} HTTP/1.1\r\n{headers}\r\n\r\n".format(
+            target=target, headers="\r\n".join(
+                "{}: {}".format(name, value)
+                for name, value in request_headers.items())).encode("latin-1")
+
+        limit = self._limits.get(key)
+        if limit is None:
+            limit = self._limits[key] = asyncio.Semaphore(
+                self._max_connections_per_host)
+        async with limit:
+            idle = self._idle.setdefault(key, [])
+            while idle:
+                connection = idle.pop()
+                try:
+                    return await self._send(key, connection, request)
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    continue
+            connection = await asyncio.wait_for(asyncio.open_connection(
+                parts.hostname, port, ssl=self._get_ssl_context() if secure
+                else None), self._connect_timeout)
+            return await self._send(key, connection, request)
+
+    async def close(self):
+        """
+        Closes all idle connections.
+
+        Returns
+        -------
+        None
+        """
+
+        for connections in self._idle.values():
+            for _, writer in connections:
+                writer.close()
+        self._idle.clear()
+
+    async def _send(self, key: tuple, connection: tuple,
+                    request: bytes) -> AsyncResponse:
+        reader, writer = connection
+        try:
+            writer.write(request)
+            await writer.drain()
+            response, reusable = await asyncio.wait_for(
+                self._read_response(reader), self._read_timeout)
+        except BaseException:
+            writer.close()
+            raise
+        if reusable and self._keep_alive:
+            self._idle[key].append(connection)
+        else:
+            writer.close()
+        return response
+
+    @staticmethod
+    async def _read_response(reader) -> tuple:
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionResetError("Connection closed by the server")
+        status_code = int(status_line.split()[1])
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        reusable = headers.get("connection", "").lower() != "close"
+        if status_code < 200 or status_code in (204, 304):
+            # These responses never have a body, reading until EOF would
+            # wait for the server to close a keep-alive connection.
+            content = b""
+        elif headers.get("transfer-encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int((await reader.readline()).split(b";")[0], 16)
+                if not size:
+                    await reader.readline()
+                    break
+                chunks.append(await reader.readexactly(size))
+                await reader.readexactly(2)
+            content = b"".join(chunks)
+        elif "content-length" in headers:
+            content = await reader.readexactly(int(headers["content-length"]))
+        else:
+            content = await reader.read()
+            reusable = False
+        return AsyncResponse(status_code, headers, content), reusable
+
+    def _get_ssl_context(self) -> ssl.SSLContext:
+        if self._ssl_context is None:
+            self._ssl_context = ssl.create_default_context()
+        return self._ssl_context
@@ -1,7 +1,18 @@
 import logging
-import requests
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import TYPE_CHECKING
 from urllib.parse import quote_plus
 
+from apies.base_api.resilience import CircuitOpenError, \
+    DeadlineExceededError, LatencyTracker
+from metrics import get_metrics
+
+if TYPE_CHECKING:
+    # requests is imported with the first session (see create_session).
+    import requests
+
 
 class BaseAPI:
     """
@@ -15,23 +26,65 @@ class BaseAPI:
         Base API host to work with.
     _api_version : str
         Version of using API.
+    _session : requests.Session or None
+        Pooled keep-alive session used for sending requests, None - it is
+        not created yet.
+    _session_options : dict
+        Parameters of create_session for the session created on the first
+        request.
+    _owns_session : bool
+        True if the session was created by the object itself (in that case
+        'close' closes it).
+    _timeout : tuple
+        Connect and read timeouts (in seconds) of requests.
+    _request_timeout : float or None
+        Deadline (in seconds) of a whole request, None - no deadline.
+    _hedge_percentile : float or None
+        Percentile of latency after which a hedged duplicate request is sent,
+        None - hedging is disabled.
+    _hedge_min_samples : int
+        The minimal number of latency samples to start hedging.
+    _circuit_breaker : instance attribute of CircuitBreaker class or None
+        Circuit breaker of the upstream, None - requests are always sent.
+    _latency : instance attribute of LatencyTracker class
+        Latencies of the last successful requests.
+    _metrics : instance attribute of Metrics or NullMetrics class
+        Metrics of requests (stage latencies, requests, errors and bytes).
 
     Methods
     -------
-    send_get_request(path, params, status_code=None)
+    send_get_request(path, params, status_code=None, timeout=None,
+    headers=None, try_acquire=None, endpoint=None)
         Sends a get-request to API and returns requests.Response object.
         Optional - status code check, if status code is not as expected -
         exception is raised.
     prepare_url(path, params):
         Forms a URL for a request.
+    _get_json(response)
+        Deserializes the body of the response as JSON.
+    close()
+        Closes the session, if it is owned by the object, and stops the
+        worker threads of deadlines and hedging.
     """
 
     logger = logging.getLogger("BaseAPI")
+    request_workers = 16
 
-    def __init__(self, scheme, host, api_version):
+    def __init__(self, scheme, host, api_version, session=None,
+                 pool_connections=10, pool_maxsize=10, pool_block=False,
+                 keep_alive=True, connect_timeout=None, read_timeout=None,
+                 request_timeout=None, hedge_percentile=None,
+                 hedge_min_samples=20, circuit_breaker=None, metrics=None,
+                 compression=True):
         """
         Constructs all the necessary attributes for the BaseAPI object.
 
+        If the session is not passed, a new pooled session is created with
+        'create_session' and the pool parameters on the first request (so
+        'requests' is not imported by processes which never send one). Pass
+        the same session to several objects to share its connections between
+        them.
+
         Parameters
         ----------
         scheme : str
@@ -40,21 +93,76 @@ class BaseAPI:
             Base API host to work with.
         api_version : str
             Version of using API.
+        session : requests.Session, optional
+            A session to send requests with.
+        pool_connections : int
+            The number of per-host connection pools to cache.
+        pool_maxsize : int
+            The maximum number of connections to keep alive per host.
+        pool_block : bool
+            Whether to wait for a free connection when the pool is exhausted.
+        keep_alive : bool
+            Whether to keep connections alive between requests.
+        connect_timeout : float, optional
+            Timeout (in seconds) of establishing a connection, None - no
+            timeout.
+        read_timeout : float, optional
+            Timeout (in seconds) of waiting for the response data, None - no
+            timeout.
+        request_timeout : float, optional
+            Deadline (in seconds) of a whole request including hedged
+            duplicates, None - no deadline.
+        hedge_percentile : float, optional
+            If it is passed (for example, 0.95), a duplicate request is sent
+            when the first one takes longer than this percentile of recent
+            latencies, and the first response of the two is used.
+        hedge_min_samples : int
+            The minimal number of latency samples to start hedging.
+        circuit_breaker : CircuitBreaker, optional
+            Circuit breaker of the upstream, it can be shared between several
+            objects.
+        metrics : Metrics, optional
+            Metrics of requests, metrics.get_metrics() by default.
+        compression : bool
+            Whether the created session asks for gzip or deflate compressed
+            responses.
         """
 
         self._scheme = scheme
         self._host = host
         self._api_version = api_version
+        self._owns_session = session is None
+        self._session = session
+        self._session_options = {"pool_connections": pool_connections,
+                                 "pool_maxsize": pool_maxsize,
+                                 "pool_block": pool_block,
+                                 "keep_alive": keep_alive,
+                                 "compression": compression}
+        self._session_lock = threading.Lock()
+        self._timeout = (connect_timeout, read_timeout)
+        self._request_timeout = request_timeout
+        self._hedge_percentile = hedge_percentile
+        self._hedge_min_samples = hedge_min_samples
+        self._circuit_breaker = circuit_breaker
+        self._latency = LatencyTracker()
+        self._metrics = metrics if metrics is not None else get_metrics()
+        self._executor = None
+        self._executor_lock = threading.Lock()
 
-    def send_get_request(self, path: str, params: dict, status_code=None) -> \
-            requests.Response:
+    def send_get_request(self, path: str, params: dict, status_code=None,
+                         timeout=None, headers=None, acquire=None,
+                         try_acquire=None,
+                         endpoint=None) -> "requests.Response":
         """
         Sends a get-request to API and returns requests.Response object.
         Optional - status code check, if status code is not as expected -
         exception is raised.
 
         By default, status_code is None, that means that status code check is
-        disabled.
+        disabled. Connection errors, timeouts and 5xx responses are failures
+        of the circuit breaker, while the circuit is open the request is not
+        sent at all. A 304 response to a conditional request (headers with
+        If-None-Match or If-Modified-Since) passes the status code check.
 
         Parameters
         ----------
@@ -64,6 +172,24 @@ class BaseAPI:
             A dict of required parameters and their values.
         status_code : int
             An expected status code of the response.
+        timeout : float, optional
+            Deadline (in seconds) of this request, _request_timeout by
+            default.
+        headers : dict, optional
+            Extra headers of the request.
+        acquire : callable, optional
+            Called when the circuit breaker lets the request through, just
+            before it is sent, an exception raised by it is passed on and
+            the request is not sent (for example, the request budget denies
+            it).
+        try_acquire : callable, optional
+            Called before a hedged duplicate is sent, the duplicate is a
+            request of its own and is only sent if it returns True (for
+            example, the request budget allows it).
+        endpoint : str, optional
+            Kind of the endpoint (for example, "historical") which labels
+            the request in metrics, the path by default. Paths which vary
+            (dates) must not be labels, every value is a series of its own.
 
         Returns
         -------
@@ -74,16 +200,72 @@ class BaseAPI:
         ------
         RuntimeError
             Raises if response status code is not as expected.
+        CircuitOpenError
+            Raises if the circuit of the upstream is open.
+        DeadlineExceededError
+            Raises if the request is not completed before the deadline.
+        requests.RequestException
+            Raises if the request fails.
         """
 
+        metrics = self._metrics
+        if metrics.enabled:
+            started = time.perf_counter()
         final_url = self.prepare_url(path, params)
-        response = requests.get(final_url)
+        if metrics.enabled:
+            sent = time.perf_counter()
+            metrics.observe("exchange_rates_stage_seconds", sent - started,
+                            stage="url_build")
+        breaker = self._circuit_breaker
+        if breaker is not None and not breaker.allow_request():
+            raise CircuitOpenError("The circuit of {} is open".format(
+                self._host))
+        if acquire is not None:
+            try:
+                acquire()
+            except Exception:
+                if breaker is not None:
+                    breaker.cancel_request()
+                raise
+        if timeout is None:
+            timeout = self._request_timeout
+        try:
+            if timeout is None and self._hedge_percentile is None:
+                response = self.__get(final_url, self._timeout, headers)
+            else:
+                response = self.__get_before_deadline(final_url, timeout,
+                                                      headers, try_acquire)
+        except Exception as error:
+            if breaker is not None:
+                breaker.record_failure()
+            if metrics.enabled:
+                metrics.increment("exchange_rates_upstream_errors_total",
+                                  error=type(error).__name__)
+            raise
+        if metrics.enabled:
+            metrics.observe("exchange_rates_stage_seconds",
+                            time.perf_counter() - sent, stage="http")
+            metrics.increment("exchange_rates_upstream_requests_total",
+                              endpoint=endpoint or path,
+                              status=response.status_code)
+            metrics.increment("exchange_rates_upstream_decoded_bytes_total",
+                              len(response.content))
+            metrics.increment("exchange_rates_upstream_bytes_total",
+                              self.__get_wire_size(response))
+        if breaker is not None:
+            if response.status_code >= 500:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
         if status_code:
             response_status_code = response.status_code
-            if response_status_code == status_code:
+            if response_status_code == status_code or \
+                    (response_status_code == 304 and headers and
+                     ("If-None-Match" in headers or
+                      "If-Modified-Since" in headers)):
                 self.logger.info("{url_for_logs} - GET - {code}:".format(
                     url_for_logs=final_url.split("?")[0],
-                    code=status_code))
+                    code=response_status_code))
             else:
                 raise RuntimeError("An error occurred, the status code does not"
                                    " match the expected one: "
@@ -92,6 +274,130 @@ class BaseAPI:
                                           expected_code=status_code))
         return response
 
+    def __get(self, url: str, timeout: tuple,
+              headers=None) -> "requests.Response":
+        started = time.monotonic()
+        response = self.__get_session().get(url, timeout=timeout,
+                                            headers=headers)
+        if response.status_code < 500:
+            self._latency.record(time.monotonic() - started)
+        return response
+
+    def __get_before_deadline(self, url: str, timeout, headers=None,
+                              try_acquire=None) -> "requests.Response":
+        """
+        Sends the request in a worker thread and waits for it no longer than
+        the timeout. If hedging is enabled and the request takes longer than
+        the percentile of recent latencies, a duplicate request is sent and
+        the first completed response is returned. The duplicate is only sent
+        if try_acquire (if it is passed) allows it.
+
+        Parameters
+        ----------
+        url : str
+            Final URL of the request.
+        timeout : float or None
+            Deadline (in seconds) of the request, None - no deadline.
+        headers : dict, optional
+            Extra headers of the request.
+        acquire : callable, optional
+            Called when the circuit breaker lets the request through, just
+            before it is sent, an exception raised by it is passed on and
+            the request is not sent (for example, the request budget denies
+            it).
+        try_acquire : callable, optional
+            Returns whether the hedged duplicate may be sent.
+
+        Returns
+        -------
+        response : requests.Response
+            The first completed response.
+
+        Raises
+        ------
+        DeadlineExceededError
+            Raises if no request is completed before the deadline.
+        """
+
+        started = time.monotonic()
+        deadline = None if timeout is None else started + timeout
+        hedge_at = None
+        if self._hedge_percentile is not None:
+            hedge_delay = self._latency.get_percentile(
+                self._hedge_percentile, self._hedge_min_samples)
+            if hedge_delay is not None:
+                hedge_at = started + hedge_delay
+        executor = self.__get_executor()
+        pending = {executor.submit(self.__get, url,
+                                   self.__get_socket_timeout(deadline),
+                                   headers)}
+        error = None
+        while pending:
+            limits = [limit for limit in (deadline, hedge_at)
+                      if limit is not None]
+            wait_time = max(min(limits) - time.monotonic(), 0) if limits \
+                else None
+            done, pending = wait(pending, timeout=wait_time,
+                                 return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    return future.result()
+                except Exception as exception:
+                    error = exception
+            now = time.monotonic()
+            if deadline is not None and now >= deadline:
+                raise DeadlineExceededError(
+                    "The request to {} is not completed in {} s".format(
+                        url.split("?")[0], timeout))
+            if hedge_at is not None and now >= hedge_at and pending:
+                hedge_at = None
+                if try_acquire is not None and not try_acquire():
+                    self.logger.info("{} - hedged request is not allowed".
+                                     format(url.split("?")[0]))
+                    continue
+                self.logger.info("{} - hedged request".format(
+                    url.split("?")[0]))
+                pending.add(executor.submit(
+                    self.__get, url, self.__get_socket_timeout(deadline),
+                    headers))
+        raise error
+
+    def __get_socket_timeout(self, deadline) -> tuple:
+        # Connect and read timeouts are cut to the time left until the
+        # deadline, so an abandoned request does not hang its worker.
+        if deadline is None:
+            return self._timeout
+        remaining = max(deadline - time.monotonic(), 0.001)
+        return tuple(remaining if limit is None else min(limit, remaining)
+                     for limit in self._timeout)
+
+    @staticmethod
+    def __get_wire_size(response: "requests.Response") -> int:
+        # Size of the body as received (compressed), the decoded size if the
+        # raw stream does not know it.
+        try:
+            return int(response.raw.tell())
+        except (AttributeError, TypeError, ValueError, OSError):
+            return len(response.content)
+
+    def __get_session(self) -> "requests.Session":
+        session = self._session
+        if session is None:
+            with self._session_lock:
+                if self._session is None:
+                    # Deferred, importing requests takes about 0.1 s.
+                    from apies.base_api.session import create_session
+                    self._session = create_session(**self._session_options)
+                session = self._session
+        return session
+
+    def __get_executor(self) -> ThreadPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.request_workers)
+            return self._executor
+
     def prepare_url(self, path: str, params: dict) -> str:
         """
         Forms a URL for a request.
@@ -115,3 +421,51 @@ class BaseAPI:
         params = "&".join(["{k}={v}".format(
             k=key, v=quote_plus(params[key], ",")) for key in params])
         return "{}?{}".format(url, params)
+
+    def _get_json(self, response: "requests.Response"):
+        """
+        Deserializes the body of the response as JSON (the decoding time is
+        recorded in metrics).
+
+        Parameters
+        ----------
+        response : requests.Response
+            The response from the request.
+
+        Returns
+        -------
+        data
+            The deserialized body.
+        """
+
+        if not self._metrics.enabled:
+            return response.json()
+        started = time.perf_counter()
+        data = response.json()
+        self._metrics.observe("exchange_rates_stage_seconds",
+                              time.perf_counter() - started,
+                              stage="json_decode")
+        return data
+
+    def close(self):
+        """
+        Closes the session, if it is owned by the object, and the thread pool
+        of hedged requests. Both are created again by the next request.
+
+        A shared session passed to the constructor is left open, it must be
+        closed by its owner.
+
+        Returns
+        -------
+        None
+        """
+
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+        if self._owns_session:
+            with self._session_lock:
+                session, self._session = self._session, None
+            if session is not None:
+                session.close()
@@ -0,0 +1,175 @@
+import calendar
+import datetime
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from cache_folder_path import CacheFolderPath
+
+try:
+    import fcntl
+except ImportError:  # not a POSIX system, the budget is per process
+    fcntl = None
+
+
+class QuotaExceededError(RuntimeError):
+    """Raised instead of sending a request which the budget does not allow."""
+
+
+class RequestBudget:
+    """
+    Budget of requests of one access key: a monthly quota and a token bucket
+    which spreads it over the month.
+
+    The bucket holds at most 'burst' tokens and is refilled at the rate of
+    quota / seconds of the month. A request takes one token and one request
+    of the monthly quota. The state is kept in a small JSON file guarded by
+    an advisory lock, so the budget is shared by all threads and processes
+    of the host which use the same file.
+
+    When the budget is tight, a 'reserve' part of the bucket and of the
+    monthly quota is left for priority requests (refreshes of hot keys and of
+    missing entries), ordinary requests are denied.
+
+    Attributes
+    ----------
+    _quota : int
+        The number of requests per calendar month (UTC).
+    _burst : float
+        Capacity of the token bucket.
+    _reserve : float
+        Part (0 - 1) of the bucket and of the quota kept for priority
+        requests.
+    _state_path : str
+        Full os path of the state file.
+    _clock : callable
+        Source of the current time (seconds since the epoch).
+
+    Methods
+    -------
+    try_acquire(priority=False)
+        Takes one request from the budget, if it is allowed.
+    get_remaining()
+        Returns the state of the budget.
+    """
+
+    def __init__(self, quota: int, burst=10, reserve=0.2, state_path=None,
+                 clock=time.time):
+        """
+        Constructs all the necessary attributes for the RequestBudget object.
+
+        Parameters
+        ----------
+        quota : int
+            The number of requests per calendar month (UTC).
+        burst : int
+            Capacity of the token bucket (the maximal number of requests in
+            a row).
+        reserve : float
+            Part (0 - 1) of the bucket and of the quota kept for priority
+            requests.
+        state_path : str, optional
+            Full os path of the state file, ".request_budget.json" in
+            CacheFolderPath.cache_folder_path by default.
+        clock : callable
+            Source of the current time (seconds since the epoch).
+        """
+
+        if quota < 1 or burst < 1:
+            raise ValueError("quota and burst must be positive")
+        if not 0 <= reserve < 1:
+            raise ValueError("reserve must be in [0, 1)")
+        self._quota = quota
+        self._burst = float(burst)
+        self._reserve = reserve
+        self._state_path = state_path if state_path is not None else \
+            os.path.join(CacheFolderPath.cache_folder_path,
+                         ".request_budget.json")
+        self._clock = clock
+        self._lock = threading.Lock()
+
+    def try_acquire(self, priority=False) -> bool:
+        """
+        Takes one request from the budget, if it is allowed.
+
+        Parameters
+        ----------
+        priority : bool
+            Whether the request may use the reserve.
+
+        Returns
+        -------
+        acquired : bool
+            True if the request may be sent.
+        """
+
+        with self.__state() as state:
+            reserve_tokens = 0.0 if priority else self._reserve * self._burst
+            reserve_quota = 0 if priority else int(self._reserve * self._quota)
+            if state["tokens"] < 1.0 + reserve_tokens or \
+                    state["used"] >= self._quota - reserve_quota:
+                return False
+            state["tokens"] -= 1.0
+            state["used"] += 1
+            return True
+
+    def get_remaining(self) -> dict:
+        """
+        Returns the state of the budget.
+
+        Returns
+        -------
+        remaining : dict
+            The month, the quota, the numbers of used and remaining requests
+            of the month and the current number of tokens in the bucket.
+        """
+
+        with self.__state() as state:
+            return {"month": state["month"], "quota": self._quota,
+                    "used": state["used"],
+                    "remaining": max(self._quota - state["used"], 0),
+                    "tokens": state["tokens"]}
+
+    @contextmanager
+    def __state(self):
+        # Yields the refilled state, which is written back on exit.
+        with self._lock, self.__file_lock() as state_file:
+            state_file.seek(0)
+            try:
+                state = json.loads(state_file.read() or "{}")
+            except ValueError:
+                state = {}
+            now = self._clock()
+            moment = datetime.datetime.utcfromtimestamp(now)
+            month = moment.strftime("%Y-%m")
+            if state.get("month") != month:
+                state = {"month": month, "used": 0,
+                         "tokens": state.get("tokens", self._burst),
+                         "updated": now}
+            seconds = calendar.monthrange(moment.year,
+                                          moment.month)[1] * 86400
+            elapsed = max(now - state["updated"], 0.0)
+            state["tokens"] = min(self._burst, state["tokens"] +
+                                  elapsed * self._quota / seconds)
+            state["updated"] = now
+            yield state
+            state_file.seek(0)
+            state_file.truncate()
+            state_file.write(json.dumps(state))
+            state_file.flush()
+
+    @contextmanager
+    def __file_lock(self):
+        directory = os.path.dirname(self._state_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self._state_path, "a+") as state_file:
+            if fcntl is not None:
+                fcntl.flock(state_file, fcntl.LOCK_EX)
+            try:
+                yield state_file
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(state_file, fcntl.LOCK_UN)
@@ -0,0 +1,187 @@
+import threading
+import time
+from collections import deque
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of sending a request while the circuit is open."""
+
+
+class DeadlineExceededError(RuntimeError):
+    """Raised when a request is not completed before its deadline."""
+
+
+class LatencyTracker:
+    """
+    Keeps the latencies of the last requests and returns their percentiles.
+
+    Attributes
+    ----------
+    _samples : collections.deque
+        Latencies (in seconds) of the last 'window' requests.
+
+    Methods
+    -------
+    record(latency)
+        Adds the latency of a completed request.
+    get_percentile(fraction, min_samples=1)
+        Returns the latency below which the 'fraction' of requests completed.
+    """
+
+    def __init__(self, window=256):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, latency: float):
+        with self._lock:
+            self._samples.append(latency)
+
+    def get_percentile(self, fraction: float, min_samples=1):
+        """
+        Returns the latency below which the 'fraction' of the recorded
+        requests completed (nearest-rank method).
+
+        Parameters
+        ----------
+        fraction : float
+            Fraction of requests (0.95 - the 95th percentile).
+        min_samples : int
+            The minimal number of samples to compute the percentile.
+
+        Returns
+        -------
+        latency : float or None
+            Latency in seconds or None, if there are not enough samples.
+        """
+
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples or len(samples) < min_samples:
+            return None
+        rank = max(int(round(fraction * len(samples))) - 1, 0)
+        return samples[min(rank, len(samples) - 1)]
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker of requests to one upstream.
+
+    After 'failure_threshold' consecutive failures the circuit opens and
+    requests are rejected without calling the upstream for 'reset_timeout'
+    seconds. Then the circuit is half-open: one trial request is let through,
+    its success closes the circuit, its failure opens it again. One breaker
+    can be shared by several API objects of the same upstream.
+
+    Attributes
+    ----------
+    CLOSED, OPEN, HALF_OPEN : str
+        States of the circuit.
+    _failure_threshold : int
+        The number of consecutive failures which opens the circuit.
+    _reset_timeout : float
+        Time (in seconds) the circuit stays open.
+    _clock : callable
+        Source of the current monotonic time.
+
+    Methods
+    -------
+    allow_request()
+        Checks whether a request may be sent now.
+    cancel_request()
+        Gives back the permission of allow_request for a request which is not
+        sent after all.
+    record_success()
+        Records a successful request.
+    record_failure()
+        Records a failed request.
+    get_state()
+        Returns the current state of the circuit.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0,
+                 clock=time.monotonic):
+        """
+        Constructs all the necessary attributes for the CircuitBreaker
+        object.
+
+        Parameters
+        ----------
+        failure_threshold : int
+            The number of consecutive failures which opens the circuit.
+        reset_timeout : float
+            Time (in seconds) the circuit stays open before a trial request.
+        clock : callable
+            Source of the current monotonic time.
+        """
+
+        if failure_threshold < 1:
+            raise ValueError("failure_threshold must be positive")
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._clock = clock
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        """
+        Checks whether a request may be sent now. In the half-open state only
+        one trial request at a time is allowed.
+
+        Returns
+        -------
+        allowed : bool
+            True if the request may be sent.
+        """
+
+        with self._lock:
+            if self._state == self.OPEN:
+                if self._clock() - self._opened_at < self._reset_timeout:
+                    return False
+                self._state = self.HALF_OPEN
+            if self._state == self.HALF_OPEN:
+                if self._trial_in_flight:
+                    return False
+                self._trial_in_flight = True
+            return True
+
+    def cancel_request(self):
+        """
+        Gives back the permission of allow_request for a request which is not
+        sent after all (in the half-open state, another trial is allowed).
+
+        Returns
+        -------
+        None
+        """
+
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or \
+                    self._failures >= self._failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = self._clock()
+            self._trial_in_flight = False
+
+    def get_state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and \
+                    self._clock() - self._opened_at >= self._reset_timeout:
+                return self.HALF_OPEN
+            return self._state
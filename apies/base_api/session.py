@@ -0,0 +1,46 @@
+import requests
+from requests.adapters import HTTPAdapter
+
+
+def create_session(pool_connections=10, pool_maxsize=10, pool_block=False,
+                   keep_alive=True, compression=True) -> requests.Session:
+    """
+    Creates a requests.Session object with a pooled HTTP(S) adapter.
+
+    The session keeps TCP (and TLS) connections alive between requests, so
+    only the first request to a host pays for the handshake. One session can
+    be shared between several BaseAPI objects and threads: the connection
+    pools of the adapter are thread-safe. Responses are requested gzip or
+    deflate compressed (decompressed transparently), which cuts the size of
+    full rates tables several times.
+
+    Parameters
+    ----------
+    pool_connections : int
+        The number of per-host connection pools to cache.
+    pool_maxsize : int
+        The maximum number of connections to keep alive per host.
+    pool_block : bool
+        If True, a request waits for a free connection when all 'pool_maxsize'
+        connections of the host are busy, instead of opening an extra one.
+    keep_alive : bool
+        If False, every request asks the server to close the connection.
+    compression : bool
+        If False, responses are requested without compression.
+
+    Returns
+    -------
+    session : requests.Session
+        Configured session.
+    """
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_connections,
+                          pool_maxsize=pool_maxsize, pool_block=pool_block)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["Accept-Encoding"] = "gzip, deflate" if compression \
+        else "identity"
+    if not keep_alive:
+        session.headers["Connection"] = "close"
+    return session
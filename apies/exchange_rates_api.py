@@ -1,6 +1,8 @@
+import datetime
 import os
 
 from apies.base_api.base_api import BaseAPI
+from apies.base_api.request_budget import QuotaExceededError
 
 
 class ExchangeRatesApi(BaseAPI):
@@ -9,22 +11,35 @@ class ExchangeRatesApi(BaseAPI):
 
     Attributes
     ----------
-    _key : str
-        API key for requests access (obtained from the environment
-        variable named 'ACCESS KEY').
+    _key : str or None
+        API key for requests access, None - it is obtained from the
+        environment variable named 'ACCESS_KEY' when a request is formed
+        (see get_key).
     _endpoint : str
         Exchange Rates API endpoint, which provides specific functionality.
+    _request_budget : instance attribute of RequestBudget class or None
+        Budget of requests of the key, None - requests are not limited.
 
     Methods
     -------
-    send_exchange_rate_request(base, *symbols)
+    get_key()
+        Returns the API key.
+    send_exchange_rate_request(base, *symbols, status_code, priority=False,
+    validators=None)
         Forms a dictionary of parameters and passes it with '_key' variable
         to the 'send_get_request' method.
+    send_historical_request(date, base, *symbols, status_code,
+    priority=False)
+        Requests the rates of one past date.
+    send_timeseries_request(start_date, end_date, base, *symbols,
+    status_code, priority=False)
+        Requests the daily rates of a range of past dates.
     """
 
-    _key = os.environ.get("ACCESS_KEY")
+    _key = None
 
-    def __init__(self, endpoint: str, scheme: str, host: str, api_version: str):
+    def __init__(self, endpoint: str, scheme: str, host: str, api_version: str,
+                 request_budget=None, **kwargs):
         """
         Constructs all the necessary attributes for the ExchangeRatesApi object.
 
@@ -38,19 +53,100 @@ class ExchangeRatesApi(BaseAPI):
             Base API host to work with.
         api_version : str
             Version of using API.
+        request_budget : RequestBudget, optional
+            Budget of requests of the key, it can be shared between several
+            objects.
+        **kwargs
+            Session, connection pool and timeout parameters of BaseAPI.
         """
 
-        super().__init__(scheme=scheme, host=host, api_version=api_version)
+        super().__init__(scheme=scheme, host=host, api_version=api_version,
+                         **kwargs)
         self._endpoint = endpoint
+        self._request_budget = request_budget
+
+    @classmethod
+    def get_key(cls):
+        """
+        Returns the API key: _key, if it is set, otherwise the environment
+        variable 'ACCESS_KEY' (read on every call, so it may be set after
+        import).
+
+        Returns
+        -------
+        key : str or None
+            The API key.
+        """
+
+        return cls._key if cls._key is not None else \
+            os.environ.get("ACCESS_KEY")
 
     def send_exchange_rate_request(self, base: str, *symbols: str,
-                                   status_code: int) -> dict:
+                                   status_code: int, priority=False,
+                                   validators=None):
         """
         Forms a dictionary of parameters and passes it with '_key' variable
         to the 'send_get_request' method.
 
+        The ETag and Last-Modified headers of the response are returned in
+        the 'validators' key of the data. If the validators of a cached copy
+        are passed, the request is conditional: when the data has not
+        changed, the server answers 304 Not Modified without a body and None
+        is returned.
+
+        Parameters
+        ----------
+        base : str
+            Base currency for comparison (three-letter currency code).
+        *symbols : str
+            A number of currencies for comparison with base one (three-letter
+            currency code for each)
+        status_code : int
+            An expected status code of the response.
+        priority : bool
+            Whether the request may use the reserve of the request budget.
+        validators : dict, optional
+            The 'validators' of the cached copy ('etag' and 'last_modified').
+
+        Returns
+        -------
+        data : dict or None
+            Dictionary with data taken from the response, None - the data
+            has not changed since the validators.
+
+        Raises
+        ------
+        QuotaExceededError
+            Raises if the request budget does not allow the request.
+        """
+
+        response = self.send_get_request(
+            path=self._endpoint, params=self.__get_params(base, symbols),
+            status_code=status_code,
+            headers=self.__get_conditional_headers(validators),
+            acquire=lambda: self.__acquire(priority),
+            try_acquire=self.__get_hedge_acquire(priority),
+            endpoint=self._endpoint)
+        if response.status_code == 304:
+            return None
+        data = self._get_json(response)
+        validators = {name: response.headers[header] for name, header in
+                      (("etag", "ETag"), ("last_modified", "Last-Modified"))
+                      if header in response.headers}
+        if validators and isinstance(data, dict):
+            data["validators"] = validators
+        return data
+
+    def send_historical_request(self, date: datetime.date, base: str,
+                                *symbols: str, status_code: int,
+                                priority=False) -> dict:
+        """
+        Requests the rates of one past date (the historical endpoint).
+
         Parameters
         ----------
+        date : datetime.date
+            Date of the rates.
         base : str
             Base currency for comparison (three-letter currency code).
         *symbols : str
@@ -58,16 +154,108 @@ class ExchangeRatesApi(BaseAPI):
             currency code for each)
         status_code : int
             An expected status code of the response.
+        priority : bool
+            Whether the request may use the reserve of the request budget.
 
         Returns
         -------
-        self.send_get_request(path=self._endpoint_and_key, params=params,
-        status_code=status_code).json() : dict
+        data : dict
             Dictionary with data taken from the response.
+
+        Raises
+        ------
+        QuotaExceededError
+            Raises if the request budget does not allow the request.
+        """
+
+        return self._get_json(self.send_get_request(
+            path=date.isoformat(), params=self.__get_params(base, symbols),
+            status_code=status_code, acquire=lambda: self.__acquire(priority),
+            try_acquire=self.__get_hedge_acquire(priority),
+            endpoint="historical"))
+
+    def send_timeseries_request(self, start_date: datetime.date,
+                                end_date: datetime.date, base: str,
+                                *symbols: str, status_code: int,
+                                priority=False) -> dict:
         """
+        Requests the daily rates of a range of past dates (the time-series
+        endpoint), the 'rates' parameter of the response is a dict of date
+        -> rates.
 
-        params = {"access_key": self._key, "base": base}
+        Parameters
+        ----------
+        start_date : datetime.date
+            The first date of the range.
+        end_date : datetime.date
+            The last date of the range (inclusive).
+        base : str
+            Base currency for comparison (three-letter currency code).
+        *symbols : str
+            A number of currencies for comparison with base one (three-letter
+            currency code for each)
+        status_code : int
+            An expected status code of the response.
+        priority : bool
+            Whether the request may use the reserve of the request budget.
+
+        Returns
+        -------
+        data : dict
+            Dictionary with data taken from the response.
+
+        Raises
+        ------
+        QuotaExceededError
+            Raises if the request budget does not allow the request.
+        """
+
+        params = self.__get_params(base, symbols)
+        params["start_date"] = start_date.isoformat()
+        params["end_date"] = end_date.isoformat()
+        return self._get_json(self.send_get_request(
+            path="timeseries", params=params, status_code=status_code,
+            acquire=lambda: self.__acquire(priority),
+            try_acquire=self.__get_hedge_acquire(priority),
+            endpoint="timeseries"))
+
+    def __get_params(self, base: str, symbols: tuple) -> dict:
+        params = {"access_key": self.get_key(), "base": base}
         if len(symbols):
             params["symbols"] = ",".join([symbol.upper() for symbol in symbols])
-        return self.send_get_request(path=self._endpoint, params=params,
-                                     status_code=status_code).json()
+        return params
+
+    @staticmethod
+    def __get_conditional_headers(validators):
+        if not validators:
+            return None
+        headers = {}
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+        return headers or None
+
+    def __acquire(self, priority: bool):
+        # Called by send_get_request after the circuit breaker, so a request
+        # which the circuit rejects does not take the budget.
+        if not self.__try_acquire(priority):
+            raise QuotaExceededError("The request budget of the access key "
+                                     "is exhausted")
+
+    def __try_acquire(self, priority: bool) -> bool:
+        # Every HTTP request (a hedged duplicate too) takes one request of
+        # the budget.
+        if self._request_budget is None:
+            return True
+        acquired = self._request_budget.try_acquire(priority=priority)
+        if self._metrics.enabled:
+            self._metrics.increment("exchange_rates_request_budget_total",
+                                    result="acquired" if acquired else
+                                    "denied", priority=priority)
+        return acquired
+
+    def __get_hedge_acquire(self, priority: bool):
+        if self._request_budget is None:
+            return None
+        return lambda: self.__try_acquire(priority)
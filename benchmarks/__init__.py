@@ -0,0 +1,5 @@
+import os
+
+# The stub server accepts any access key, but ExchangeRatesApi needs one to
+# form the request URL.
+os.environ.setdefault("ACCESS_KEY", "stub-access-key")
@@ -0,0 +1,105 @@
+import asyncio
+from http import HTTPStatus
+from urllib.parse import urlparse
+
+from benchmarks.stub_server import CURRENCIES, StubExchangeRates, parse_query
+
+
+class AsyncStubExchangeRatesServer(StubExchangeRates):
+    """
+    Local asyncio stub of the Exchange Rates API for tests of asynchronous
+    clients. It must be started and stopped in the event loop of the test.
+
+    Methods
+    -------
+    start()
+        Coroutine, starts serving.
+    stop()
+        Coroutine, stops the server.
+    """
+
+    def __init__(self, latency=0.0, currencies=len(CURRENCIES),
+                 api_version="v1", host="127.0.0.1", port=0):
+        """
+        Constructs all the necessary attributes for the stub server.
+
+        Parameters
+        ----------
+        latency : float
+            Delay (in seconds) before every response.
+        currencies : int
+            The number of currencies in the rates table.
+        api_version : str
+            Version of the API in the URL path.
+        host : str
+            Interface to listen on.
+        port : int
+            Port to listen on, 0 - any free port.
+        """
+
+        super().__init__(latency=latency, currencies=currencies,
+                         api_version=api_version)
+        self._address = (host, port)
+        self._server = None
+
+    @property
+    def host(self) -> str:
+        return "{}:{}".format(
+            *self._server.sockets[0].getsockname()[:2])
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._serve, *self._address)
+        return self
+
+    async def stop(self):
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _serve(self, reader, writer):
+        self.register_connection()
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                target = request_line.decode("latin-1").split()[1]
+                fault = self.begin_request()
+                try:
+                    delay = self.latency + (fault.delay if fault else 0.0)
+                    if delay:
+                        await asyncio.sleep(delay)
+                    if fault and fault.drop:
+                        break
+                    url = urlparse(target)
+                    if fault and fault.status:
+                        status, payload = fault.status, self._error(
+                            fault.status, "injected_fault")
+                    else:
+                        status, payload = self.handle(url.path,
+                                                      parse_query(url.query))
+                finally:
+                    self.end_request()
+                status, response_headers, body = self.encode_response(
+                    status, payload, headers)
+                writer.write("HTTP/1.1 {status} {phrase}\r\n{headers}"
+                             "\r\n".format(
+                                 status=status,
+                                 phrase=HTTPStatus(status).phrase,
+                                 headers="".join(
+                                     "{}: {}\r\n".format(name, value)
+                                     for name, value in response_headers)
+                             ).encode("latin-1") + body)
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
@@ -0,0 +1,59 @@
+"""
+Compares the number of upstream requests and wall-clock time of concurrent
+CurrencyClient.get_currency calls on a cold cache without and with the
+micro-batching window.
+
+Usage: python -m benchmarks.batching_benchmark [threads] [window] [latency]
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from benchmarks.bulk_benchmark import make_queries
+from benchmarks.common import print_report
+from benchmarks.stub_server import StubExchangeRatesServer
+from cache.json_cache import JSONCache
+from clients.currency_client import CurrencyClient
+
+
+def run(server, queries, batch_window) -> dict:
+    with tempfile.TemporaryDirectory() as cache_path:
+        client = CurrencyClient(minutes=60, batch_window=batch_window,
+                                cache_manager=JSONCache(cache_path))
+        barrier = threading.Barrier(len(queries) + 1)
+
+        def call(base, symbols):
+            barrier.wait()
+            client.get_currency(*symbols, base=base)
+
+        threads = [threading.Thread(target=call, args=query)
+                   for query in queries]
+        for thread in threads:
+            thread.start()
+        server.reset_counters()
+        barrier.wait()
+        started = time.perf_counter()
+        for thread in threads:
+            thread.join()
+        return {"seconds": time.perf_counter() - started,
+                "upstream_requests": server.request_count}
+
+
+def main(count=200, window=0.005, latency=0.02):
+    queries = make_queries(count)
+    with StubExchangeRatesServer(latency=latency) as server:
+        os.environ["SCHEME"] = server.scheme
+        os.environ["HOST"] = server.host
+        os.environ["API_VERSION"] = server.api_version
+        results = {"no batching": run(server, queries, None),
+                   "batch_window={}".format(window):
+                       run(server, queries, window)}
+    print_report("{} concurrent get_currency calls, {} distinct queries, "
+                 "{} s upstream latency, cold cache".format(
+                     count, len(set(queries)), latency), results)
+
+
+if __name__ == "__main__":
+    main(*[float(arg) if "." in arg else int(arg) for arg in sys.argv[1:4]])
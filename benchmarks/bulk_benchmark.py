@@ -0,0 +1,55 @@
+"""
+Compares wall-clock time of a loop over CurrencyClient.get_currency with one
+CurrencyClient.get_currencies call for the same queries on a cold cache.
+
+Usage: python -m benchmarks.bulk_benchmark [queries] [latency]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+from benchmarks.common import print_report
+from benchmarks.stub_server import CURRENCIES, StubExchangeRatesServer
+from cache.json_cache import JSONCache
+from clients.currency_client import CurrencyClient
+
+
+def make_queries(count: int, seed=0) -> list:
+    generator = random.Random(seed)
+    bases = CURRENCIES[:10]
+    return [(generator.choice(bases),
+             tuple(generator.sample(CURRENCIES, generator.randint(1, 3))))
+            for _ in range(count)]
+
+
+def run(server, queries, bulk: bool) -> dict:
+    with tempfile.TemporaryDirectory() as cache_path:
+        client = CurrencyClient(minutes=60,
+                                cache_manager=JSONCache(cache_path))
+        server.reset_counters()
+        started = time.perf_counter()
+        if bulk:
+            client.get_currencies(queries)
+        else:
+            for base, symbols in queries:
+                client.get_currency(*symbols, base=base)
+        return {"seconds": time.perf_counter() - started,
+                "upstream_requests": server.request_count}
+
+
+def main(count=200, latency=0.02):
+    queries = make_queries(count)
+    with StubExchangeRatesServer(latency=latency) as server:
+        os.environ["SCHEME"] = server.scheme
+        os.environ["HOST"] = server.host
+        os.environ["API_VERSION"] = server.api_version
+        results = {"get_currency loop": run(server, queries, bulk=False),
+                   "get_currencies": run(server, queries, bulk=True)}
+    print_report("{} queries, {} s upstream latency, cold cache".format(
+        count, latency), results)
+
+
+if __name__ == "__main__":
+    main(*[float(arg) if "." in arg else int(arg) for arg in sys.argv[1:3]])
@@ -0,0 +1,98 @@
+"""
+Measures the cold start of short-lived processes: the import time of
+CurrencyClient, its construction and the first lookup, each in a fresh
+interpreter, with an empty cache, with an empty cache and a warm-start
+snapshot, and with a populated cache. The report also lists the heavy
+modules ('requests', 'numpy') loaded by the import and the share of first
+lookups served without a request to API.
+
+Usage: python -m benchmarks.cold_start_benchmark [runs] [latency]
+"""
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.common import print_report, summarize
+from benchmarks.stub_server import StubExchangeRatesServer
+from cache.json_cache import JSONCache
+from clients.currency_client import CurrencyClient
+from clients.warm_start import save_snapshot
+
+CHILD_CODE = """
+import json, sys, time
+started = time.perf_counter()
+from cache.json_cache import JSONCache
+from clients.currency_client import CurrencyClient
+imported = time.perf_counter()
+heavy = [name for name in ("requests", "numpy") if name in sys.modules]
+client = CurrencyClient(minutes=60, cache_manager=JSONCache(sys.argv[1]),
+                        warm_start=sys.argv[2] or None)
+constructed = time.perf_counter()
+snapshot = client.get_currency("USD", "RUB")
+looked_up = time.perf_counter()
+print(json.dumps({"import": imported - started,
+                  "construct": constructed - imported,
+                  "first_lookup": looked_up - constructed,
+                  "from_cache": snapshot.from_cache, "heavy": heavy}))
+"""
+
+
+def run_child(server, cache_path: str, snapshot_path: str) -> dict:
+    environment = dict(os.environ, SCHEME=server.scheme, HOST=server.host,
+                       API_VERSION=server.api_version)
+    return json.loads(subprocess.check_output(
+        [sys.executable, "-c", CHILD_CODE, cache_path, snapshot_path],
+        env=environment,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+
+def run(server, scenario: str, runs: int, work_path: str) -> dict:
+    samples = {"import": [], "construct": [], "first_lookup": []}
+    served_from_cache = 0
+    heavy = set()
+    snapshot_path = os.path.join(work_path, "snapshot.json.gz")
+    populated_path = os.path.join(work_path, "populated")
+    server.reset_counters()
+    for run_number in range(runs):
+        if scenario == "populated cache":
+            cache_path = populated_path
+        else:
+            cache_path = os.path.join(work_path, "cold-{}".format(run_number))
+        result = run_child(server, cache_path, snapshot_path
+                           if scenario == "warm-start snapshot" else "")
+        for name in samples:
+            samples[name].append(result[name])
+        served_from_cache += result["from_cache"]
+        heavy.update(result["heavy"])
+        if cache_path != populated_path:
+            shutil.rmtree(cache_path, ignore_errors=True)
+    report = {name: summarize(values) for name, values in samples.items()}
+    report["from_cache_ratio"] = served_from_cache / runs
+    report["upstream_requests"] = server.request_count
+    report["heavy_modules"] = sorted(heavy)
+    return report
+
+
+def main(runs=10, latency=0.05):
+    with StubExchangeRatesServer(latency=latency) as server, \
+            tempfile.TemporaryDirectory() as work_path:
+        os.environ["SCHEME"] = server.scheme
+        os.environ["HOST"] = server.host
+        os.environ["API_VERSION"] = server.api_version
+        # The snapshot and the populated cache are built by this process.
+        populated = JSONCache(os.path.join(work_path, "populated"))
+        CurrencyClient(minutes=60, cache_manager=populated).get_currency(
+            "USD", "RUB")
+        save_snapshot(os.path.join(work_path, "snapshot.json.gz"), populated)
+        results = {scenario: run(server, scenario, runs, work_path)
+                   for scenario in ("empty cache", "warm-start snapshot",
+                                    "populated cache")}
+    print_report("Cold start of {} fresh processes per scenario, {} s "
+                 "upstream latency".format(runs, latency), results)
+
+
+if __name__ == "__main__":
+    main(*[float(arg) if "." in arg else int(arg) for arg in sys.argv[1:3]])
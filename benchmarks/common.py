@@ -0,0 +1,63 @@
+import json
+import time
+
+
+def percentile(sorted_samples: list, fraction: float) -> float:
+    """
+    Returns the value below which the 'fraction' of sorted samples falls
+    (nearest-rank method).
+    """
+
+    if not sorted_samples:
+        return 0.0
+    rank = max(int(round(fraction * len(sorted_samples))) - 1, 0)
+    return sorted_samples[min(rank, len(sorted_samples) - 1)]
+
+
+def summarize(samples: list) -> dict:
+    """
+    Summarizes latency samples (in seconds) as a dict of milliseconds.
+
+    Parameters
+    ----------
+    samples : list
+        Latency samples in seconds.
+
+    Returns
+    -------
+    summary : dict
+        The number of samples, throughput (calls per second), mean, p50, p90,
+        p99 and max latency in milliseconds.
+    """
+
+    ordered = sorted(samples)
+    count = len(ordered)
+    total = sum(ordered)
+    return {"count": count,
+            "ops_per_s": count / total if total else 0.0,
+            "mean_ms": total / count * 1000 if count else 0.0,
+            "p50_ms": percentile(ordered, 0.5) * 1000,
+            "p90_ms": percentile(ordered, 0.9) * 1000,
+            "p99_ms": percentile(ordered, 0.99) * 1000,
+            "max_ms": ordered[-1] * 1000 if count else 0.0}
+
+
+def measure(function, repeat: int) -> list:
+    """
+    Calls the function 'repeat' times and returns the latency of each call in
+    seconds.
+    """
+
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def print_report(title: str, results: dict):
+    """Prints benchmark results as indented JSON under the title."""
+
+    print(title)
+    print(json.dumps(results, indent=2, sort_keys=True))
@@ -0,0 +1,72 @@
+"""
+Compares a pure-Python per-row conversion loop with one
+CurrencyClient.convert call (cached NumPy cross-rate matrix) for the same
+batch of (amount, from_currency, to_currency) rows on a warm cache.
+
+Usage: python -m benchmarks.convert_benchmark [rows]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+import numpy
+
+from benchmarks.common import print_report
+from benchmarks.stub_server import CURRENCIES, StubExchangeRatesServer
+from cache.json_cache import JSONCache
+from clients.currency_client import CurrencyClient
+
+
+def make_rows(count: int, seed=0) -> tuple:
+    generator = random.Random(seed)
+    amounts = [generator.uniform(1, 1000) for _ in range(count)]
+    from_codes = [generator.choice(CURRENCIES) for _ in range(count)]
+    to_codes = [generator.choice(CURRENCIES) for _ in range(count)]
+    return amounts, from_codes, to_codes
+
+
+def convert_loop(table: dict, amounts, from_codes, to_codes) -> list:
+    rates = dict(table["rates"])
+    rates[table["base"]] = 1.0
+    return [amount * rates[to_code] / rates[from_code]
+            for amount, from_code, to_code in zip(amounts, from_codes,
+                                                  to_codes)]
+
+
+def main(count=1000000):
+    amounts, from_codes, to_codes = make_rows(count)
+    arrays = (numpy.array(amounts), numpy.array(from_codes),
+              numpy.array(to_codes))
+    with StubExchangeRatesServer() as server, \
+            tempfile.TemporaryDirectory() as cache_path:
+        os.environ["SCHEME"] = server.scheme
+        os.environ["HOST"] = server.host
+        os.environ["API_VERSION"] = server.api_version
+        client = CurrencyClient(minutes=60, rate_table_base="EUR",
+                                cache_manager=JSONCache(cache_path))
+        table = client.get_currency(base="EUR")
+        table = {"base": table.base, "rates": table.rates}
+
+        started = time.perf_counter()
+        expected = convert_loop(table, amounts, from_codes, to_codes)
+        loop_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        client.convert(*arrays)
+        cold_seconds = time.perf_counter() - started
+        started = time.perf_counter()
+        converted = client.convert(*arrays)
+        warm_seconds = time.perf_counter() - started
+
+    assert numpy.allclose(converted, expected)
+    results = {"python loop": {"seconds": loop_seconds},
+               "convert (matrix build)": {"seconds": cold_seconds},
+               "convert (cached matrix)": {"seconds": warm_seconds}}
+    print_report("{} rows, {} currencies".format(count, len(CURRENCIES)),
+                 results)
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:2]])
@@ -0,0 +1,296 @@
+"""
+Trace-replay simulator: drives CurrencyClient with a recorded trace of
+get_currency queries against the local stub server on a simulated clock and
+reports, for every combination of interval, cache and expiry policy, the
+number of upstream requests, the cache hit ratio, the staleness of served
+rates and the latency of lookups.
+
+A trace is a JSONL file, one query per line:
+
+    {"t": 1600000000.0, "base": "EUR", "symbols": ["USD", "RUB"]}
+
+where "t" is the time of the query in seconds (queries are replayed in the
+order of the file). The simulated clock jumps to the time of every query, so
+a day of traffic is replayed in seconds. The latency of a lookup is its
+measured duration plus --upstream-latency for every upstream request it
+made; the staleness is the age of the served rates (the clock minus their
+'timestamp'). The stub server publishes new rates every --update-period
+seconds.
+
+Usage: python -m benchmarks.replay TRACE [--intervals SECONDS ...]
+[--caches json|memory|sqlite|rate-table ...] [--policies fixed|provider ...]
+[--upstream-latency SECONDS] [--update-period SECONDS] [--output FILE]
+       python -m benchmarks.replay TRACE --generate QUERIES [--duration S]
+"""
+import argparse
+import datetime
+import json
+import os
+import random
+import tempfile
+import time
+
+from benchmarks.common import percentile, summarize
+from benchmarks.stub_server import CURRENCIES, StubExchangeRatesServer
+from cache.expiry_policy import FixedIntervalPolicy, ProviderSchedulePolicy
+from cache.json_cache import JSONCache
+from cache.memory_cache import MemoryCache
+from cache.sqlite_cache import SQLiteCache
+from clients.currency_client import CurrencyClient
+
+CACHES = ("json", "memory", "sqlite", "rate-table")
+POLICIES = ("fixed", "provider")
+
+
+class SimulatedClock:
+    """
+    Clock of the replay, which is moved by the simulator instead of the
+    flow of time.
+
+    Methods
+    -------
+    set(moment)
+        Moves the clock forward to the moment.
+    advance(seconds)
+        Moves the clock forward by the number of seconds.
+    """
+
+    def __init__(self, moment=0.0):
+        self._now = float(moment)
+
+    def __call__(self) -> float:
+        return self._now
+
+    def set(self, moment: float):
+        self._now = max(self._now, float(moment))
+
+    def advance(self, seconds: float):
+        self._now += seconds
+
+
+def read_trace(path: str):
+    """
+    Yields (time, base, symbols) queries of a JSONL trace file.
+
+    Parameters
+    ----------
+    path : str
+        Path to the trace file.
+
+    Returns
+    -------
+    queries : generator of tuple
+        Time of the query, base currency and tuple of symbols.
+    """
+
+    with open(path) as trace_file:
+        for line in trace_file:
+            if line.strip():
+                query = json.loads(line)
+                yield (float(query["t"]), query.get("base", "EUR"),
+                       tuple(query.get("symbols", ())))
+
+
+def make_trace(count: int, duration: float, start=1600000000.0,
+               seed=0) -> list:
+    """
+    Forms a synthetic trace: Poisson arrivals over 'duration' seconds, a few
+    hot (base, symbols) keys and a long tail of rare ones.
+
+    Parameters
+    ----------
+    count : int
+        The number of queries.
+    duration : float
+        Time span (in seconds) of the trace.
+    start : float
+        Time of the beginning of the trace.
+    seed : int
+        Seed of the random generator.
+
+    Returns
+    -------
+    trace : list
+        Dicts of queries ("t", "base", "symbols").
+    """
+
+    generator = random.Random(seed)
+    keys = [(generator.choice(CURRENCIES[:5]),
+             sorted(generator.sample(CURRENCIES, generator.randint(1, 3))))
+            for _ in range(50)]
+    moment = start
+    trace = []
+    for _ in range(count):
+        moment += generator.expovariate(count / duration)
+        base, symbols = keys[min(int(generator.paretovariate(1.2)) - 1,
+                                 len(keys) - 1)]
+        trace.append({"t": round(moment, 3), "base": base,
+                      "symbols": symbols})
+    return trace
+
+
+def _make_client(cache: str, policy: str, interval: float, cache_path: str,
+                 clock: SimulatedClock) -> CurrencyClient:
+    if cache == "memory":
+        cache_manager = MemoryCache(JSONCache(cache_path))
+    elif cache == "sqlite":
+        cache_manager = SQLiteCache(os.path.join(cache_path, "cache.sqlite3"))
+    else:
+        cache_manager = JSONCache(cache_path)
+    period = datetime.timedelta(seconds=interval)
+    expiry_policy = ProviderSchedulePolicy(period=period) \
+        if policy == "provider" else FixedIntervalPolicy(period)
+    return CurrencyClient(cache_manager=cache_manager, clock=clock,
+                          expiry_policy=expiry_policy,
+                          rate_table_base="EUR" if cache == "rate-table"
+                          else None)
+
+
+def replay(server, trace_path: str, interval: float, cache: str,
+           policy: str, upstream_latency: float) -> dict:
+    """
+    Replays the trace with one configuration of the client.
+
+    Parameters
+    ----------
+    server : StubExchangeRatesServer
+        Running stub server.
+    trace_path : str
+        Path to the trace file.
+    interval : float
+        Interval (in seconds) of the expiry policy (the period of the
+        provider schedule for the "provider" policy).
+    cache : str
+        Cache configuration (one of CACHES).
+    policy : str
+        Expiry policy (one of POLICIES).
+    upstream_latency : float
+        Modelled latency (in seconds) of every upstream request.
+
+    Returns
+    -------
+    report : dict
+        Upstream requests, hit ratio, staleness and latency of lookups.
+    """
+
+    clock = None
+    latencies = []
+    staleness = []
+    hits = 0
+    errors = 0
+    with tempfile.TemporaryDirectory() as cache_path:
+        client = None
+        for moment, base, symbols in read_trace(trace_path):
+            if client is None:
+                clock = SimulatedClock(moment)
+                server.clock = clock
+                server.reset_counters()
+                client = _make_client(cache, policy, interval, cache_path,
+                                      clock)
+            clock.set(moment)
+            requests_before = server.request_count
+            started = time.perf_counter()
+            try:
+                snapshot = client.get_currency(*symbols, base=base)
+            except (RuntimeError, OSError, ValueError):
+                # The fallback set of the client: failed requests (connection
+                # errors and timeouts of requests are OSError) and bad data.
+                errors += 1
+                continue
+            requests = server.request_count - requests_before
+            latency = time.perf_counter() - started + \
+                requests * upstream_latency
+            clock.advance(requests * upstream_latency)
+            latencies.append(latency)
+            staleness.append(max(clock() - snapshot.timestamp, 0.0))
+            hits += snapshot.from_cache
+    staleness.sort()
+    served = len(latencies)
+    return {"interval_s": interval, "cache": cache, "policy": policy,
+            "queries": served + errors, "errors": errors,
+            "upstream_requests": server.request_count,
+            "hit_ratio": hits / served if served else 0.0,
+            "staleness_s": {"p50": percentile(staleness, 0.5),
+                            "p90": percentile(staleness, 0.9),
+                            "p99": percentile(staleness, 0.99),
+                            "max": staleness[-1] if staleness else 0.0},
+            "latency": summarize(latencies)}
+
+
+def run(trace_path: str, intervals=(60.0, 300.0, 3600.0), caches=("json",),
+        policies=("fixed",), upstream_latency=0.05,
+        update_period=3600.0) -> dict:
+    """
+    Replays the trace with every combination of interval, cache and policy.
+
+    Returns
+    -------
+    report : dict
+        Parameters of the run and the report of every configuration.
+    """
+
+    results = []
+    # The clients read the address of API from the environment, the values
+    # of the caller are restored after the replay.
+    saved = {name: os.environ.get(name)
+             for name in ("SCHEME", "HOST", "API_VERSION")}
+    try:
+        with StubExchangeRatesServer() as server:
+            server.update_period = update_period
+            os.environ["SCHEME"] = server.scheme
+            os.environ["HOST"] = server.host
+            os.environ["API_VERSION"] = server.api_version
+            for interval in intervals:
+                for cache in caches:
+                    for policy in policies:
+                        results.append(replay(server, trace_path, interval,
+                                              cache, policy, upstream_latency))
+    finally:
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+    return {"trace": trace_path, "upstream_latency_s": upstream_latency,
+            "update_period_s": update_period, "results": results}
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(
+        description="Replays a JSONL trace of get_currency queries against a "
+                    "local stub server on a simulated clock.")
+    parser.add_argument("trace")
+    parser.add_argument("--intervals", nargs="+", type=float,
+                        default=[60.0, 300.0, 3600.0])
+    parser.add_argument("--caches", nargs="+", choices=CACHES,
+                        default=["json"])
+    parser.add_argument("--policies", nargs="+", choices=POLICIES,
+                        default=["fixed"])
+    parser.add_argument("--upstream-latency", type=float, default=0.05)
+    parser.add_argument("--update-period", type=float, default=3600.0,
+                        help="period of rate updates of the stub server")
+    parser.add_argument("--output", help="file to write the JSON report to "
+                                         "(stdout by default)")
+    parser.add_argument("--generate", type=int, metavar="QUERIES",
+                        help="write a synthetic trace to TRACE and exit")
+    parser.add_argument("--duration", type=float, default=86400.0,
+                        help="time span of the generated trace")
+    arguments = parser.parse_args(arguments)
+    if arguments.generate:
+        with open(arguments.trace, "w") as trace_file:
+            for query in make_trace(arguments.generate, arguments.duration):
+                trace_file.write(json.dumps(query) + "\n")
+        return
+    report = run(arguments.trace, arguments.intervals, arguments.caches,
+                 arguments.policies, arguments.upstream_latency,
+                 arguments.update_period)
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if arguments.output:
+        with open(arguments.output, "w") as output_file:
+            output_file.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
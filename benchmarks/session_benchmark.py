@@ -0,0 +1,38 @@
+"""
+Compares per-request latency of a new connection per request (module-level
+'requests.get') with the pooled keep-alive session of BaseAPI.
+
+Usage: python -m benchmarks.session_benchmark [repeat]
+"""
+import sys
+
+import requests
+
+from apies.exchange_rates_api import ExchangeRatesApi
+from benchmarks.common import measure, print_report, summarize
+from benchmarks.stub_server import StubExchangeRatesServer
+
+
+def main(repeat=500):
+    with StubExchangeRatesServer() as server:
+        api = ExchangeRatesApi("latest", server.scheme, server.host,
+                               server.api_version)
+        url = api.prepare_url("latest", {"access_key": "key", "base": "EUR"})
+
+        server.reset_counters()
+        no_pool = summarize(measure(lambda: requests.get(url), repeat))
+        no_pool["connections"] = server.connection_count
+
+        server.reset_counters()
+        pooled = summarize(measure(
+            lambda: api.send_exchange_rate_request("EUR", status_code=200),
+            repeat))
+        pooled["connections"] = server.connection_count
+        api.close()
+
+    print_report("Per-request latency against a local stub server",
+                 {"requests.get": no_pool, "BaseAPI pooled session": pooled})
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:2]])
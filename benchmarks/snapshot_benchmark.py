@@ -0,0 +1,65 @@
+"""
+Compares read latency and memory of JSONCache and SnapshotCache.
+
+Latency: one get_from_cache call plus one rate lookup on a warm file.
+Memory: peak RSS growth of a fresh process which reads and keeps the data of
+'entries' cache files (like an in-process cache would).
+
+Usage: python -m benchmarks.snapshot_benchmark [currencies] [entries]
+"""
+import resource
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.common import measure, print_report, summarize
+from benchmarks.stub_server import make_rates
+from cache.json_cache import JSONCache
+from cache.snapshot_cache import SnapshotCache
+
+CACHES = {"JSONCache": JSONCache, "SnapshotCache": SnapshotCache}
+
+
+def fill(cache, currencies: int, entries: int):
+    rates = make_rates(currencies)
+    for index in range(entries):
+        cache.save_in_cache("EUR-{}.json".format(index), {
+            "success": True, "timestamp": 1600000000 + index, "base": "EUR",
+            "date": "2020-09-13", "rates": rates})
+
+
+def measure_rss(name: str, cache_path: str, entries: int) -> int:
+    """Runs in a child process, returns peak RSS growth in kilobytes."""
+
+    cache = CACHES[name](cache_path)
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    kept = [cache.get_from_cache("EUR-{}.json".format(index))
+            for index in range(entries)]
+    total = sum(data["rates"]["USD"] for data in kept)
+    after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return after - before if total else 0
+
+
+def main(currencies=170, entries=500, repeat=20000):
+    results = {}
+    for name, cache_class in sorted(CACHES.items()):
+        with tempfile.TemporaryDirectory() as cache_path:
+            cache = cache_class(cache_path)
+            fill(cache, currencies, entries)
+            latency = summarize(measure(
+                lambda: cache.get_from_cache("EUR-0.json")["rates"]["USD"],
+                repeat))
+            rss = subprocess.check_output([
+                sys.executable, "-m", "benchmarks.snapshot_benchmark",
+                "--rss", name, cache_path, str(entries)])
+            latency["rss_growth_kb"] = int(rss)
+            results[name] = latency
+    print_report("Cache read of {} currencies, RSS of {} kept entries".format(
+        currencies, entries), results)
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--rss"]:
+        print(measure_rss(sys.argv[2], sys.argv[3], int(sys.argv[4])))
+    else:
+        main(*[int(arg) for arg in sys.argv[1:3]])
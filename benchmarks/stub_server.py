@@ -0,0 +1,476 @@
+import datetime
+import gzip
+import hashlib
+import json
+import threading
+import time
+import zlib
+from collections import deque
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+from urllib.parse import parse_qs, urlparse
+
+CURRENCIES = ("EUR", "USD", "RUB", "SEK", "BOB", "GBP", "JPY", "CHF", "CNY",
+              "AUD", "CAD", "NOK", "DKK", "PLN", "CZK", "HUF", "TRY", "INR",
+              "BRL", "MXN", "ZAR", "KRW", "SGD", "HKD", "NZD", "ILS", "THB",
+              "AED", "KZT", "UAH")
+
+
+def make_rates(size: int) -> dict:
+    """
+    Forms a deterministic table of 'size' exchange rates against EUR.
+
+    Currencies beyond the built-in list get synthetic three-letter codes
+    ('XAA', 'XAB', ...), so the payload size can be tuned freely.
+
+    Parameters
+    ----------
+    size : int
+        The number of currencies in the table (EUR included).
+
+    Returns
+    -------
+    rates : dict
+        Currency code -> rate against EUR.
+    """
+
+    codes = list(CURRENCIES[:size])
+    letters = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+    index = 0
+    while len(codes) < size:
+        codes.append("X" + letters[index // 26 % 26] + letters[index % 26])
+        index += 1
+    return {code: (1.0 if code == "EUR" else round(0.5 + i * 0.731, 6))
+            for i, code in enumerate(codes)}
+
+
+def parse_query(query: str) -> dict:
+    """Parses a URL query string into a dict of the last values."""
+
+    return {key: values[-1] for key, values in parse_qs(query).items()}
+
+
+class Fault:
+    """
+    A fault injected into responses of the stub.
+
+    Attributes
+    ----------
+    status : int or None
+        Status code of the error response, None - the normal response.
+    delay : float
+        Extra delay (in seconds) before the response.
+    drop : bool
+        Whether to close the connection without a response.
+    """
+
+    __slots__ = ("status", "delay", "drop")
+
+    def __init__(self, status=None, delay=0.0, drop=False):
+        self.status = status
+        self.delay = delay
+        self.drop = drop
+
+
+def _parse_date(text: str) -> datetime.date:
+    return datetime.datetime.strptime(text, "%Y-%m-%d").date()
+
+
+def _is_not_modified(headers: dict, etag: str, timestamp: float) -> bool:
+    if "if-none-match" in headers:
+        return etag in [tag.strip() for tag in
+                        headers["if-none-match"].split(",")] or \
+            headers["if-none-match"].strip() == "*"
+    if "if-modified-since" in headers:
+        try:
+            since = parsedate_to_datetime(headers["if-modified-since"])
+        except (TypeError, ValueError):
+            return False
+        return since.timestamp() >= int(timestamp)
+    return False
+
+
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class _StubRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        self.server.stub.register_connection()
+
+    def do_GET(self):
+        stub = self.server.stub
+        fault = stub.begin_request()
+        try:
+            delay = stub.latency + (fault.delay if fault else 0.0)
+            if delay:
+                time.sleep(delay)
+            if fault and fault.drop:
+                self.close_connection = True
+                return
+            url = urlparse(self.path)
+            if fault and fault.status:
+                status, payload = fault.status, stub._error(fault.status,
+                                                            "injected_fault")
+            else:
+                status, payload = stub.handle(url.path, parse_query(url.query))
+        finally:
+            stub.end_request()
+        status, headers, body = stub.encode_response(
+            status, payload, {name.lower(): value
+                              for name, value in self.headers.items()})
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubExchangeRates:
+    """
+    Request handling logic and counters of the local Exchange Rates API stub,
+    shared by the threaded and the asyncio servers.
+
+    Attributes
+    ----------
+    latency : float
+        Delay (in seconds) before every response.
+    rates : dict
+        Currency code -> rate against EUR.
+    api_version : str
+        Version of the API in the URL path.
+    request_count : int
+        The number of received requests.
+    connection_count : int
+        The number of accepted TCP connections.
+    max_in_flight : int
+        The maximum number of requests handled at the same time.
+    bytes_sent : int
+        The number of bytes of response bodies as sent (compressed).
+    not_modified_count : int
+        The number of 304 Not Modified responses.
+    clock : callable
+        Source of the current time of the 'timestamp' of responses (seconds
+        since the epoch), time.time by default.
+    update_period : float or None
+        Period (in seconds) of updates of the rates: the 'timestamp' of the
+        latest endpoint is the time of the last update, None - the current
+        time.
+
+    Methods
+    -------
+    reset_counters()
+        Resets request and connection counters.
+    inject_faults(count=1, status=None, delay=0.0, drop=False)
+        Makes the next requests fail, slow down or lose the connection.
+    clear_faults()
+        Removes the injected faults.
+    handle(path, query)
+        Forms the status code and the payload of a response of the latest,
+        historical or time-series endpoint.
+    encode_response(status, payload, headers)
+        Forms the status code, the headers and the body of a response with
+        validators, conditional request handling and compression.
+    get_historical_rate(date, code)
+        Returns the deterministic rate of the currency against EUR on the
+        date.
+    """
+
+    scheme = "http"
+
+    def __init__(self, latency=0.0, currencies=len(CURRENCIES),
+                 api_version="v1"):
+        """
+        Constructs all the necessary attributes for the stub.
+
+        Parameters
+        ----------
+        latency : float
+            Delay (in seconds) before every response.
+        currencies : int
+            The number of currencies in the rates table.
+        api_version : str
+            Version of the API in the URL path.
+        """
+
+        self.latency = latency
+        self.rates = make_rates(currencies)
+        self.api_version = api_version
+        self.request_count = 0
+        self.connection_count = 0
+        self.max_in_flight = 0
+        self.bytes_sent = 0
+        self.not_modified_count = 0
+        self._in_flight = 0
+        self.clock = time.time
+        self.update_period = None
+        self._faults = deque()
+        self._persistent_fault = None
+        self._lock = threading.Lock()
+
+    def register_connection(self):
+        with self._lock:
+            self.connection_count += 1
+
+    def reset_counters(self):
+        with self._lock:
+            self.request_count = 0
+            self.connection_count = 0
+            self.max_in_flight = 0
+            self.bytes_sent = 0
+            self.not_modified_count = 0
+
+    def inject_faults(self, count=1, status=None, delay=0.0, drop=False):
+        """
+        Makes the next 'count' requests (all requests until clear_faults, if
+        count is None) fail with the status code, slow down by the delay or
+        lose the connection without a response.
+
+        Parameters
+        ----------
+        count : int or None
+            The number of faulty requests.
+        status : int, optional
+            Status code of the error response.
+        delay : float
+            Extra delay (in seconds) before the response.
+        drop : bool
+            Whether to close the connection without a response.
+
+        Returns
+        -------
+        None
+        """
+
+        fault = Fault(status=status, delay=delay, drop=drop)
+        with self._lock:
+            if count is None:
+                self._persistent_fault = fault
+            else:
+                self._faults.extend([fault] * count)
+
+    def clear_faults(self):
+        with self._lock:
+            self._faults.clear()
+            self._persistent_fault = None
+
+    def begin_request(self):
+        # Returns the fault to inject into the response or None.
+        with self._lock:
+            self.request_count += 1
+            self._in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self._in_flight)
+            if self._faults:
+                return self._faults.popleft()
+            return self._persistent_fault
+
+    def end_request(self):
+        with self._lock:
+            self._in_flight -= 1
+
+    def handle(self, path: str, query: dict) -> tuple:
+        """
+        Forms the status code and the payload of a response (the latency is
+        applied by the server).
+
+        Parameters
+        ----------
+        path : str
+            Path of the request URL.
+        query : dict
+            Query parameters of the request.
+
+        Returns
+        -------
+        (status, payload) : tuple
+            Status code and the JSON-serializable payload.
+        """
+
+        prefix = "/{}/".format(self.api_version)
+        endpoint = path[len(prefix):] if path.startswith(prefix) else None
+        base = query.get("base", "EUR").upper()
+        symbols = [symbol for symbol in query.get("symbols", "").split(",")
+                   if symbol]
+        if base not in self.rates or any(symbol not in self.rates
+                                         for symbol in symbols):
+            return 400, self._error(202, "invalid_currency_codes")
+        symbols = symbols or list(self.rates)
+        if endpoint == "latest":
+            payload = self._get_rates(base, symbols)
+            now = self.clock()
+            if self.update_period:
+                now -= now % self.update_period
+            payload.update({"timestamp": int(now), "date": datetime.datetime.
+                            utcfromtimestamp(now).date().isoformat()})
+            return 200, payload
+        if endpoint == "timeseries":
+            try:
+                start_date = _parse_date(query["start_date"])
+                end_date = _parse_date(query["end_date"])
+            except (KeyError, ValueError):
+                return 400, self._error(502, "invalid_start_date")
+            if end_date < start_date or \
+                    (end_date - start_date).days >= 365:
+                return 400, self._error(504, "invalid_time_frame")
+            dates = [start_date + datetime.timedelta(offset)
+                     for offset in range((end_date - start_date).days + 1)]
+            return 200, {
+                "success": True, "timeseries": True,
+                "start_date": start_date.isoformat(),
+                "end_date": end_date.isoformat(), "base": base,
+                "rates": {date.isoformat(): self._get_rates(
+                    base, symbols, date)["rates"] for date in dates}}
+        try:
+            date = _parse_date(endpoint)
+        except (TypeError, ValueError):
+            return 404, self._error(404, "not_found")
+        payload = self._get_rates(base, symbols, date)
+        payload.update({"historical": True, "date": date.isoformat(),
+                        "timestamp": int(datetime.datetime(
+                            date.year, date.month, date.day).timestamp())})
+        return 200, payload
+
+    def encode_response(self, status: int, payload: dict,
+                        headers: dict) -> tuple:
+        """
+        Forms the status code, the headers and the body of a response.
+
+        Rates responses carry an ETag (a hash of the body) and Last-Modified
+        (their 'timestamp'), a request with a matching If-None-Match (or, if
+        it is absent, If-Modified-Since not older than the timestamp) gets
+        304 Not Modified without a body. The body is compressed with gzip or
+        deflate, if the request accepts it.
+
+        Parameters
+        ----------
+        status : int
+            Status code of the response.
+        payload : dict
+            JSON-serializable payload of the response.
+        headers : dict
+            Headers of the request (lower-case names).
+
+        Returns
+        -------
+        (status, headers, body) : tuple
+            Status code, list of (name, value) headers and the body.
+        """
+
+        body = json.dumps(payload).encode()
+        response_headers = [("Content-Type", "application/json")]
+        if status == 200 and "timestamp" in payload:
+            etag = '"{}"'.format(hashlib.sha1(body).hexdigest()[:20])
+            validators = [("ETag", etag), ("Last-Modified", formatdate(
+                payload["timestamp"], usegmt=True))]
+            response_headers.extend(validators)
+            if _is_not_modified(headers, etag, payload["timestamp"]):
+                with self._lock:
+                    self.not_modified_count += 1
+                return 304, validators, b""
+        accepted = [coding.split(";")[0].strip() for coding in
+                    headers.get("accept-encoding", "").split(",")]
+        if "gzip" in accepted:
+            body = gzip.compress(body)
+            response_headers.append(("Content-Encoding", "gzip"))
+        elif "deflate" in accepted:
+            body = zlib.compress(body)
+            response_headers.append(("Content-Encoding", "deflate"))
+        response_headers.append(("Content-Length", str(len(body))))
+        with self._lock:
+            self.bytes_sent += len(body)
+        return status, response_headers, body
+
+    def get_historical_rate(self, date: datetime.date, code: str) -> float:
+        """Returns the rate of the currency against EUR on the date."""
+
+        if code == "EUR":
+            return 1.0
+        return self.rates[code] * (1 + date.toordinal() % 7 / 100)
+
+    def _get_rates(self, base: str, symbols: list, date=None) -> dict:
+        if date is None:
+            rates = self.rates
+        else:
+            rates = {code: self.get_historical_rate(date, code)
+                     for code in set(symbols) | {base}}
+        base_rate = rates[base]
+        return {"success": True, "base": base,
+                "rates": {symbol: rates[symbol] / base_rate
+                          for symbol in symbols}}
+
+    @staticmethod
+    def _error(code: int, error_type: str) -> dict:
+        return {"success": False, "error": {"code": code, "type": error_type}}
+
+
+class StubExchangeRatesServer(StubExchangeRates):
+    """
+    Local stub of the Exchange Rates API for tests and benchmarks.
+
+    The server implements the 'latest' endpoint on a random free port of
+    localhost in a background thread (a thread per connection) and counts
+    incoming requests and TCP connections.
+
+    Methods
+    -------
+    start()
+        Starts serving in a background thread.
+    stop()
+        Stops the server.
+    """
+
+    def __init__(self, latency=0.0, currencies=len(CURRENCIES),
+                 api_version="v1", host="127.0.0.1", port=0):
+        """
+        Constructs all the necessary attributes for the stub server.
+
+        Parameters
+        ----------
+        latency : float
+            Delay (in seconds) before every response.
+        currencies : int
+            The number of currencies in the rates table.
+        api_version : str
+            Version of the API in the URL path.
+        host : str
+            Interface to listen on.
+        port : int
+            Port to listen on, 0 - any free port.
+        """
+
+        super().__init__(latency=latency, currencies=currencies,
+                         api_version=api_version)
+        self._server = _ThreadingHTTPServer((host, port), _StubRequestHandler)
+        self._server.stub = self
+        self._thread = None
+
+    @property
+    def host(self) -> str:
+        return "{}:{}".format(*self._server.server_address[:2])
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
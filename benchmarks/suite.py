@@ -0,0 +1,213 @@
+"""
+Microbenchmark suite of the hot paths against the local stub server.
+
+Every benchmark reports throughput and latency percentiles; the results,
+together with the commit, the Python version and the parameters of the run,
+are written as JSON, so runs of different commits can be compared:
+
+    python -m benchmarks.suite --output before.json
+    git checkout other-branch
+    python -m benchmarks.suite --output after.json
+    python -m benchmarks.suite --compare before.json after.json
+
+Usage: python -m benchmarks.suite [--output FILE] [--repeat N]
+[--latency SECONDS] [--currencies N] [--only NAME ...]
+[--compare BEFORE AFTER]
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+
+from apies.exchange_rates_api import ExchangeRatesApi
+from benchmarks.common import measure, summarize
+from benchmarks.stub_server import StubExchangeRatesServer
+from cache.json_cache import JSONCache
+from clients.currency_client import CurrencyClient
+
+COLD_START_CODE = "import time; started = time.perf_counter(); " \
+                  "from cache.json_cache import JSONCache; " \
+                  "from clients.currency_client import CurrencyClient; " \
+                  "CurrencyClient(minutes=60, " \
+                  "cache_manager=JSONCache({!r})); " \
+                  "print(time.perf_counter() - started)"
+
+
+def bench_get_currency_hit(server, cache_path: str, repeat: int) -> list:
+    client = CurrencyClient(minutes=60, cache_manager=JSONCache(cache_path))
+    client.get_currency("USD", "RUB")
+    return measure(lambda: client.get_currency("USD", "RUB"), repeat)
+
+
+def bench_get_currency_miss(server, cache_path: str, repeat: int) -> list:
+    # A zero interval makes every call a request to the stub server.
+    client = CurrencyClient(cache_manager=JSONCache(cache_path))
+    return measure(lambda: client.get_currency("USD", "RUB"), repeat)
+
+
+def bench_prepare_url(server, cache_path: str, repeat: int) -> list:
+    api = ExchangeRatesApi("latest", server.scheme, server.host,
+                           server.api_version)
+    params = {"access_key": "stub-access-key", "base": "EUR",
+              "symbols": "USD,RUB,SEK"}
+    return measure(lambda: api.prepare_url("latest", params), repeat)
+
+
+def bench_json_cache_read(server, cache_path: str, repeat: int) -> list:
+    cache = JSONCache(cache_path)
+    cache.save_in_cache("EUR-.json", _make_response(server))
+    return measure(lambda: cache.get_from_cache("EUR-.json"), repeat)
+
+
+def bench_json_cache_write(server, cache_path: str, repeat: int) -> list:
+    cache = JSONCache(cache_path)
+    data = _make_response(server)
+    return measure(lambda: cache.save_in_cache("EUR-.json", data), repeat)
+
+
+def bench_client_construction(server, cache_path: str, repeat: int) -> list:
+    return measure(lambda: CurrencyClient(
+        minutes=60, cache_manager=JSONCache(cache_path)), repeat)
+
+
+def bench_cold_start(server, cache_path: str, repeat: int) -> list:
+    # Import and construction in a fresh interpreter, a few runs are enough.
+    environment = dict(os.environ, SCHEME=server.scheme, HOST=server.host,
+                       API_VERSION=server.api_version)
+    return [float(subprocess.check_output(
+        [sys.executable, "-c", COLD_START_CODE.format(cache_path)],
+        env=environment,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+        for _ in range(max(repeat // 200, 3))]
+
+
+BENCHMARKS = [("get_currency_hit", bench_get_currency_hit),
+              ("get_currency_miss", bench_get_currency_miss),
+              ("prepare_url", bench_prepare_url),
+              ("json_cache_read", bench_json_cache_read),
+              ("json_cache_write", bench_json_cache_write),
+              ("client_construction", bench_client_construction),
+              ("cold_start", bench_cold_start)]
+
+
+def _make_response(server) -> dict:
+    return {"success": True, "timestamp": 1600000000, "base": "EUR",
+            "date": "2020-09-13", "rates": dict(server.rates)}
+
+
+def _get_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "HEAD"], stderr=subprocess.DEVNULL,
+            cwd=os.path.dirname(os.path.abspath(__file__))).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(names=None, repeat=2000, latency=0.0, currencies=170) -> dict:
+    """
+    Runs the benchmarks against a local stub server.
+
+    Parameters
+    ----------
+    names : list, optional
+        Names of the benchmarks to run, all by default.
+    repeat : int
+        The number of calls of every benchmark (cache misses and cold starts
+        are called fewer times).
+    latency : float
+        Delay (in seconds) of every response of the stub server.
+    currencies : int
+        The number of currencies in the rates table of the stub server.
+
+    Returns
+    -------
+    report : dict
+        Metadata of the run and the summary of every benchmark (see
+        benchmarks.common.summarize).
+    """
+
+    results = {}
+    with StubExchangeRatesServer(latency=latency,
+                                 currencies=currencies) as server:
+        os.environ["SCHEME"] = server.scheme
+        os.environ["HOST"] = server.host
+        os.environ["API_VERSION"] = server.api_version
+        for name, benchmark in BENCHMARKS:
+            if names and name not in names:
+                continue
+            calls = max(repeat // 10, 10) if name == "get_currency_miss" \
+                else repeat
+            with tempfile.TemporaryDirectory() as cache_path:
+                server.reset_counters()
+                summary = summarize(benchmark(server, cache_path, calls))
+                summary["upstream_requests"] = server.request_count
+            results[name] = summary
+    return {"commit": _get_commit(),
+            "created": datetime.datetime.utcnow().isoformat() + "Z",
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "parameters": {"repeat": repeat, "latency": latency,
+                           "currencies": currencies},
+            "results": results}
+
+
+def compare(before: dict, after: dict) -> dict:
+    """
+    Compares two reports: the ratio of the p50 latency and of the throughput
+    of every benchmark present in both (after / before).
+    """
+
+    comparison = {}
+    for name, old in sorted(before["results"].items()):
+        new = after["results"].get(name)
+        if new is None:
+            continue
+        comparison[name] = {
+            "p50_ratio": new["p50_ms"] / old["p50_ms"] if old["p50_ms"]
+            else None,
+            "ops_ratio": new["ops_per_s"] / old["ops_per_s"]
+            if old["ops_per_s"] else None}
+    return {"before": before.get("commit"), "after": after.get("commit"),
+            "results": comparison}
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(
+        description="Microbenchmarks of the hot paths against a local stub "
+                    "server.")
+    parser.add_argument("--output", help="file to write the JSON report to "
+                                         "(stdout by default)")
+    parser.add_argument("--repeat", type=int, default=2000)
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="delay of every response of the stub server")
+    parser.add_argument("--currencies", type=int, default=170,
+                        help="the number of currencies in the rates table")
+    parser.add_argument("--only", nargs="+", metavar="NAME",
+                        choices=[name for name, _ in BENCHMARKS])
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"),
+                        help="compare two reports instead of running")
+    arguments = parser.parse_args(arguments)
+    if arguments.compare:
+        reports = []
+        for path in arguments.compare:
+            with open(path) as report_file:
+                reports.append(json.load(report_file))
+        report = compare(*reports)
+    else:
+        report = run(arguments.only, arguments.repeat, arguments.latency,
+                     arguments.currencies)
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if arguments.output:
+        with open(arguments.output, "w") as output_file:
+            output_file.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
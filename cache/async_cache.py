@@ -0,0 +1,62 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from cache.base_cache.base_cache import BaseCache
+
+
+class AsyncCache:
+    """
+    Asynchronous adapter of any BaseCache implementation, which runs the
+    blocking cache operations in a thread pool, so they never block the event
+    loop.
+
+    Attributes
+    ----------
+    _cache : BaseCache
+        Adapted cache.
+    _executor : ThreadPoolExecutor
+        Pool of threads running the cache operations.
+
+    Methods
+    -------
+    save_in_cache(path_to_file, data)
+        Coroutine, saves data in cache.
+    get_from_cache(path_to_file)
+        Coroutine, gets data from cache.
+    clear_cache(path_to_file)
+        Coroutine, deletes the entry from cache.
+    close()
+        Shuts the thread pool down.
+    """
+
+    def __init__(self, cache: BaseCache, max_workers=4):
+        """
+        Constructs all the necessary attributes for the AsyncCache object.
+
+        Parameters
+        ----------
+        cache : BaseCache
+            Adapted cache.
+        max_workers : int
+            The number of threads running the cache operations.
+        """
+
+        self._cache = cache
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    async def save_in_cache(self, path_to_file: str, data: dict):
+        await self._run(self._cache.save_in_cache, path_to_file, data)
+
+    async def get_from_cache(self, path_to_file: str) -> dict:
+        return await self._run(self._cache.get_from_cache, path_to_file)
+
+    async def clear_cache(self, path_to_file: str):
+        await self._run(self._cache.clear_cache, path_to_file)
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+
+    def _run(self, function, *args):
+        # Called from coroutines, so it is the running loop (Python 3.5.3+).
+        return asyncio.get_event_loop().run_in_executor(self._executor,
+                                                        function, *args)
@@ -1,4 +1,14 @@
 from abc import ABC, abstractmethod
+from contextlib import contextmanager
+
+
+class CacheMissError(FileNotFoundError):
+    """
+    Raised when there is no entry in cache.
+
+    It is a subclass of FileNotFoundError, which JSONCache raises for missing
+    files, so callers handle misses of all cache classes the same way.
+    """
 
 
 class BaseCache(ABC):
@@ -14,6 +24,11 @@ class BaseCache(ABC):
         Gets some data from cache.
     clear_cache(path_to_file)
         Deletes the cache file from cache by the name of the file.
+    touch(path_to_file)
+        Marks the entry as revalidated without rewriting it.
+    refresh_lock(path_to_file, blocking=True, timeout=None)
+        Context manager of the lock which lets one process at a time refresh
+        the entry.
     """
 
     @abstractmethod
@@ -47,3 +62,42 @@ class BaseCache(ABC):
         implemented in inheritor class.
         """
         pass
+
+    def touch(self, path_to_file):
+        """
+        Marks the entry as revalidated (its data is still current, for
+        example after a 304 Not Modified response) without rewriting it.
+
+        By default, nothing is done. Implementations which track the write
+        time of entries override it.
+
+        Parameters
+        ----------
+        path_to_file : str
+            Path to file (name of the entry) to touch.
+        """
+
+        pass
+
+    @contextmanager
+    def refresh_lock(self, path_to_file, blocking=True, timeout=None):
+        """
+        Context manager of the lock which lets one process at a time refresh
+        the entry, it yields True if the lock is acquired.
+
+        By default, there is no coordination between processes and the lock
+        is always acquired. Implementations shared by several processes
+        override it.
+
+        Parameters
+        ----------
+        path_to_file : str
+            Path to file (name of the entry) to lock.
+        blocking : bool
+            Whether to wait for the lock held by another process.
+        timeout : float, optional
+            The maximum time (in seconds) to wait for the lock, None - no
+            limit.
+        """
+
+        yield True
@@ -0,0 +1,271 @@
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+
+from cache.base_cache.base_cache import BaseCache
+from cache_folder_path import CacheFolderPath
+
+try:
+    import fcntl
+except ImportError:  # not a POSIX system, locks are not supported
+    fcntl = None
+
+_file_mode = None
+
+
+def get_file_mode() -> int:
+    """
+    Returns the permission bits of a newly created file (0o666 without the
+    bits of the process umask, as open(path, "w") would create it).
+
+    Returns
+    -------
+    mode : int
+        Permission bits.
+    """
+
+    global _file_mode
+    if _file_mode is None:
+        # The umask can only be read by setting it.
+        umask = os.umask(0o022)
+        os.umask(umask)
+        _file_mode = 0o666 & ~umask
+    return _file_mode
+
+
+def write_file_atomically(final_path: str, write, mode="w"):
+    """
+    Writes a file through a temporary file in the same folder, which is
+    renamed to the file when it is complete. The file gets the permissions
+    of a file created with open (mkstemp creates it readable by the owner
+    only).
+
+    Parameters
+    ----------
+    final_path : str
+        Path to file to write.
+    write : callable
+        Function which writes the content to the file object passed.
+    mode : str
+        Mode of opening the temporary file ("w" or "wb").
+
+    Returns
+    -------
+    None
+    """
+
+    descriptor, temporary_path = tempfile.mkstemp(
+        prefix=".{}.".format(os.path.basename(final_path)), suffix=".tmp",
+        dir=os.path.dirname(os.path.abspath(final_path)))
+    try:
+        with open(descriptor, mode) as temporary_file:
+            if hasattr(os, "fchmod"):
+                os.fchmod(temporary_file.fileno(), get_file_mode())
+            write(temporary_file)
+        os.replace(temporary_path, final_path)
+    except BaseException:
+        os.remove(temporary_path)
+        raise
+
+
+class FileCache(BaseCache):
+    """
+    Base class of caches which keep every entry in a file of the cache folder.
+
+    Files are written to a temporary file first and then renamed, so a reader
+    in another process never sees a partially written file. Refreshes of an
+    entry are coordinated between processes with an advisory lock on a
+    hidden ".[filename].lock" file next to it, which is deleted with the
+    file when the lock is not held. The cache folder is created on the first
+    write, so a process which only reads touches no disk at construction.
+
+    Attributes
+    ----------
+    _cache_path : str
+        Full os cache folder path.
+    _cache_name : str
+        Cache folder name.
+
+    Methods
+    -------
+    clear_cache(path_to_file)
+        Deletes the cache file from cache by the path to file.
+    refresh_lock(path_to_file, blocking=True, timeout=None)
+        Context manager of the advisory lock which lets one process at a time
+        refresh the cache file.
+    _get_file_path(path_to_file)
+        Returns full os path of the cache file.
+    _get_lock_path(path_to_file)
+        Returns full os path of the lock file of the cache file.
+    _get_locked_files()
+        Returns names of the cache files which have lock files.
+    _remove_lock(path_to_file)
+        Deletes the lock file of the cache file, unless the lock is held.
+    _create_folder()
+        Creates the cache folder if it is missing.
+    _write_atomically(path_to_file, write, mode="w")
+        Writes the cache file through a temporary file.
+    """
+
+    _cache_path = CacheFolderPath.cache_folder_path
+    _cache_name = CacheFolderPath.cache_folder_name
+
+    def __init__(self, cache_path=None):
+        """
+        Sets the cache folder (it is created on the first write).
+
+        Parameters
+        ----------
+        cache_path : str, optional
+            Full os cache folder path, CacheFolderPath.cache_folder_path by
+            default.
+        """
+
+        if cache_path is not None:
+            self._cache_path = cache_path
+            self._cache_name = os.path.basename(cache_path)
+        self._folder_created = False
+
+    def clear_cache(self, path_to_file: str):
+        """
+        Deletes the cache file from cache by the path to file, a missing file
+        is ignored. Its lock file is deleted too, unless the lock is held.
+
+        Parameters
+        ----------
+        path_to_file : str
+            Path to file to delete.
+
+        Returns
+        -------
+        None
+        """
+
+        try:
+            os.remove(self._get_file_path(path_to_file))
+        except FileNotFoundError:
+            pass
+        self._remove_lock(path_to_file)
+
+    @contextmanager
+    def refresh_lock(self, path_to_file: str, blocking=True, timeout=None):
+        """
+        Context manager of the advisory lock which lets one process at a time
+        refresh the cache file, it yields True if the lock is acquired.
+
+        Parameters
+        ----------
+        path_to_file : str
+            Path to file to lock.
+        blocking : bool
+            Whether to wait for the lock held by another process.
+        timeout : float, optional
+            The maximum time (in seconds) to wait for the lock, None - no
+            limit.
+        """
+
+        if fcntl is None:
+            yield True
+            return
+        self._create_folder()
+        lock_path = self._get_lock_path(path_to_file)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            lock_file = open(lock_path, "a")
+            acquired = self.__acquire_lock(lock_file, blocking, deadline)
+            if not acquired or self.__is_linked(lock_file, lock_path):
+                break
+            # The lock file was removed (see _remove_lock) while the lock was
+            # awaited, the lock of a new file is taken instead.
+            lock_file.close()
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+            lock_file.close()
+
+    @staticmethod
+    def __acquire_lock(lock_file, blocking: bool, deadline) -> bool:
+        while True:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return True
+            except BlockingIOError:
+                if not blocking or (deadline is not None and
+                                    time.monotonic() >= deadline):
+                    return False
+                time.sleep(0.01)
+
+    @staticmethod
+    def __is_linked(lock_file, lock_path: str) -> bool:
+        try:
+            return os.stat(lock_path).st_ino == \
+                os.fstat(lock_file.fileno()).st_ino
+        except FileNotFoundError:
+            return False
+
+    def _get_lock_path(self, path_to_file: str) -> str:
+        file_path = self._get_file_path(path_to_file)
+        return os.path.join(os.path.dirname(file_path), ".{}.lock".format(
+            os.path.basename(file_path)))
+
+    def _get_locked_files(self) -> list:
+        # Returns names of the cache files which have lock files.
+        try:
+            entries = list(os.scandir(self._cache_path))
+        except FileNotFoundError:
+            return []
+        return [entry.name[1:-len(".lock")] for entry in entries
+                if entry.name.startswith(".") and
+                entry.name.endswith(".lock")]
+
+    def _remove_lock(self, path_to_file: str):
+        # Removes the lock file of the cache file, unless the lock is held.
+        if fcntl is None:
+            return
+        lock_path = self._get_lock_path(path_to_file)
+        try:
+            lock_file = open(lock_path)
+        except FileNotFoundError:
+            return
+        with lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return
+            try:
+                os.remove(lock_path)
+            except FileNotFoundError:
+                pass
+
+    def _get_file_path(self, path_to_file: str) -> str:
+        return os.path.join(self._cache_path, path_to_file)
+
+    def _create_folder(self):
+        if not self._folder_created:
+            os.makedirs(self._cache_path, exist_ok=True)
+            self._folder_created = True
+
+    def _write_atomically(self, path_to_file: str, write, mode="w"):
+        """
+        Writes the cache file through a temporary file in the cache folder,
+        which is renamed to the cache file when it is complete.
+
+        Parameters
+        ----------
+        path_to_file : str
+            Path to file to write.
+        write : callable
+            Function which writes the content to the file object passed.
+        mode : str
+            Mode of opening the temporary file ("w" or "wb").
+
+        Returns
+        -------
+        None
+        """
+
+        self._create_folder()
+        write_file_atomically(self._get_file_path(path_to_file), write, mode)
@@ -0,0 +1,119 @@
+import datetime
+import math
+from abc import ABC, abstractmethod
+
+
+class BaseExpiryPolicy(ABC):
+    """
+    Abstract class of policies which define when cached data gets out of
+    date.
+
+    Methods
+    -------
+    get_expiration_time(timestamp, checked_at=None)
+        Returns the expiration time of data with the 'timestamp' parameter.
+    """
+
+    @abstractmethod
+    def get_expiration_time(self, timestamp: float, checked_at=None) -> float:
+        """
+        Returns the expiration time of data with the 'timestamp' parameter.
+
+        Method depends on the specific implementation, so it must be
+        implemented in inheritor class.
+
+        Parameters
+        ----------
+        timestamp : float
+            The 'timestamp' parameter of the data (seconds since the epoch).
+        checked_at : float, optional
+            Time when API last confirmed that the data is unchanged (304 Not
+            Modified or the same timestamp), if it did.
+
+        Returns
+        -------
+        expires_at : float
+            Expiration time (seconds since the epoch).
+        """
+
+        pass
+
+
+class FixedIntervalPolicy(BaseExpiryPolicy):
+    """
+    Data gets out of date a fixed interval after its 'timestamp' parameter
+    or, if API later confirmed that it is unchanged, a fixed interval after
+    that check.
+
+    Attributes
+    ----------
+    _interval : datetime.timedelta
+        Lifetime of the data.
+    """
+
+    def __init__(self, interval: datetime.timedelta):
+        self._interval = interval
+
+    def get_expiration_time(self, timestamp: float, checked_at=None) -> float:
+        if checked_at is not None and checked_at > timestamp:
+            timestamp = checked_at
+        return timestamp + self._interval.total_seconds()
+
+
+class ProviderSchedulePolicy(BaseExpiryPolicy):
+    """
+    Data gets out of date at the next expected update of the provider, which
+    publishes rates every 'period' (for example, hourly on the free plan of
+    Exchange Rates API) starting at 'offset' from the epoch.
+
+    If the data received after the expected update still has the old
+    timestamp (the provider is late), it is requested again every
+    'retry_interval' until the new data appears.
+
+    Attributes
+    ----------
+    _period : float
+        Time (in seconds) between updates of the provider.
+    _offset : float
+        Time (in seconds) of the updates within the period.
+    _publish_delay : float
+        Time (in seconds) the provider needs to publish an update.
+    _retry_interval : float
+        Time (in seconds) between requests while the provider is late.
+    """
+
+    def __init__(self, period=datetime.timedelta(hours=1),
+                 offset=datetime.timedelta(0),
+                 publish_delay=datetime.timedelta(0),
+                 retry_interval=datetime.timedelta(minutes=1)):
+        """
+        Constructs all the necessary attributes for the ProviderSchedulePolicy
+        object.
+
+        Parameters
+        ----------
+        period : datetime.timedelta
+            Time between updates of the provider.
+        offset : datetime.timedelta
+            Time of the updates within the period (updates happen at
+            offset + k * period since the epoch).
+        publish_delay : datetime.timedelta
+            Time the provider needs to publish an update.
+        retry_interval : datetime.timedelta
+            Time between requests while the provider is late.
+        """
+
+        if period.total_seconds() <= 0:
+            raise ValueError("period must be positive")
+        self._period = period.total_seconds()
+        self._offset = offset.total_seconds()
+        self._publish_delay = publish_delay.total_seconds()
+        self._retry_interval = retry_interval.total_seconds()
+
+    def get_expiration_time(self, timestamp: float, checked_at=None) -> float:
+        updates = math.floor((timestamp - self._offset) / self._period) + 1
+        expires_at = self._offset + updates * self._period + \
+            self._publish_delay
+        if checked_at is not None and checked_at >= expires_at:
+            return checked_at + self._retry_interval
+        return expires_at
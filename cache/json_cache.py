@@ -1,20 +1,56 @@
+import fnmatch
 import json
+import logging
 import os
+import threading
+import time
+from collections import OrderedDict
 
-from cache.base_cache.base_cache import BaseCache
-from cache_folder_path import CacheFolderPath
+from cache.base_cache.base_cache import CacheMissError
+from cache.base_cache.file_cache import FileCache
 
 
-class JSONCache(BaseCache):
+class JSONCache(FileCache):
     """
     Implementation of cache class which works with cache JSON files.
 
+    Files are written to a temporary file first and then renamed, so a reader
+    in another process never sees a partially written file. Refreshes of an
+    entry are coordinated between processes with an advisory lock on a
+    hidden ".[filename].lock" file next to it (see FileCache).
+
+    The cache keeps an in-memory index of its ".json" files (name -> size and
+    write time, in the order of the last access), built by one scan of the
+    cache folder on first use and kept up to date by the cache operations, so
+    no call scans the folder. Without limits and the sweeper, the index is
+    only built when the list of files is needed (get_keys, clear_matching,
+    get_stats and sweep), so reads and writes never scan the folder. The
+    index enforces the optional limits of the number and the total size of
+    entries (the least recently used entries are deleted first) and the
+    optional time to live of entries. Expired entries are deleted by a
+    background sweeper, which also picks up files written by other
+    processes, or on access.
+
     Attributes
     ----------
     _cache_path : str
         Full os cache folder path.
     _cache_name : str
         Cache folder name.
+    _max_entries : int or None
+        The maximum number of cache files, None - no limit.
+    _max_bytes : int or None
+        The maximum total size of cache files, None - no limit.
+    _ttl : float or None
+        Time (in seconds) a cache file is kept after it is written, None - no
+        limit.
+    _index : OrderedDict or None
+        Filename -> (size, write time) in LRU order, None - not built yet.
+    _limited : bool
+        True if any limit or the sweeper is set (reads and writes keep the
+        index).
+    _stats : dict
+        Counters of evictions and expirations.
 
     Methods
     -------
@@ -24,15 +60,67 @@ class JSONCache(BaseCache):
         Deserialize data from JSON file from cache.
     clear_cache(path_to_file)
         Deletes the cache file from cache by the path to file.
+    touch(path_to_file)
+        Updates the write time of the cache file without rewriting it.
+    clear_all()
+        Deletes all cache files.
+    clear_matching(pattern)
+        Deletes cache files which names match the shell-style pattern.
+    get_keys()
+        Returns names of all cache files.
+    sweep()
+        Deletes expired files and re-reads the cache folder.
+    get_stats()
+        Returns counters and the current size of the cache.
+    close()
+        Stops the background sweeper.
+    refresh_lock(path_to_file, blocking=True, timeout=None)
+        Context manager of the advisory lock which lets one process at a time
+        refresh the cache file.
     """
-    _cache_path = CacheFolderPath.cache_folder_path
-    _cache_name = CacheFolderPath.cache_folder_name
 
-    def __init__(self):
-        """Creates a cache folder if it is missing."""
+    logger = logging.getLogger("JSONCache")
+
+    def __init__(self, cache_path=None, max_entries=None, max_bytes=None,
+                 ttl=None, sweep_interval=None):
+        """
+        Sets the cache folder (it is created on the first write) and starts
+        the background sweeper, if 'sweep_interval' is passed.
+
+        Parameters
+        ----------
+        cache_path : str, optional
+            Full os cache folder path, CacheFolderPath.cache_folder_path by
+            default.
+        max_entries : int, optional
+            The maximum number of cache files.
+        max_bytes : int, optional
+            The maximum total size of cache files in bytes.
+        ttl : float, optional
+            Time (in seconds) a cache file is kept after it is written.
+        sweep_interval : float, optional
+            Time (in seconds) between background sweeps.
+        """
 
-        if not os.path.exists(self._cache_path):
-            os.mkdir(self._cache_name)
+        super().__init__(cache_path)
+        if max_entries is not None and max_entries < 1:
+            raise ValueError("max_entries must be positive")
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._ttl = ttl
+        self._limited = max_entries is not None or max_bytes is not None or \
+            ttl is not None or sweep_interval is not None
+        self._index = None
+        self._size = 0
+        self._lock = threading.RLock()
+        self._stats = {"evictions": 0, "expirations": 0}
+        self._stopped = threading.Event()
+        self._sweeper = None
+        if sweep_interval is not None:
+            self._sweeper = threading.Thread(
+                target=self._sweep_periodically, args=(sweep_interval,),
+                name="json-cache-sweeper", daemon=True)
+            self._sweeper.start()
 
     def save_in_cache(self, path_to_file: str, data: dict):
         """
@@ -50,9 +138,16 @@ class JSONCache(BaseCache):
         None
         """
 
-        with open(os.path.join(self._cache_path, path_to_file), "w") as \
-                cache_file:
-            json.dump(data, cache_file)
+        content = json.dumps(data)
+        self._write_atomically(path_to_file,
+                               lambda cache_file: cache_file.write(content))
+        with self._lock:
+            index = self._get_index(build=False)
+            if index is not None:
+                self._remove_from_index(path_to_file)
+                index[path_to_file] = (len(content), time.time())
+                self._size += len(content)
+                self._evict()
 
     def get_from_cache(self, path_to_file: str) -> dict:
         """
@@ -67,14 +162,39 @@ class JSONCache(BaseCache):
         -------
         json.load(cache_file) : dict
             Value of specific cached response.
+
+        Raises
+        ------
+        FileNotFoundError
+            Raises if the file is missing or expired.
         """
 
-        with open(os.path.join(self._cache_path, path_to_file)) as cache_file:
-            return json.load(cache_file)
+        with self._lock:
+            index = self._get_index(build=False)
+            entry = index.get(path_to_file) if index is not None else None
+            if entry is not None:
+                if self._is_expired(entry[1], time.time()):
+                    self._delete(path_to_file)
+                    self._stats["expirations"] += 1
+                    raise CacheMissError(path_to_file)
+                self._index.move_to_end(path_to_file)
+        try:
+            with open(self._get_file_path(path_to_file)) as cache_file:
+                data = json.load(cache_file)
+        except FileNotFoundError:
+            with self._lock:
+                self._remove_from_index(path_to_file)
+            raise
+        if entry is None and index is not None:
+            # The file was written by another process after the index was
+            # built.
+            self._add_to_index(path_to_file)
+        return data
 
     def clear_cache(self, path_to_file: str):
         """
-        Deletes the cache file from cache by the path to file.
+        Deletes the cache file from cache by the path to file, a missing file
+        is ignored.
 
         Parameters
         ----------
@@ -86,4 +206,211 @@ class JSONCache(BaseCache):
         None
         """
 
-        os.remove(os.path.join(self._cache_path, path_to_file))
+        with self._lock:
+            self._delete(path_to_file)
+
+    def touch(self, path_to_file: str):
+        """
+        Updates the modification time of the cache file (its write time in
+        the index, which restarts its time to live and makes it the most
+        recently used) without rewriting it, a missing file is ignored.
+
+        Parameters
+        ----------
+        path_to_file : str
+            Path to file to touch.
+
+        Returns
+        -------
+        None
+        """
+
+        now = time.time()
+        try:
+            os.utime(self._get_file_path(path_to_file), (now, now))
+        except FileNotFoundError:
+            return
+        with self._lock:
+            index = self._get_index(build=False)
+            entry = index.get(path_to_file) if index is not None else None
+            if entry is not None:
+                index[path_to_file] = (entry[0], now)
+                index.move_to_end(path_to_file)
+
+    def clear_all(self):
+        """
+        Deletes all cache files.
+
+        Returns
+        -------
+        None
+        """
+
+        self.clear_matching("*")
+
+    def clear_matching(self, pattern: str) -> int:
+        """
+        Deletes cache files which names match the shell-style pattern (for
+        example, "EUR-*" - all entries of the base EUR).
+
+        Parameters
+        ----------
+        pattern : str
+            Shell-style pattern of filenames (see fnmatch).
+
+        Returns
+        -------
+        count : int
+            The number of deleted files.
+        """
+
+        with self._lock:
+            names = fnmatch.filter(list(self._get_index()), pattern)
+            for name in names:
+                self._delete(name)
+        return len(names)
+
+    def get_keys(self) -> list:
+        """
+        Returns names of all cache files, from the least to the most recently
+        used.
+
+        Returns
+        -------
+        keys : list
+            Filenames.
+        """
+
+        with self._lock:
+            return list(self._get_index())
+
+    def sweep(self) -> int:
+        """
+        Re-reads the cache folder (to pick up files of other processes),
+        deletes expired files and enforces the limits. Lock files which are
+        not held and have no cache file are deleted too.
+
+        Returns
+        -------
+        count : int
+            The number of deleted expired files.
+        """
+
+        now = time.time()
+        with self._lock:
+            self._index = self._scan(self._index)
+            expired = [name for name, (_, written_at) in self._index.items()
+                       if self._is_expired(written_at, now)]
+            for name in expired:
+                self._delete(name)
+            self._stats["expirations"] += len(expired)
+            self._evict()
+            # Lock files of the files deleted by other processes.
+            for name in self._get_locked_files():
+                if name not in self._index:
+                    self._remove_lock(name)
+        return len(expired)
+
+    def get_stats(self) -> dict:
+        """
+        Returns counters and the current size of the cache.
+
+        Returns
+        -------
+        stats : dict
+            Evictions, expirations, entries and bytes.
+        """
+
+        with self._lock:
+            index = self._get_index()
+            stats = dict(self._stats)
+            stats["entries"] = len(index)
+            stats["bytes"] = self._size
+        return stats
+
+    def close(self):
+        """
+        Stops the background sweeper.
+
+        Returns
+        -------
+        None
+        """
+
+        self._stopped.set()
+        if self._sweeper is not None:
+            self._sweeper.join()
+
+    def _get_index(self, build=True):
+        # Reads and writes (build=False) of a cache without limits do not
+        # build the index, they keep it up to date once it is built.
+        if self._index is None and (build or self._limited):
+            self._index = self._scan(None)
+        return self._index
+
+    def _scan(self, index) -> OrderedDict:
+        # Builds the index from the cache folder, keeping the access order of
+        # the files already known, files of other processes are put after
+        # them in the order of writing.
+        found = {}
+        try:
+            entries = list(os.scandir(self._cache_path))
+        except FileNotFoundError:
+            entries = []
+        for entry in entries:
+            if entry.name.startswith(".") or \
+                    not entry.name.endswith(".json") or not entry.is_file():
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            found[entry.name] = (stat.st_size, stat.st_mtime)
+        known = [name for name in (index or ()) if name in found]
+        new = sorted((name for name in found if index is None or
+                      name not in index), key=lambda name: found[name][1])
+        scanned = OrderedDict((name, found[name]) for name in known + new)
+        self._size = sum(size for size, _ in scanned.values())
+        return scanned
+
+    def _add_to_index(self, path_to_file: str):
+        try:
+            stat = os.stat(self._get_file_path(path_to_file))
+        except FileNotFoundError:
+            return
+        with self._lock:
+            index = self._get_index(build=False)
+            if index is not None and path_to_file not in index:
+                index[path_to_file] = (stat.st_size, stat.st_mtime)
+                self._size += stat.st_size
+                self._evict()
+
+    def _remove_from_index(self, path_to_file: str):
+        if self._index is None:
+            return
+        entry = self._index.pop(path_to_file, None)
+        if entry is not None:
+            self._size -= entry[0]
+
+    def _delete(self, path_to_file: str):
+        self._remove_from_index(path_to_file)
+        super().clear_cache(path_to_file)
+
+    def _evict(self):
+        while self._index and (
+                (self._max_entries is not None and
+                 len(self._index) > self._max_entries) or
+                (self._max_bytes is not None and self._size > self._max_bytes)):
+            self._delete(next(iter(self._index)))
+            self._stats["evictions"] += 1
+
+    def _is_expired(self, written_at: float, now: float) -> bool:
+        return self._ttl is not None and now - written_at > self._ttl
+
+    def _sweep_periodically(self, interval: float):
+        while not self._stopped.wait(interval):
+            try:
+                self.sweep()
+            except OSError as error:
+                self.logger.warning("Sweep of {} failed: {}".format(
+                    self._cache_path, error))
@@ -0,0 +1,244 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from cache.base_cache.base_cache import BaseCache
+
+
+class MemoryCache(BaseCache):
+    """
+    Implementation of cache class which keeps a bounded in-process LRU layer
+    in front of another (backing) cache.
+
+    Writes go through to the backing cache, reads are served from memory while
+    the entry is there and its TTL has not expired, so fresh hits never touch
+    the backing storage. Returned data objects are shared between callers and
+    must not be modified.
+
+    Attributes
+    ----------
+    _backing_cache : BaseCache
+        Cache to read missing entries from and to write all entries to.
+    _max_entries : int
+        The maximum number of entries in memory.
+    _max_bytes : int or None
+        The maximum total size of entries (size of an entry is the length of
+        its JSON representation), None - no limit.
+    _ttl : float or None
+        Time (in seconds) an entry may stay in memory, None - no limit.
+    _entries : OrderedDict
+        Path to file -> (data, size, expiration time), in LRU order.
+    _stats : dict
+        Counters of hits, misses, evictions and expirations.
+
+    Methods
+    -------
+    save_in_cache(path_to_file, data)
+        Saves data in the backing cache and in memory.
+    get_from_cache(path_to_file)
+        Gets data from memory or, if it is missing, from the backing cache.
+    clear_cache(path_to_file)
+        Deletes the entry from memory and from the backing cache.
+    touch(path_to_file)
+        Touches the entry of the backing cache.
+    invalidate(path_to_file=None)
+        Deletes the entry (or all entries) from memory only.
+    get_stats()
+        Returns counters and the current size of the memory layer.
+    refresh_lock(path_to_file, blocking=True, timeout=None)
+        Context manager of the refresh lock of the backing cache.
+    """
+
+    def __init__(self, backing_cache: BaseCache, max_entries=1024,
+                 max_bytes=None, ttl=None):
+        """
+        Constructs all the necessary attributes for the MemoryCache object.
+
+        Parameters
+        ----------
+        backing_cache : BaseCache
+            Cache to read missing entries from and to write all entries to.
+        max_entries : int
+            The maximum number of entries in memory.
+        max_bytes : int, optional
+            The maximum total size of entries in bytes.
+        ttl : float, optional
+            Time (in seconds) an entry may stay in memory.
+        """
+
+        if max_entries < 1:
+            raise ValueError("max_entries must be positive")
+        self._backing_cache = backing_cache
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._ttl = ttl
+        self._entries = OrderedDict()
+        self._size = 0
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0,
+                       "expirations": 0}
+
+    def save_in_cache(self, path_to_file: str, data: dict):
+        """
+        Saves data in the backing cache and in memory (write-through).
+
+        Parameters
+        ----------
+        path_to_file : str
+            Path to file to put data.
+        data : dict
+            A data object to put in cache.
+
+        Returns
+        -------
+        None
+        """
+
+        self._backing_cache.save_in_cache(path_to_file, data)
+        with self._lock:
+            self._generation += 1
+            self._store(path_to_file, data)
+
+    def get_from_cache(self, path_to_file: str) -> dict:
+        """
+        Gets data from memory or, if it is missing or expired, from the
+        backing cache.
+
+        Parameters
+        ----------
+        path_to_file : str
+            Path to file to get data from.
+
+        Returns
+        -------
+        data : dict
+            Value of specific cached response.
+
+        Raises
+        ------
+        FileNotFoundError
+            Raises if the entry is missing in the backing cache.
+        """
+
+        with self._lock:
+            entry = self._entries.get(path_to_file)
+            if entry is not None:
+                if self._ttl is None or entry[2] > time.monotonic():
+                    self._entries.move_to_end(path_to_file)
+                    self._stats["hits"] += 1
+                    return entry[0]
+                self._remove(path_to_file)
+                self._stats["expirations"] += 1
+            self._stats["misses"] += 1
+            generation = self._generation
+
+        data = self._backing_cache.get_from_cache(path_to_file)
+        with self._lock:
+            # A concurrent save or clear may have happened during the read,
+            # then the data read is outdated and must not be kept.
+            if generation == self._generation:
+                self._store(path_to_file, data)
+        return data
+
+    def clear_cache(self, path_to_file: str):
+        """
+        Deletes the entry from memory and from the backing cache.
+
+        Parameters
+        ----------
+        path_to_file : str
+            Path to file to delete.
+
+        Returns
+        -------
+        None
+        """
+
+        with self._lock:
+            self._generation += 1
+            self._remove(path_to_file)
+        self._backing_cache.clear_cache(path_to_file)
+
+    def touch(self, path_to_file: str):
+        self._backing_cache.touch(path_to_file)
+
+    def invalidate(self, path_to_file=None):
+        """
+        Deletes the entry from memory only, so the next read goes to the
+        backing cache.
+
+        Parameters
+        ----------
+        path_to_file : str, optional
+            Path to file to invalidate, None - invalidate all entries.
+
+        Returns
+        -------
+        None
+        """
+
+        with self._lock:
+            self._generation += 1
+            if path_to_file is None:
+                self._entries.clear()
+                self._size = 0
+            else:
+                self._remove(path_to_file)
+
+    def get_stats(self) -> dict:
+        """
+        Returns counters and the current size of the memory layer.
+
+        Returns
+        -------
+        stats : dict
+            Hits, misses, evictions, expirations, entries and bytes.
+        """
+
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+            stats["bytes"] = self._size
+        return stats
+
+    @contextmanager
+    def refresh_lock(self, path_to_file: str, blocking=True, timeout=None):
+        """
+        Context manager of the refresh lock of the backing cache.
+
+        The entry is dropped from memory when the lock is acquired, because
+        another process could have refreshed it in the backing cache while
+        this one was waiting.
+        """
+
+        with self._backing_cache.refresh_lock(path_to_file, blocking=blocking,
+                                              timeout=timeout) as acquired:
+            if acquired:
+                self.invalidate(path_to_file)
+            yield acquired
+
+    def _store(self, path_to_file: str, data: dict):
+        self._remove(path_to_file)
+        # Mappings which are not dicts (SnapshotRates of SnapshotCache) are
+        # sized as dicts.
+        size = len(json.dumps(data, default=dict)) \
+            if self._max_bytes is not None else 0
+        if self._max_bytes is not None and size > self._max_bytes:
+            return
+        expires_at = time.monotonic() + self._ttl if self._ttl is not None \
+            else None
+        self._entries[path_to_file] = (data, size, expires_at)
+        self._size += size
+        while len(self._entries) > self._max_entries or (
+                self._max_bytes is not None and self._size > self._max_bytes):
+            _, (_, evicted_size, _) = self._entries.popitem(last=False)
+            self._size -= evicted_size
+            self._stats["evictions"] += 1
+
+    def _remove(self, path_to_file: str):
+        entry = self._entries.pop(path_to_file, None)
+        if entry is not None:
+            self._size -= entry[1]
@@ -0,0 +1,254 @@
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+from array import array
+from collections.abc import Mapping
+
+from cache.base_cache.base_cache import CacheMissError
+from cache.base_cache.file_cache import FileCache
+
+# magic, version, number of currencies, base, timestamp, provider date
+_HEADER = struct.Struct("<4sHI4sd16s")
+_MAGIC = b"RTSN"
+_VERSION = 1
+_CODE_SIZE = 4
+# Parameters of a response which are kept in the header and the arrays, the
+# others (for example, 'validators') are kept in a JSON trailer.
+_FIELDS = ("success", "timestamp", "base", "date", "rates")
+
+
+def _values_offset(count: int) -> int:
+    # The float64 array starts at the first 8-byte aligned offset after the
+    # currency-code index.
+    end_of_codes = _HEADER.size + count * _CODE_SIZE
+    return (end_of_codes + 7) // 8 * 8
+
+
+class SnapshotRates(Mapping):
+    """
+    Read-only mapping of currency codes to rates, which reads the rates
+    directly from a memory-mapped snapshot file (zero-copy).
+
+    Attributes
+    ----------
+    _index : dict
+        Currency code -> position in the array of rates.
+    _values : memoryview
+        The array of rates (float64).
+    """
+
+    __slots__ = ("_index", "_values")
+
+    def __init__(self, index: dict, values):
+        self._index = index
+        self._values = values
+
+    def __getitem__(self, code: str) -> float:
+        return self._values[self._index[code]]
+
+    def __iter__(self):
+        return iter(self._index)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, code) -> bool:
+        return code in self._index
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+
+class SnapshotCache(FileCache):
+    """
+    Implementation of cache class which keeps every response as a compact
+    binary rates snapshot and reads it through mmap.
+
+    A snapshot file ("[name].rates") consists of a header (magic, version,
+    number of currencies, base, timestamp, provider date), a currency-code
+    index (4 bytes per code), a contiguous little-endian float64 array of
+    rates and an optional JSON trailer with the other parameters of the
+    response (for example, the 'validators' of conditional requests).
+    Reading a snapshot does not parse or copy the rates: the returned
+    'rates' mapping reads them from the mapped pages, which are shared by all
+    processes reading the same file. Files are replaced atomically, a mapping
+    of a replaced file stays valid for the objects which still use it.
+
+    Every mapped snapshot holds an open file descriptor, so the backend suits
+    a bounded number of entries (for example, the rate-table mode of
+    CurrencyClient).
+
+    Attributes
+    ----------
+    _cache_path : str
+        Full os cache folder path.
+    _cache_name : str
+        Cache folder name.
+    _mapped : dict
+        Path to file -> (file identity, data) of the mapped snapshots.
+    _indexes : dict
+        Currency-code index bytes -> code to position dict, shared by all
+        snapshots with the same currencies.
+
+    Methods
+    -------
+    save_in_cache(path_to_file, data)
+        Writes data as a snapshot file.
+    get_from_cache(path_to_file)
+        Returns data of the memory-mapped snapshot file.
+    clear_cache(path_to_file)
+        Deletes the snapshot file.
+    """
+
+    def __init__(self, cache_path=None):
+        """
+        Creates a cache folder if it is missing.
+
+        Parameters
+        ----------
+        cache_path : str, optional
+            Full os cache folder path, CacheFolderPath.cache_folder_path by
+            default.
+        """
+
+        super().__init__(cache_path)
+        self._mapped = {}
+        self._indexes = {}
+        self._lock = threading.Lock()
+
+    def save_in_cache(self, path_to_file: str, data: dict):
+        """
+        Writes data as a snapshot file.
+
+        Parameters
+        ----------
+        path_to_file : str
+            Path to file to put data.
+        data : dict
+            A data object to put in cache.
+
+        Returns
+        -------
+        None
+        """
+
+        rates = data["rates"]
+        codes = list(rates)
+        values = array("d", (rates[code] for code in codes))
+        if sys.byteorder != "little":
+            values.byteswap()
+        header = _HEADER.pack(_MAGIC, _VERSION, len(codes),
+                              data["base"].encode("ascii"),
+                              float(data["timestamp"]),
+                              data.get("date", "").encode("ascii"))
+        index = b"".join(code.encode("ascii").ljust(_CODE_SIZE, b"\0")
+                         for code in codes)
+        padding = b"\0" * (_values_offset(len(codes)) - len(header) -
+                           len(index))
+        extra = {key: value for key, value in data.items()
+                 if key not in _FIELDS}
+        trailer = json.dumps(extra, separators=(",", ":")).encode() \
+            if extra else b""
+
+        def write(cache_file):
+            cache_file.write(header + index + padding)
+            values.tofile(cache_file)
+            cache_file.write(trailer)
+
+        self._write_atomically(path_to_file, write, mode="wb")
+
+    def get_from_cache(self, path_to_file: str) -> dict:
+        """
+        Returns data of the memory-mapped snapshot file.
+
+        The file is mapped once and the mapping is reused until the file is
+        replaced.
+
+        Parameters
+        ----------
+        path_to_file : str
+            Path to file to get data from.
+
+        Returns
+        -------
+        data : dict
+            Value of specific cached response, its 'rates' parameter is a
+            SnapshotRates mapping.
+
+        Raises
+        ------
+        CacheMissError
+            Raises if the snapshot file is missing.
+        """
+
+        file_path = self._get_file_path(path_to_file)
+        try:
+            stat = os.stat(file_path)
+        except FileNotFoundError:
+            raise CacheMissError(path_to_file)
+        identity = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        mapped = self._mapped.get(path_to_file)
+        if mapped is not None and mapped[0] == identity:
+            return mapped[1]
+        data = self._map(file_path, path_to_file)
+        with self._lock:
+            self._mapped[path_to_file] = (identity, data)
+        return data
+
+    def clear_cache(self, path_to_file: str):
+        """
+        Deletes the snapshot file.
+
+        Parameters
+        ----------
+        path_to_file : str
+            Path to file to delete.
+
+        Returns
+        -------
+        None
+        """
+
+        with self._lock:
+            self._mapped.pop(path_to_file, None)
+        super().clear_cache(path_to_file)
+
+    def _get_file_path(self, path_to_file: str) -> str:
+        return os.path.join(self._cache_path,
+                            os.path.splitext(path_to_file)[0] + ".rates")
+
+    def _map(self, file_path: str, path_to_file: str) -> dict:
+        try:
+            with open(file_path, "rb") as snapshot_file:
+                buffer = mmap.mmap(snapshot_file.fileno(), 0,
+                                   access=mmap.ACCESS_READ)
+        except FileNotFoundError:
+            raise CacheMissError(path_to_file)
+        magic, version, count, base, timestamp, date = \
+            _HEADER.unpack_from(buffer)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError("{} is not a rates snapshot of version {}".format(
+                file_path, _VERSION))
+        index_bytes = buffer[_HEADER.size:_HEADER.size + count * _CODE_SIZE]
+        index = self._indexes.get(index_bytes)
+        if index is None:
+            index = {index_bytes[offset:offset + _CODE_SIZE].rstrip(
+                b"\0").decode("ascii"): offset // _CODE_SIZE
+                for offset in range(0, len(index_bytes), _CODE_SIZE)}
+            index = self._indexes.setdefault(index_bytes, index)
+        offset = _values_offset(count)
+        end = offset + count * 8
+        values = memoryview(buffer)[offset:end].cast("d")
+        if sys.byteorder != "little":
+            values = array("d", values)
+            values.byteswap()
+        data = json.loads(buffer[end:].decode("utf-8")) \
+            if len(buffer) > end else {}
+        data.update(success=True, timestamp=timestamp,
+                    base=base.rstrip(b"\0").decode("ascii"),
+                    date=date.rstrip(b"\0").decode("ascii"),
+                    rates=SnapshotRates(index, values))
+        return data
@@ -0,0 +1,297 @@
+import json
+import os
+import sqlite3
+import threading
+
+from cache.base_cache.base_cache import BaseCache, CacheMissError
+from cache_folder_path import CacheFolderPath
+
+
+class SQLiteCache(BaseCache):
+    """
+    Implementation of cache class which keeps all entries in one SQLite
+    database file.
+
+    The database works in WAL mode, so readers do not block each other and
+    the writer, and it can be used by several threads (a connection per
+    thread) and worker processes at the same time. The 'timestamp' parameter
+    of every entry is stored in an indexed column for fast expiry sweeps.
+
+    Attributes
+    ----------
+    _database_path : str
+        Full os path of the database file.
+    _timeout : float
+        Time (in seconds) to wait for a lock held by another connection.
+    _local : threading.local
+        Connection of the current thread (and the process it was opened in).
+
+    Methods
+    -------
+    save_in_cache(path_to_file, data)
+        Saves data in cache.
+    get_from_cache(path_to_file)
+        Gets data from cache.
+    clear_cache(path_to_file)
+        Deletes the entry from cache.
+    save_many(entries)
+        Saves a number of entries in one transaction.
+    get_many(paths_to_files)
+        Gets a number of entries.
+    clear_all()
+        Deletes all entries.
+    clear_expired(timestamp)
+        Deletes entries with the 'timestamp' parameter older than given.
+    get_keys()
+        Returns names of all entries.
+    import_json_folder(folder_path)
+        Copies entries of a JSONCache folder into the database.
+    close()
+        Closes the connection of the current thread.
+    """
+
+    _SQLITE_MAX_VARIABLES = 900
+
+    def __init__(self, database_path=None, timeout=30.0):
+        """
+        Creates the database and its table if they are missing.
+
+        Parameters
+        ----------
+        database_path : str, optional
+            Full os path of the database file, "cache.sqlite3" in the cache
+            folder by default.
+        timeout : float
+            Time (in seconds) to wait for a lock held by another connection.
+        """
+
+        if database_path is None:
+            database_path = os.path.join(CacheFolderPath.cache_folder_path,
+                                         "cache.sqlite3")
+        folder = os.path.dirname(os.path.abspath(database_path))
+        os.makedirs(folder, exist_ok=True)
+        self._database_path = database_path
+        self._timeout = timeout
+        self._local = threading.local()
+        with self._connection() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, timestamp REAL, data TEXT NOT NULL)")
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS entries_timestamp "
+                "ON entries (timestamp)")
+
+    def save_in_cache(self, path_to_file: str, data: dict):
+        """
+        Saves data in cache.
+
+        Parameters
+        ----------
+        path_to_file : str
+            Name of the entry.
+        data : dict
+            A data object to put in cache.
+
+        Returns
+        -------
+        None
+        """
+
+        self.save_many({path_to_file: data})
+
+    def get_from_cache(self, path_to_file: str) -> dict:
+        """
+        Gets data from cache.
+
+        Parameters
+        ----------
+        path_to_file : str
+            Name of the entry.
+
+        Returns
+        -------
+        data : dict
+            Value of specific cached response.
+
+        Raises
+        ------
+        CacheMissError
+            Raises if the entry is missing.
+        """
+
+        row = self._connection().execute(
+            "SELECT data FROM entries WHERE key = ?",
+            (path_to_file,)).fetchone()
+        if row is None:
+            raise CacheMissError(path_to_file)
+        return json.loads(row[0])
+
+    def clear_cache(self, path_to_file: str):
+        """
+        Deletes the entry from cache, a missing entry is ignored.
+
+        Parameters
+        ----------
+        path_to_file : str
+            Name of the entry.
+
+        Returns
+        -------
+        None
+        """
+
+        with self._connection() as connection:
+            connection.execute("DELETE FROM entries WHERE key = ?",
+                               (path_to_file,))
+
+    def save_many(self, entries: dict):
+        """
+        Saves a number of entries in one transaction.
+
+        Parameters
+        ----------
+        entries : dict
+            Name of the entry -> data.
+
+        Returns
+        -------
+        None
+        """
+
+        rows = [(key, data.get("timestamp"), json.dumps(data))
+                for key, data in entries.items()]
+        with self._connection() as connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO entries (key, timestamp, data) "
+                "VALUES (?, ?, ?)", rows)
+
+    def get_many(self, paths_to_files) -> dict:
+        """
+        Gets a number of entries, missing ones are skipped.
+
+        Parameters
+        ----------
+        paths_to_files : iterable of str
+            Names of the entries.
+
+        Returns
+        -------
+        entries : dict
+            Name of the entry -> data.
+        """
+
+        keys = list(paths_to_files)
+        entries = {}
+        connection = self._connection()
+        for start in range(0, len(keys), self._SQLITE_MAX_VARIABLES):
+            chunk = keys[start:start + self._SQLITE_MAX_VARIABLES]
+            rows = connection.execute(
+                "SELECT key, data FROM entries WHERE key IN ({})".format(
+                    ", ".join("?" * len(chunk))), chunk)
+            entries.update((key, json.loads(data)) for key, data in rows)
+        return entries
+
+    def clear_all(self) -> int:
+        """
+        Deletes all entries.
+
+        Returns
+        -------
+        deleted : int
+            The number of deleted entries.
+        """
+
+        with self._connection() as connection:
+            return connection.execute("DELETE FROM entries").rowcount
+
+    def clear_expired(self, timestamp: float) -> int:
+        """
+        Deletes entries with the 'timestamp' parameter older than given (uses
+        the index of the column).
+
+        Parameters
+        ----------
+        timestamp : float
+            Oldest timestamp to keep (seconds since the epoch).
+
+        Returns
+        -------
+        deleted : int
+            The number of deleted entries.
+        """
+
+        with self._connection() as connection:
+            return connection.execute(
+                "DELETE FROM entries WHERE timestamp < ?",
+                (timestamp,)).rowcount
+
+    def get_keys(self) -> list:
+        """
+        Returns names of all entries.
+
+        Returns
+        -------
+        keys : list
+            Names of the entries.
+        """
+
+        return [row[0] for row in self._connection().execute(
+            "SELECT key FROM entries ORDER BY key")]
+
+    def import_json_folder(self, folder_path=None) -> int:
+        """
+        Copies entries of a JSONCache folder into the database (migration from
+        JSONCache), the folder itself is left unchanged.
+
+        Parameters
+        ----------
+        folder_path : str, optional
+            Full os path of the JSONCache folder,
+            CacheFolderPath.cache_folder_path by default.
+
+        Returns
+        -------
+        imported : int
+            The number of imported entries.
+        """
+
+        if folder_path is None:
+            folder_path = CacheFolderPath.cache_folder_path
+        entries = {}
+        for name in os.listdir(folder_path):
+            if not name.endswith(".json") or name.startswith("."):
+                continue
+            try:
+                with open(os.path.join(folder_path, name)) as cache_file:
+                    entries[name] = json.load(cache_file)
+            except (OSError, ValueError):
+                continue
+        self.save_many(entries)
+        return len(entries)
+
+    def close(self):
+        """
+        Closes the connection of the current thread.
+
+        Returns
+        -------
+        None
+        """
+
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+    def _connection(self) -> sqlite3.Connection:
+        # A connection must not be shared between threads or inherited by a
+        # forked process, so each thread of each process opens its own one.
+        connection = getattr(self._local, "connection", None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self._database_path,
+                                         timeout=self._timeout)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
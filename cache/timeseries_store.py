@@ -0,0 +1,289 @@
+import datetime
+import math
+import os
+import sys
+import threading
+from array import array
+from contextlib import contextmanager
+
+from cache_folder_path import CacheFolderPath
+
+try:
+    import fcntl
+except ImportError:  # not a POSIX system, locks are not supported
+    fcntl = None
+
+ORIGIN = datetime.date(1999, 1, 1)
+_PRESENT = b"\1"
+_ABSENT = b"\0"
+
+
+def _day(date: datetime.date) -> int:
+    if date < ORIGIN:
+        raise ValueError("Dates before {} are not supported".format(
+            ORIGIN.isoformat()))
+    return date.toordinal() - ORIGIN.toordinal()
+
+
+def _to_bytes(values: list) -> bytes:
+    data = array("d", values)
+    if sys.byteorder != "little":
+        data.byteswap()
+    return data.tobytes()
+
+
+def _get_runs(days: list) -> list:
+    # Splits sorted (day, date) pairs into lists of consecutive days.
+    runs = []
+    for day, date in days:
+        if runs and runs[-1][-1][0] == day - 1:
+            runs[-1].append((day, date))
+        else:
+            runs.append([(day, date)])
+    return runs
+
+
+def _read_values(file_path: str, first_day: int, count: int) -> array:
+    # Days beyond the end of the file are missing (NaN).
+    values = array("d")
+    try:
+        with open(file_path, "rb") as values_file:
+            values_file.seek(first_day * values.itemsize)
+            data = values_file.read(count * values.itemsize)
+    except FileNotFoundError:
+        data = b""
+    data = data[:len(data) // values.itemsize * values.itemsize]
+    values.frombytes(data)
+    if sys.byteorder != "little":
+        values.byteswap()
+    values.extend([math.nan] * (count - len(values)))
+    return values
+
+
+class TimeSeriesStore:
+    """
+    Local append-only columnar store of historical exchange rates.
+
+    Rates of every base currency are kept in a folder of the base with one
+    file per currency: a little-endian float64 array indexed by the number
+    of days since ORIGIN (NaN - no rate). A "dates" file keeps one byte per
+    day, which marks the days already received from API. Stored rates are
+    never rewritten, files only grow, so a range of days is read with one
+    read per currency and no per-day objects. Writes of a base are
+    coordinated between processes with an advisory lock.
+
+    Attributes
+    ----------
+    _store_path : str
+        Full os path of the store folder.
+
+    Methods
+    -------
+    get_missing_ranges(base, start_date, end_date)
+        Returns (start, end) date ranges which are missing in the store.
+    save_rates(base, rates)
+        Saves rates of several days.
+    get_rates(base, start_date, end_date, symbols=())
+        Returns the days present mask and the arrays of rates of a range.
+    get_symbols(base)
+        Returns the currency codes stored for the base.
+    """
+
+    def __init__(self, store_path=None):
+        """
+        Constructs all the necessary attributes for the TimeSeriesStore
+        object.
+
+        Parameters
+        ----------
+        store_path : str, optional
+            Full os path of the store folder, "timeseries" subfolder of
+            CacheFolderPath.cache_folder_path by default.
+        """
+
+        self._store_path = store_path if store_path is not None else \
+            os.path.join(CacheFolderPath.cache_folder_path, "timeseries")
+        self._lock = threading.Lock()
+
+    def get_missing_ranges(self, base: str, start_date: datetime.date,
+                           end_date: datetime.date) -> list:
+        """
+        Returns date ranges which are missing in the store.
+
+        Parameters
+        ----------
+        base : str
+            Base currency (three-letter currency code).
+        start_date : datetime.date
+            The first date of the range.
+        end_date : datetime.date
+            The last date of the range (inclusive).
+
+        Returns
+        -------
+        ranges : list
+            (start_date, end_date) tuples of consecutive missing days.
+        """
+
+        present = self._read_present(base.upper(), _day(start_date),
+                                     _day(end_date) - _day(start_date) + 1)
+        ranges = []
+        first = None
+        for offset, flag in enumerate(present + _PRESENT):
+            if flag != _PRESENT[0] and first is None:
+                first = offset
+            elif flag == _PRESENT[0] and first is not None:
+                ranges.append((start_date + datetime.timedelta(first),
+                               start_date + datetime.timedelta(offset - 1)))
+                first = None
+        return ranges
+
+    def save_rates(self, base: str, rates: dict):
+        """
+        Saves rates of several days. Days already present in the store are
+        skipped.
+
+        Parameters
+        ----------
+        base : str
+            Base currency (three-letter currency code).
+        rates : dict
+            datetime.date -> dict of currency code -> rate.
+
+        Returns
+        -------
+        None
+        """
+
+        base = base.upper()
+        folder = os.path.join(self._store_path, base)
+        os.makedirs(folder, exist_ok=True)
+        with self._lock, self.__write_lock(folder):
+            days = sorted((_day(date), date) for date in rates)
+            if not days:
+                return
+            first_day = days[0][0]
+            present = self._read_present(base, first_day,
+                                         days[-1][0] - first_day + 1)
+            days = [(day, date) for day, date in days
+                    if present[day - first_day] != _PRESENT[0]]
+            runs = _get_runs(days)
+            codes = set(code for _, date in days for code in rates[date])
+            for code in codes:
+                with self.__open_for_update(os.path.join(
+                        folder, "{}.f64".format(code))) as values_file:
+                    for run in runs:
+                        self.__write_at(values_file, run[0][0], _to_bytes(
+                            [rates[date].get(code, math.nan)
+                             for _, date in run]), _to_bytes([math.nan]))
+            # Days are marked present after their rates are written, so a
+            # reader never sees a present day without rates.
+            with self.__open_for_update(os.path.join(folder, "dates")) as \
+                    dates_file:
+                for run in runs:
+                    self.__write_at(dates_file, run[0][0],
+                                    _PRESENT * len(run), _ABSENT)
+
+    def get_rates(self, base: str, start_date: datetime.date,
+                  end_date: datetime.date, symbols=()) -> tuple:
+        """
+        Returns the days present mask and the arrays of rates of a range.
+
+        Parameters
+        ----------
+        base : str
+            Base currency (three-letter currency code).
+        start_date : datetime.date
+            The first date of the range.
+        end_date : datetime.date
+            The last date of the range (inclusive).
+        symbols : iterable of str
+            Currency codes, empty - all stored currencies of the base.
+
+        Returns
+        -------
+        (present, columns) : tuple
+            Bytes with 1 for the days present in the store and a dict of
+            currency code -> array of rates (one float per day, NaN - no
+            rate).
+        """
+
+        base = base.upper()
+        first_day = _day(start_date)
+        count = _day(end_date) - first_day + 1
+        present = self._read_present(base, first_day, count)
+        symbols = [symbol.upper() for symbol in symbols] or \
+            self.get_symbols(base)
+        folder = os.path.join(self._store_path, base)
+        columns = {}
+        for code in symbols:
+            if code == base:
+                columns[code] = array("d", [1.0]) * count
+            else:
+                columns[code] = _read_values(
+                    os.path.join(folder, "{}.f64".format(code)), first_day,
+                    count)
+        return present, columns
+
+    def get_symbols(self, base: str) -> list:
+        """
+        Returns the currency codes stored for the base (the base included).
+
+        Parameters
+        ----------
+        base : str
+            Base currency (three-letter currency code).
+
+        Returns
+        -------
+        symbols : list
+            Sorted currency codes.
+        """
+
+        base = base.upper()
+        try:
+            names = os.listdir(os.path.join(self._store_path, base))
+        except FileNotFoundError:
+            return []
+        codes = set(name[:-len(".f64")] for name in names
+                    if name.endswith(".f64"))
+        return sorted(codes | {base}) if codes else []
+
+    def _read_present(self, base: str, first_day: int, count: int) -> bytes:
+        try:
+            with open(os.path.join(self._store_path, base, "dates"),
+                      "rb") as dates_file:
+                dates_file.seek(first_day)
+                present = dates_file.read(count)
+        except FileNotFoundError:
+            present = b""
+        return present + _ABSENT * (count - len(present))
+
+    @staticmethod
+    def __write_at(store_file, position: int, data: bytes, filler: bytes):
+        # Extends the file with the filler up to the position (in items of
+        # the filler size), so skipped days stay missing.
+        end = store_file.seek(0, os.SEEK_END) // len(filler)
+        if end < position:
+            store_file.write(filler * (position - end))
+        store_file.seek(position * len(filler))
+        store_file.write(data)
+
+    @staticmethod
+    def __open_for_update(file_path: str):
+        if not os.path.exists(file_path):
+            open(file_path, "ab").close()
+        return open(file_path, "r+b")
+
+    @staticmethod
+    @contextmanager
+    def __write_lock(folder: str):
+        if fcntl is None:
+            yield
+            return
+        with open(os.path.join(folder, ".lock"), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
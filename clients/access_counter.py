@@ -0,0 +1,76 @@
+import threading
+import time
+
+
+class AccessCounter:
+    """
+    Decaying counters of accesses to cache keys, which tell the hottest keys.
+
+    Counters are halved every 'half_life' seconds, so the hot keys follow
+    recent traffic, and counters which drop below 0.1 are forgotten.
+
+    Attributes
+    ----------
+    _half_life : float
+        Time (in seconds) after which counters are halved.
+    _hits : dict
+        Key -> decaying access counter.
+
+    Methods
+    -------
+    record(key)
+        Counts an access to the key.
+    get_top(count)
+        Returns the 'count' most accessed keys.
+    is_hot(key, count)
+        Checks that the key is one of the 'count' most accessed keys.
+    """
+
+    def __init__(self, half_life=1.0, clock=time.monotonic):
+        """
+        Constructs all the necessary attributes for the AccessCounter object.
+
+        Parameters
+        ----------
+        half_life : float
+            Time (in seconds) after which counters are halved.
+        clock : callable
+            Source of the current monotonic time.
+        """
+
+        if half_life <= 0:
+            raise ValueError("half_life must be positive")
+        self._half_life = half_life
+        self._clock = clock
+        self._hits = {}
+        self._decayed_at = clock()
+        self._lock = threading.Lock()
+
+    def record(self, key):
+        with self._lock:
+            self.__decay()
+            self._hits[key] = self._hits.get(key, 0.0) + 1.0
+
+    def get_top(self, count: int) -> list:
+        with self._lock:
+            self.__decay()
+            return sorted(self._hits, key=self._hits.get,
+                          reverse=True)[:count]
+
+    def is_hot(self, key, count: int) -> bool:
+        with self._lock:
+            self.__decay()
+            hits = self._hits.get(key)
+            if hits is None:
+                return False
+            return sum(1 for other in self._hits.values()
+                       if other > hits) < count
+
+    def __decay(self):
+        periods = int((self._clock() - self._decayed_at) // self._half_life)
+        if periods:
+            factor = 0.5 ** min(periods, 64)
+            self._hits = {key: hits * factor
+                          for key, hits in self._hits.items()
+                          if hits * factor >= 0.1}
+            self._decayed_at += periods * self._half_life
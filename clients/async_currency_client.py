@@ -0,0 +1,280 @@
+import asyncio
+import datetime
+import logging
+import os
+import time
+
+from apies.async_exchange_rates_api import AsyncExchangeRatesApi
+from cache.async_cache import AsyncCache
+from cache.expiry_policy import BaseExpiryPolicy, FixedIntervalPolicy
+from cache.json_cache import JSONCache
+from clients.rate_snapshot import RateSnapshot
+from clients.rate_table import derive_rates
+
+
+class AsyncCurrencyClient:
+    """
+    An asyncio-native counterpart of CurrencyClient with the same caching
+    semantics: non-blocking HTTP with connection reuse, cache operations in a
+    thread pool and a limit of concurrent requests to API.
+
+    The client must be used from one event loop.
+
+    Attributes
+    ----------
+    endpoint : str
+        Exchange Rates API endpoint, which provides specific functionality.
+    logger : class attribute of Logger class
+        An attribute of Logger class for logging information.
+    _interval : datetime.timedelta
+        Current interval of requests frequency to API.
+    _expiry_policy : instance attribute of BaseExpiryPolicy implementation
+        Policy which defines when cached data gets out of date.
+    _api_manager : instance attribute of AsyncExchangeRatesApi class
+    _cache_manager : instance attribute of AsyncCache class, which adapts a
+    BaseCache implementation (JSONCache by default).
+    _rate_table_base : str or None
+        Reference base currency of the rate-table mode, None - the mode is
+        disabled.
+    _max_concurrency : int
+        The maximum number of concurrent requests to API.
+    _in_flight : dict
+        Cache filename -> refresh task, shared by concurrent callers.
+
+    Methods
+    -------
+    set_interval(days=0, seconds=0, microseconds=0, milliseconds=0,
+    minutes=0, hours=0, weeks=0)
+        Sets the interval of requests frequency to API.
+    get_interval()
+        Returns the current interval of requests frequency to API.
+    set_expiry_policy(expiry_policy)
+        Sets the policy which defines when cached data gets out of date.
+    get_expiry_policy()
+        Returns the current expiry policy.
+    get_currency(*symbols, base="EUR")
+        Coroutine, same as CurrencyClient.get_currency.
+    clear_cache(*symbols, base="EUR")
+        Coroutine, passes cache filename to _cache_manager method of cache
+        deleting.
+    close()
+        Coroutine, closes the connection pool and the cache thread pool.
+    """
+
+    endpoint = "latest"
+    logger = logging.getLogger("AsyncCurrencyClient")
+
+    def __init__(self, days=0, seconds=0, microseconds=0, milliseconds=0,
+                 minutes=0, hours=0, weeks=0, pool=None, cache_manager=None,
+                 rate_table_base=None, max_concurrency=10,
+                 expiry_policy=None):
+        """
+        Constructs all the necessary attributes for the AsyncCurrencyClient
+        object.
+
+        Parameters (time parameters are same as timedelta constructor
+        parameters)
+        ----------
+        days : int
+        seconds : int
+        microseconds : int
+        milliseconds : int
+        minutes : int
+        hours : int
+        weeks : int
+        pool : AsyncConnectionPool, optional
+            A connection pool to send requests with, it can be shared between
+            several clients of one event loop.
+        cache_manager : BaseCache, optional
+            An object of cache class, JSONCache by default.
+        rate_table_base : str, optional
+            Reference base currency of the rate-table mode (see
+            CurrencyClient).
+        max_concurrency : int
+            The maximum number of concurrent requests to API.
+        expiry_policy : BaseExpiryPolicy, optional
+            Policy which defines when cached data gets out of date,
+            FixedIntervalPolicy of _interval by default.
+        """
+
+        self._interval = datetime.timedelta(days, seconds, microseconds,
+                                            milliseconds, minutes, hours, weeks)
+        self._expiry_policy = expiry_policy if expiry_policy is not None \
+            else FixedIntervalPolicy(self._interval)
+        self._api_manager = AsyncExchangeRatesApi(
+            self.endpoint, os.environ.get("SCHEME"), os.environ.get("HOST"),
+            os.environ.get("API_VERSION"), pool=pool,
+            max_connections_per_host=max_concurrency)
+        self._cache_manager = AsyncCache(
+            cache_manager if cache_manager is not None else JSONCache())
+        self._rate_table_base = rate_table_base.upper() if rate_table_base \
+            else None
+        self._max_concurrency = max_concurrency
+        self._semaphore = None
+        self._in_flight = {}
+
+    def set_interval(self, days=0, seconds=0, microseconds=0, milliseconds=0,
+                     minutes=0, hours=0, weeks=0):
+        """
+        Sets the interval of requests frequency to API.
+
+        Parameters (same as timedelta constructor parameters)
+        ----------
+        days : int
+        seconds : int
+        microseconds : int
+        milliseconds : int
+        minutes : int
+        hours : int
+        weeks : int
+
+        Returns
+        -------
+        None
+        """
+
+        self._interval = datetime.timedelta(days, seconds, microseconds,
+                                            milliseconds, minutes, hours, weeks)
+        self._expiry_policy = FixedIntervalPolicy(self._interval)
+
+    def get_interval(self) -> datetime.timedelta:
+        """
+        Returns the current interval of requests frequency to API.
+
+        Returns
+        -------
+        _interval : datetime.timedelta
+            Current interval of requests frequency to API.
+        """
+
+        return self._interval
+
+    def set_expiry_policy(self, expiry_policy: BaseExpiryPolicy):
+        """Same as CurrencyClient.set_expiry_policy."""
+
+        self._expiry_policy = expiry_policy
+
+    def get_expiry_policy(self) -> BaseExpiryPolicy:
+        """Same as CurrencyClient.get_expiry_policy."""
+
+        return self._expiry_policy
+
+    async def get_currency(self, *symbols: str, base="EUR"):
+        """
+        Gets the response from cache, if it is relevant, or from API, logs
+        user output information and returns it as a RateSnapshot. Concurrent
+        refreshes of the same cache file are coalesced into one request.
+
+        Parameters
+        ----------
+        base : str, optional
+            Base currency for comparison (three-letter currency code).
+        *symbols : str
+            A number of currencies for comparison with base one (three-letter
+            currency code for each)
+
+        Returns
+        -------
+        snapshot : RateSnapshot
+            Immutable rates, base, timestamp and the source of the response.
+        """
+
+        data, from_cache = await self.__get_data(base, symbols)
+        if self.logger.isEnabledFor(logging.INFO):
+            if from_cache:
+                self.logger.info("Get cached data of {}:".format(
+                    " - ".join(symbols)))
+            self.logger.info(data["rates"])
+        return RateSnapshot.from_response(data, from_cache)
+
+    async def clear_cache(self, *symbols: str, base="EUR"):
+        """
+        Passes cache filename to _cache_manager method of cache deleting.
+
+        Parameters
+        ----------
+        base : str, optional
+            Base currency for comparison (three-letter currency code).
+        *symbols : str
+            A number of currencies for comparison with base one (three-letter
+            currency code for each)
+
+        Returns
+        -------
+        None
+        """
+
+        await self._cache_manager.clear_cache(
+            self.__prepare_filename_for_cache(base=base, symbols=symbols))
+
+    async def close(self):
+        """
+        Closes the connection pool and the cache thread pool.
+
+        Returns
+        -------
+        None
+        """
+
+        await self._api_manager.close()
+        self._cache_manager.close()
+
+    async def __get_data(self, base: str, symbols: tuple) -> tuple:
+        if self._rate_table_base is not None:
+            table, from_cache = await self.__get_data_for_key(
+                self._rate_table_base, ())
+            return derive_rates(table, base, symbols), from_cache
+        return await self.__get_data_for_key(base, symbols)
+
+    async def __get_data_for_key(self, base: str, symbols: tuple) -> tuple:
+        filename = self.__prepare_filename_for_cache(base=base,
+                                                     symbols=symbols)
+        data = await self.__get_fresh_from_cache(filename)
+        if data is not None:
+            return data, True
+        task = self._in_flight.get(filename)
+        if task is None:
+            task = asyncio.ensure_future(self.__refresh(filename, base,
+                                                        *symbols))
+            self._in_flight[filename] = task
+            task.add_done_callback(
+                lambda _: self._in_flight.pop(filename, None))
+        # A cancelled caller must not cancel the refresh shared with others.
+        return await asyncio.shield(task), False
+
+    async def __get_from_cache(self, filename: str):
+        try:
+            return await self._cache_manager.get_from_cache(filename)
+        except FileNotFoundError:
+            return None
+
+    async def __get_fresh_from_cache(self, filename: str):
+        data = await self.__get_from_cache(filename)
+        return data if self.__is_fresh(data) else None
+
+    def __is_fresh(self, data) -> bool:
+        return data is not None and \
+            time.time() <= self._expiry_policy.get_expiration_time(
+                data["timestamp"], data.get("checked_at"))
+
+    async def __refresh(self, filename: str, base: str, *symbols: str) -> dict:
+        cached = await self.__get_from_cache(filename)
+        if self.__is_fresh(cached):
+            return cached
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self._max_concurrency)
+        async with self._semaphore:
+            data = await self._api_manager.send_exchange_rate_request(
+                base, *symbols, status_code=200)
+        if cached is not None and data["timestamp"] == cached["timestamp"]:
+            # Unchanged data revalidates the cached copy (see
+            # BaseExpiryPolicy), the check time is kept in the entry.
+            data["checked_at"] = time.time()
+        await self._cache_manager.save_in_cache(filename, data)
+        return data
+
+    @staticmethod
+    def __prepare_filename_for_cache(base: str, symbols: tuple) -> str:
+        symbols = [arg.upper() for arg in symbols]
+        return "{base}-{symbols}.json".format(base=base.upper(),
+                                              symbols=",".join(symbols))
@@ -0,0 +1,262 @@
+"""
+Streaming batch lookups: reads get_currency queries as JSONL from a file or
+stdin and writes the results as JSONL to stdout in constant memory.
+
+A query is one JSON object per line:
+
+    {"base": "EUR", "symbols": ["USD", "RUB"], "id": "any value"}
+
+"base" is EUR by default, "symbols" is a list or a comma-separated string
+(empty - all currencies), "date" (YYYY-MM-DD) asks for historical rates and
+"id", if present, is copied to the result. A result is the query line number
+("line"), the id and either the rates ("base", "timestamp", "date", "rates",
+"from_cache", "stale") or the "error". A summary of the run (queries,
+errors, cache hits, throughput) is written to stderr at the end.
+
+Usage: python -m clients.batch_lookup [INPUT] [--output FILE]
+[--minutes MINUTES] [--rate-table-base BASE] [--cache-path PATH]
+[--max-in-flight N] [--window N] [--unordered] [--batch-window SECONDS]
+[--quiet]
+"""
+import argparse
+import collections
+import json
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, \
+    wait
+
+from cache.json_cache import JSONCache
+from clients.currency_client import CurrencyClient
+
+
+class BatchLookup:
+    """
+    Runs a stream of queries through a CurrencyClient with a bounded number
+    of lookups in flight.
+
+    At most 'max_in_flight' lookups run at a time (so at most as many
+    upstream requests, concurrent misses of the same key are coalesced by the
+    client) and at most 'window' queries are read ahead of the results
+    written, so memory does not grow with the length of the input. Results
+    are yielded in the order of the input or, with ordered=False, as soon as
+    they are ready (a slow miss does not hold back the hits behind it).
+
+    Attributes
+    ----------
+    _client : CurrencyClient
+        The client which serves the lookups.
+    _max_in_flight : int
+        The maximum number of lookups run at a time.
+    _window : int
+        The maximum number of queries read and not yet yielded.
+    _ordered : bool
+        True - results are yielded in the order of the input, False - in the
+        order of completion.
+
+    Methods
+    -------
+    run(lines)
+        Yields the result of every query line.
+    get_stats()
+        Returns the counters and the throughput of the last run.
+    """
+
+    def __init__(self, client: CurrencyClient, max_in_flight=8, window=256,
+                 ordered=True):
+        """
+        Constructs all the necessary attributes for the BatchLookup object.
+
+        Parameters
+        ----------
+        client : CurrencyClient
+            The client which serves the lookups.
+        max_in_flight : int
+            The maximum number of lookups run at a time.
+        window : int
+            The maximum number of queries read and not yet yielded (at least
+            max_in_flight).
+        ordered : bool
+            True - results are yielded in the order of the input, False - in
+            the order of completion.
+        """
+
+        self._client = client
+        self._max_in_flight = max_in_flight
+        self._window = max(window, max_in_flight)
+        self._ordered = ordered
+        self._stats = {}
+
+    def run(self, lines):
+        """
+        Yields the result of every query line (empty lines are skipped).
+
+        Parameters
+        ----------
+        lines : iterable of str
+            JSONL queries, for example a file object.
+
+        Returns
+        -------
+        results : generator of dict
+            Result of every query (see the module docstring), malformed
+            queries and failed lookups yield a result with an "error".
+        """
+
+        self._stats = {"queries": 0, "errors": 0, "from_cache": 0,
+                       "stale": 0, "elapsed_s": 0.0, "queries_per_s": 0.0}
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self._max_in_flight) as executor:
+            # Ordered: a queue of (future, line, query), unordered: future ->
+            # (line, query).
+            pending = collections.deque() if self._ordered else {}
+            for number, line in enumerate(lines, 1):
+                if not line.strip():
+                    continue
+                future, query = self.__submit(executor, line)
+                if self._ordered:
+                    pending.append((future, number, query))
+                    while pending and (len(pending) >= self._window or
+                                       pending[0][0].done()):
+                        yield self.__complete(*pending.popleft())
+                else:
+                    pending[future] = (number, query)
+                    if len(pending) >= self._window:
+                        for result in self.__complete_first(pending):
+                            yield result
+            while pending:
+                if self._ordered:
+                    yield self.__complete(*pending.popleft())
+                else:
+                    for result in self.__complete_first(pending):
+                        yield result
+        elapsed = time.perf_counter() - started
+        self._stats["elapsed_s"] = elapsed
+        self._stats["queries_per_s"] = self._stats["queries"] / elapsed \
+            if elapsed else 0.0
+
+    def get_stats(self) -> dict:
+        """
+        Returns the numbers of queries, errors, results served from cache and
+        stale results, the elapsed time and the throughput of the last run.
+
+        Returns
+        -------
+        stats : dict
+            Counters of the run.
+        """
+
+        return dict(self._stats)
+
+    def __submit(self, executor: ThreadPoolExecutor, line: str) -> tuple:
+        try:
+            query = json.loads(line)
+            base = query.get("base") or "EUR"
+            if not isinstance(base, str):
+                raise TypeError("'base' must be a string")
+            symbols = query.get("symbols") or ()
+            if isinstance(symbols, str):
+                symbols = [symbol for symbol in symbols.split(",") if symbol]
+            elif not isinstance(symbols, (list, tuple)) or \
+                    not all(isinstance(symbol, str) for symbol in symbols):
+                raise TypeError("'symbols' must be a string or a list of "
+                                "strings")
+            symbols = tuple(symbols)
+            date = query.get("date")
+            if date is not None and not isinstance(date, str):
+                raise TypeError("'date' must be a string (YYYY-MM-DD)")
+        except (ValueError, AttributeError, TypeError) as error:
+            future = Future()
+            future.set_exception(ValueError(
+                "Malformed query: {}".format(error)))
+            return future, {}
+        if date:
+            future = executor.submit(self._client.get_historical_currency,
+                                     date, *symbols, base=base)
+        else:
+            future = executor.submit(self._client.get_currency, *symbols,
+                                     base=base)
+        return future, query
+
+    def __complete_first(self, pending: dict) -> list:
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        return [self.__complete(future, *pending.pop(future))
+                for future in done]
+
+    def __complete(self, future: Future, number: int, query: dict) -> dict:
+        self._stats["queries"] += 1
+        result = {"line": number}
+        if "id" in query:
+            result["id"] = query["id"]
+        try:
+            snapshot = future.result()
+        except Exception as error:
+            # Any failure of one lookup is reported in its result, so a bad
+            # query does not stop the stream.
+            self._stats["errors"] += 1
+            result["error"] = "{}: {}".format(type(error).__name__, error)
+            return result
+        self._stats["from_cache"] += snapshot.from_cache
+        self._stats["stale"] += snapshot.stale
+        result.update(base=snapshot.base, timestamp=snapshot.timestamp,
+                      date=snapshot.date, rates=snapshot.rates,
+                      from_cache=snapshot.from_cache, stale=snapshot.stale)
+        return result
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(
+        description="Streams JSONL get_currency queries through the client "
+                    "and writes the results as JSONL.")
+    parser.add_argument("input", nargs="?", default="-",
+                        help="file of queries (stdin by default)")
+    parser.add_argument("--output", help="file to write the results to "
+                                         "(stdout by default)")
+    parser.add_argument("--minutes", type=int, default=60,
+                        help="interval of requests to API")
+    parser.add_argument("--rate-table-base",
+                        help="reference base of the rate-table mode")
+    parser.add_argument("--cache-path", help="folder of the JSON cache")
+    parser.add_argument("--max-in-flight", type=int, default=8,
+                        help="the maximum number of lookups run at a time")
+    parser.add_argument("--window", type=int, default=256,
+                        help="the maximum number of queries read ahead")
+    parser.add_argument("--unordered", action="store_true",
+                        help="write results in the order of completion")
+    parser.add_argument("--batch-window", type=float,
+                        help="micro-batching window of concurrent misses")
+    parser.add_argument("--quiet", action="store_true",
+                        help="do not write the summary to stderr")
+    arguments = parser.parse_args(arguments)
+    client = CurrencyClient(minutes=arguments.minutes,
+                            rate_table_base=arguments.rate_table_base,
+                            cache_manager=JSONCache(arguments.cache_path),
+                            batch_window=arguments.batch_window)
+    lookup = BatchLookup(client, max_in_flight=arguments.max_in_flight,
+                         window=arguments.window,
+                         ordered=not arguments.unordered)
+    input_file = sys.stdin if arguments.input == "-" else \
+        open(arguments.input)
+    output_file = open(arguments.output, "w") if arguments.output else \
+        sys.stdout
+    try:
+        for result in lookup.run(input_file):
+            output_file.write(json.dumps(result, separators=(",", ":")) +
+                              "\n")
+        output_file.flush()
+    except BrokenPipeError:
+        # The reader of stdout went away (for example, "| head").
+        sys.stderr.close()
+        return
+    finally:
+        if input_file is not sys.stdin:
+            input_file.close()
+        if output_file is not sys.stdout:
+            output_file.close()
+    if not arguments.quiet:
+        sys.stderr.write(json.dumps(lookup.get_stats(), sort_keys=True) +
+                         "\n")
+
+
+if __name__ == "__main__":
+    main()
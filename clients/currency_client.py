@@ -2,9 +2,23 @@ import datetime
 import logging
 import os
 import time
+from array import array
+from concurrent.futures import ThreadPoolExecutor
 
+from apies.base_api.request_budget import RequestBudget
 from apies.exchange_rates_api import ExchangeRatesApi
+from cache.expiry_policy import BaseExpiryPolicy, FixedIntervalPolicy
 from cache.json_cache import JSONCache
+from cache.timeseries_store import TimeSeriesStore
+from clients.access_counter import AccessCounter
+from clients.micro_batcher import MicroBatcher
+from clients.rate_snapshot import RateSnapshot
+from clients.rate_table import derive_rates
+from clients.refresh_scheduler import RefreshScheduler
+from clients.single_flight import SingleFlight
+from clients.time_series import TimeSeries
+from clients.warm_start import load_snapshot
+from metrics import get_metrics
 
 
 class CurrencyClient:
@@ -17,10 +31,54 @@ class CurrencyClient:
         Exchange Rates API endpoint, which provides specific functionality.
     logger : class attribute of Logger class
         An attribute of Logger class for logging information.
+    refresh_lock_timeout : float
+        The maximum time (in seconds) to wait for another process refreshing
+        a missing entry.
+    time_series_max_days : int
+        The maximum number of days of one time-series request to API.
+    hot_key_half_life : float
+        Time (in seconds) after which access counters of keys are halved.
+    budget_hot_keys : int
+        The number of the most requested keys which refreshes may use the
+        reserve of the request budget.
     _interval : datetime.timedelta
         Current interval of requests frequency to API.
+    _expiry_policy : instance attribute of BaseExpiryPolicy implementation
+        Policy which defines when cached data gets out of date
+        (FixedIntervalPolicy of _interval by default).
+    _clock : callable
+        Source of the current time (seconds since the epoch).
+    _revalidate : bool
+        Whether refreshes of cached entries are conditional requests.
+    _warm_entries : dict
+        Cache filename -> response of the warm-start snapshot, which serve
+        misses of the cache until the entry is saved in cache.
     _api_manager : instance attribute of ExchangeRatesApi class
-    _cache_manager : instance attribute of JSONCache class.
+    _cache_manager : instance attribute of BaseCache implementation (JSONCache
+    by default).
+    _single_flight : instance attribute of SingleFlight class
+        Coalesces concurrent refreshes of the same cache file.
+    _rate_table_base : str or None
+        Reference base currency of the rate-table mode, None - the mode is
+        disabled.
+    _refresh_scheduler : instance attribute of RefreshScheduler class or None
+        Background refresher of the stale-while-revalidate mode, None - the
+        mode is disabled.
+    _rate_matrix : instance attribute of RateMatrix class or None
+        Cross-rate matrix of the last rates table used by convert.
+    _time_series_store : instance attribute of TimeSeriesStore class or None
+        Local store of historical rates.
+    _access_counter : instance attribute of AccessCounter class
+        Decaying access counters of (base, symbols) keys.
+    _request_budget : instance attribute of RequestBudget class or None
+        Budget of requests of the access key, None - requests are not
+        limited.
+    _micro_batcher : instance attribute of MicroBatcher class or None
+        Merges concurrent refreshes of entries of the same base into one
+        request, None - batching is disabled.
+    _metrics : instance attribute of Metrics or NullMetrics class
+        Metrics of lookups (cache hits and misses, cache latencies, upstream
+        requests per key), shared with _api_manager.
 
     Methods
     -------
@@ -29,6 +87,10 @@ class CurrencyClient:
         Sets the interval of requests frequency to API.
     get_interval()
         Returns the current interval of requests frequency to API.
+    set_expiry_policy(expiry_policy)
+        Sets the policy which defines when cached data gets out of date.
+    get_expiry_policy()
+        Returns the current expiry policy.
     __send_request(base, *symbols, status_code=200)
         Method uses _api_manager functionality to send get-request and return
         the response from JSON object to main method.
@@ -36,19 +98,78 @@ class CurrencyClient:
         Method uses _cache_manager functionality to check the presence of
         cache folder, save response results in cache and get them from cache,
         if their 'timestamp' parameter is less than current time. Method passes
-        cache filename to __send_request method and logs user output
-        information.
+        cache filename to __send_request method, logs user output information
+        and returns an immutable RateSnapshot. Concurrent refreshes of the
+        same cache file are coalesced into one request. In the rate-table
+        mode every response is derived from the cached full rates table of
+        the reference base.
+    get_currencies(queries, max_workers=8)
+        Returns responses for a number of (base, symbols) queries, merging
+        missing ones into one concurrent request per base.
+    convert(amounts, from_codes, to_codes, unknown="raise")
+        Converts arrays of amounts between currencies with a cached cross-rate
+        matrix (requires numpy).
+    get_time_series(start_date, end_date, *symbols, base="EUR")
+        Returns daily rates of a range of past dates, requesting only the
+        dates missing in the local time-series store.
+    get_historical_currency(date, *symbols, base="EUR")
+        Returns the rates of one past date.
+    get_request_budget()
+        Returns the state of the request budget of the access key.
     clear_cache(*symbols, base="EUR")
         Passes cache filename it to _cache_manager method of cache deleting.
+    start_background_refresh(grace=300.0, lead_time=60.0, hot_keys=10,
+    poll_interval=1.0)
+        Enables the stale-while-revalidate mode and starts a RefreshScheduler.
+    stop_background_refresh(wait=True)
+        Stops the RefreshScheduler and disables the stale-while-revalidate
+        mode.
+    close()
+        Stops the background refresh and releases the connection pool and
+        the threads of API requests.
     __prepare_filename_for_cache(base, symbols)
         Forms cache filename.
+    __get_merged_data(base, symbols_list)
+        Sends one request for the union of symbols of several queries and
+        splits the response.
+    __get_data(base, symbols)
+        Returns fresh data for the base and symbols from cache or from API
+        (derived from the rates table in the rate-table mode).
+    __get_data_for_key(base, symbols)
+        Returns fresh data of the cache file for the base and symbols.
+    __get_from_cache(filename)
+        Returns cached data regardless of its relevance.
+    __save_in_cache(filename, data)
+        Saves data in cache.
+    __get_expiration_time(filename, data)
+        Returns the time when the cached data gets out of date according to
+        _expiry_policy.
+    __get_fresh_from_cache(filename)
+        Returns cached data, if it is present and not out of date.
+    __is_fresh(filename, data)
+        Checks that cached data is present and not out of date.
+    __refresh(filename, base, *symbols, force=False)
+        Sends a request to API and saves the response in cache.
+    __backfill(base, start_date, end_date)
+        Requests rates of a range of dates and saves them in the time-series
+        store.
     """
 
     endpoint = "latest"
     logger = logging.getLogger("CurrencyClient")
+    refresh_lock_timeout = 10.0
+    time_series_max_days = 365
+    hot_key_half_life = 60.0
+    budget_hot_keys = 10
 
     def __init__(self, days=0, seconds=0, microseconds=0, milliseconds=0,
-                 minutes=0, hours=0, weeks=0):
+                 minutes=0, hours=0, weeks=0, session=None,
+                 cache_manager=None, rate_table_base=None,
+                 expiry_policy=None, time_series_store=None,
+                 request_timeout=None, hedge_percentile=None,
+                 circuit_breaker=None, request_budget=None,
+                 batch_window=None, max_batch_size=32, metrics=None,
+                 clock=time.time, revalidate=True, warm_start=None):
         """
         Constructs all the necessary attributes for the ExchangeRatesApi object.
 
@@ -64,13 +185,98 @@ class CurrencyClient:
         minutes : int
         hours : int
         weeks : int
+        session : requests.Session, optional
+            A session to send requests with, it can be shared between several
+            clients (see apies.base_api.session.create_session).
+        cache_manager : BaseCache, optional
+            An object of cache class, JSONCache by default. For example,
+            MemoryCache(JSONCache()) serves fresh hits from memory.
+        rate_table_base : str, optional
+            Reference base currency of the rate-table mode. If it is passed,
+            only the full rates table of this base is requested and cached,
+            and responses for any base and symbols are derived from it.
+        expiry_policy : BaseExpiryPolicy, optional
+            Policy which defines when cached data gets out of date,
+            FixedIntervalPolicy of _interval by default.
+        time_series_store : TimeSeriesStore, optional
+            Local store of historical rates, TimeSeriesStore() (created on
+            first use) by default.
+        request_timeout : float, optional
+            Deadline (in seconds) of every request to API.
+        hedge_percentile : float, optional
+            Percentile of latency after which a hedged duplicate request is
+            sent (see BaseAPI).
+        circuit_breaker : CircuitBreaker, optional
+            Circuit breaker of API. While it is open (and on any other failure
+            of a request) the last cached copy is served, marked as stale.
+        request_budget : RequestBudget, optional
+            Budget of requests of the access key, RequestBudget of the
+            environment variable 'REQUEST_QUOTA' (requests per month), if it
+            is set. When the budget is tight, only refreshes of hot and
+            missing entries are sent, other entries are served from cache.
+        batch_window : float, optional
+            Time (in seconds, a few milliseconds) during which concurrent
+            get_currency calls for the same base which need a request are
+            collected and served by one request for the union of their
+            symbols (see MicroBatcher), None - batching is disabled.
+        max_batch_size : int
+            The maximum number of distinct symbols tuples in a batch.
+        metrics : Metrics, optional
+            Metrics of the client and its requests, metrics.get_metrics()
+            (no-op unless metrics.set_metrics is called) by default.
+        clock : callable
+            Source of the current time (seconds since the epoch) of expiry
+            checks, for example a simulated clock of a trace replay.
+        revalidate : bool
+            Whether refreshes of cached entries are conditional requests
+            with the ETag and Last-Modified validators of the cached copy:
+            if the data has not changed, API answers 304 Not Modified without
+            a body and the cached copy is kept with the time of the check.
+        warm_start : str, optional
+            Path to a warm-start snapshot of recent cache entries (see
+            clients.warm_start), which is loaded at once and serves misses
+            of the cache, so the first lookups of a fresh process need no
+            request to API while the snapshot is not out of date.
         """
 
         self._interval = datetime.timedelta(days, seconds, microseconds,
                                             milliseconds, minutes, hours, weeks)
+        self._expiry_policy = expiry_policy if expiry_policy is not None \
+            else FixedIntervalPolicy(self._interval)
+        self._clock = clock
+        self._revalidate = revalidate
+        self._warm_entries = load_snapshot(warm_start) \
+            if warm_start is not None else {}
+        if request_budget is None and os.environ.get("REQUEST_QUOTA"):
+            request_budget = RequestBudget(int(os.environ["REQUEST_QUOTA"]))
+        self._request_budget = request_budget
+        self._metrics = metrics if metrics is not None else get_metrics()
         self._api_manager = ExchangeRatesApi(self.endpoint, os.environ.get(
-            "SCHEME"), os.environ.get("HOST"), os.environ.get("API_VERSION"))
-        self._cache_manager = JSONCache()
+            "SCHEME"), os.environ.get("HOST"), os.environ.get("API_VERSION"),
+            request_budget=request_budget, session=session,
+            request_timeout=request_timeout,
+            hedge_percentile=hedge_percentile, circuit_breaker=circuit_breaker,
+            metrics=self._metrics)
+        self._cache_manager = cache_manager if cache_manager is not None \
+            else JSONCache()
+        self._single_flight = SingleFlight()
+        self._rate_table_base = rate_table_base.upper() if rate_table_base \
+            else None
+        self._refresh_scheduler = None
+        self._rate_matrix = None
+        self._time_series_store = time_series_store
+        self._access_counter = AccessCounter(half_life=self.hot_key_half_life)
+        if hasattr(self._cache_manager, "get_stats"):
+            self._metrics.register_stats(
+                "exchange_rates_cache", self._cache_manager.get_stats,
+                backend=type(self._cache_manager).__name__)
+        if request_budget is not None:
+            self._metrics.register_stats("exchange_rates_request_budget",
+                                         request_budget.get_remaining)
+        self._micro_batcher = MicroBatcher(
+            self.__get_merged_data, window=batch_window,
+            max_batch_size=max_batch_size) if batch_window is not None \
+            else None
 
     def set_interval(self, days=0, seconds=0, microseconds=0, milliseconds=0,
                      minutes=0, hours=0, weeks=0):
@@ -97,6 +303,7 @@ class CurrencyClient:
 
         self._interval = datetime.timedelta(days, seconds, microseconds,
                                             milliseconds, minutes, hours, weeks)
+        self._expiry_policy = FixedIntervalPolicy(self._interval)
 
     def get_interval(self) -> datetime.timedelta:
         """
@@ -110,7 +317,38 @@ class CurrencyClient:
 
         return self._interval
 
-    def __send_request(self, base: str, *symbols: str, status_code=200) -> dict:
+    def set_expiry_policy(self, expiry_policy: BaseExpiryPolicy):
+        """
+        Sets the policy which defines when cached data gets out of date (for
+        example, ProviderSchedulePolicy). set_interval replaces it with
+        FixedIntervalPolicy.
+
+        Parameters
+        ----------
+        expiry_policy : BaseExpiryPolicy
+            Expiry policy.
+
+        Returns
+        -------
+        None
+        """
+
+        self._expiry_policy = expiry_policy
+
+    def get_expiry_policy(self) -> BaseExpiryPolicy:
+        """
+        Returns the current expiry policy.
+
+        Returns
+        -------
+        _expiry_policy : BaseExpiryPolicy
+            Current expiry policy.
+        """
+
+        return self._expiry_policy
+
+    def __send_request(self, base: str, *symbols: str, status_code=200,
+                       priority=False, validators=None):
         """
         Method uses _api_manager functionality to send get-request and return
         the response from JSON object to main method.
@@ -124,24 +362,34 @@ class CurrencyClient:
             currency code for each)
         status_code : int
             An expected status code of the response.
+        priority : bool
+            Whether the request may use the reserve of the request budget.
+        validators : dict, optional
+            Validators of the cached copy to send a conditional request.
 
         Returns
         -------
         _api_manager.send_exchange_rate_request(base, *symbols,
-        status_code=status_code) : dict
-            The dict value of the JSON response.
+        status_code=status_code) : dict or None
+            The dict value of the JSON response, None - the data has not
+            changed since the validators (304 Not Modified).
         """
 
+        if self._metrics.enabled:
+            self._metrics.increment(
+                "exchange_rates_key_upstream_requests_total",
+                key=self.__prepare_filename_for_cache(base, symbols)[:-5])
         return self._api_manager.send_exchange_rate_request(
-            base, *symbols, status_code=status_code)
+            base, *symbols, status_code=status_code, priority=priority,
+            validators=validators)
 
     def get_currency(self, *symbols: str, base="EUR"):
         """
         Method uses _cache_manager functionality to check the presence of
         cache folder, save response results in cache and get them from cache,
         if their 'timestamp' parameter is less than current time. Method passes
-        cache filename to __send_request method and logs user output
-        information.
+        cache filename to __send_request method, logs user output
+        information and returns the result as a RateSnapshot.
 
         If the argument 'base' is passed, then the base currency for
         comparison is 'EUR'.
@@ -154,28 +402,741 @@ class CurrencyClient:
             A number of currencies for comparison with base one (three-letter
             currency code for each)
 
+        Returns
+        -------
+        snapshot : RateSnapshot
+            Immutable rates, base, timestamp and the source of the response.
+        """
+
+        data, from_cache = self.__get_data(base, symbols)
+        # Formatting of the rates is skipped when INFO is disabled.
+        if self.logger.isEnabledFor(logging.INFO):
+            if from_cache:
+                self.logger.info("Get cached data of {}:".format(
+                    " - ".join(symbols)))
+            self.logger.info(data["rates"])
+        return RateSnapshot.from_response(data, from_cache)
+
+    def get_currencies(self, queries, max_workers=8) -> list:
+        """
+        Returns responses for a number of queries in the order of the queries.
+
+        Equal queries are served once. Fresh cached responses are taken from
+        cache, the other queries are merged into one request per base
+        currency (with the union of their symbols), which are sent
+        concurrently by a pool of 'max_workers' threads. The response of every
+        merged request is split back into the responses of the queries, which
+        are saved in cache too.
+
+        Parameters
+        ----------
+        queries : iterable of tuple
+            Queries as (base, symbols) pairs, where symbols is a sequence of
+            three-letter currency codes (empty - all currencies).
+        max_workers : int
+            The maximum number of concurrent requests to API.
+
+        Returns
+        -------
+        results : list
+            RateSnapshot objects of the responses.
+
+        Raises
+        ------
+        RuntimeError
+            Raises if a request for one of the bases fails.
+        """
+
+        queries = [(base.upper(), tuple(symbol.upper() for symbol in symbols))
+                   for base, symbols in queries]
+        if self._rate_table_base is not None:
+            table, from_cache = self.__get_data_for_key(
+                self._rate_table_base, ())
+            return [RateSnapshot.from_response(
+                derive_rates(table, base, symbols), from_cache)
+                for base, symbols in queries]
+
+        results = {}
+        missing = {}
+        for query in set(queries):
+            base, symbols = query
+            data = self.__get_fresh_from_cache(
+                self.__prepare_filename_for_cache(base=base, symbols=symbols))
+            if data is not None:
+                results[query] = RateSnapshot.from_response(data, True)
+            else:
+                missing.setdefault(base, []).append(symbols)
+            if self._metrics.enabled:
+                self._metrics.increment(
+                    "exchange_rates_cache_lookups_total",
+                    result="hit" if data is not None else "miss")
+
+        if missing:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = {base: executor.submit(
+                    self.__get_merged_data, base, symbols_list)
+                    for base, symbols_list in missing.items()}
+                for base, future in futures.items():
+                    for symbols, data in future.result():
+                        results[(base, symbols)] = \
+                            RateSnapshot.from_response(data, False)
+        return [results[query] for query in queries]
+
+    def convert(self, amounts, from_codes, to_codes, unknown="raise"):
+        """
+        Converts arrays of amounts between currencies row by row.
+
+        The cross-rate matrix is built from the full rates table of the
+        reference base (rate_table_base or 'EUR') once per refresh of the
+        table, the whole batch is converted with vectorized indexing.
+
+        Parameters
+        ----------
+        amounts : array-like
+            Amounts (numpy array or any buffer-protocol sequence of numbers).
+        from_codes : array-like or str
+            Currencies of the amounts (three-letter currency codes).
+        to_codes : array-like or str
+            Currencies to convert the amounts to.
+        unknown : str
+            "raise" - raise an error for unknown currency codes, "nan" -
+            return NaN in their rows.
+
+        Returns
+        -------
+        converted : numpy.ndarray
+            Converted amounts (float64).
+
+        Raises
+        ------
+        ImportError
+            Raises if numpy is not installed.
+        RuntimeError
+            Raises if unknown is "raise" and some currency codes are missing
+            in the rates table.
+        """
+
+        table, _ = self.__get_data_for_key(self._rate_table_base or "EUR", ())
+        matrix = self._rate_matrix
+        if matrix is None or matrix.base != table["base"] or \
+                matrix.timestamp != table["timestamp"]:
+            # Deferred, importing numpy takes about 0.1 s.
+            from clients.rate_matrix import RateMatrix
+            matrix = RateMatrix(table)
+            self._rate_matrix = matrix
+        return matrix.convert(amounts, from_codes, to_codes, unknown=unknown)
+
+    def get_time_series(self, start_date, end_date, *symbols: str,
+                        base="EUR") -> TimeSeries:
+        """
+        Returns daily rates of a range of past dates.
+
+        Rates are kept in the local time-series store (full tables of the
+        base or, in the rate-table mode, of the reference base), only the
+        dates missing in it are requested from API (incremental backfill)
+        and everything else is served locally.
+
+        Parameters
+        ----------
+        start_date : datetime.date or str
+            The first date of the range (ISO format string is accepted).
+        end_date : datetime.date or str
+            The last date of the range (inclusive), it must be in the past.
+        *symbols : str
+            A number of currencies for comparison with base one, empty - all
+            currencies.
+        base : str, optional
+            Base currency for comparison (three-letter currency code).
+
+        Returns
+        -------
+        series : TimeSeries
+            One array of rates per currency, NaN - no rate.
+
+        Raises
+        ------
+        ValueError
+            Raises if the range is empty or not in the past.
+        RuntimeError
+            Raises if the base or one of the symbols is unknown.
+        """
+
+        start_date = self.__parse_date(start_date)
+        end_date = self.__parse_date(end_date)
+        if end_date < start_date:
+            raise ValueError("end_date is before start_date")
+        if end_date >= datetime.datetime.now(datetime.timezone.utc).date():
+            raise ValueError("Time series are available for past dates only, "
+                             "use get_currency for the latest rates")
+        base = base.upper()
+        symbols = tuple(symbol.upper() for symbol in symbols)
+        stored_base = self._rate_table_base or base
+        store = self.__get_time_series_store()
+        for missing_start, missing_end in store.get_missing_ranges(
+                stored_base, start_date, end_date):
+            key = "{}:{}:{}".format(stored_base, missing_start, missing_end)
+            self._single_flight.do(key, self.__backfill, stored_base,
+                                   missing_start, missing_end)
+
+        known = store.get_symbols(stored_base)
+        codes = list(symbols) or [code for code in known if code != base]
+        unknown = [code for code in [base] + codes if code not in known]
+        if unknown:
+            raise RuntimeError("Unknown currency codes for the time series "
+                               "of {reference}: {codes}".format(
+                                   reference=stored_base,
+                                   codes=", ".join(unknown)))
+        _, columns = store.get_rates(stored_base, start_date, end_date,
+                                     set(codes) | {base})
+        if base != stored_base:
+            base_values = columns[base]
+            columns = {code: array("d", [value / base_rate for value, base_rate
+                                         in zip(columns[code], base_values)])
+                       for code in codes}
+        else:
+            columns = {code: columns[code] for code in codes}
+        return TimeSeries(base, start_date,
+                          (end_date - start_date).days + 1, columns)
+
+    def get_historical_currency(self, date, *symbols: str,
+                                base="EUR") -> RateSnapshot:
+        """
+        Returns the rates of one past date (see get_time_series).
+
+        Parameters
+        ----------
+        date : datetime.date or str
+            Date of the rates (ISO format string is accepted).
+        *symbols : str
+            A number of currencies for comparison with base one, empty - all
+            currencies.
+        base : str, optional
+            Base currency for comparison (three-letter currency code).
+
+        Returns
+        -------
+        snapshot : RateSnapshot
+            Rates of the date, its 'timestamp' is the start of the date (UTC).
+        """
+
+        date = self.__parse_date(date)
+        series = self.get_time_series(date, date, *symbols, base=base)
+        timestamp = (date - datetime.date(1970, 1, 1)).total_seconds()
+        return RateSnapshot(series.base, timestamp, date.isoformat(),
+                            series.get_rates(date), True)
+
+    def __backfill(self, base: str, start_date: datetime.date,
+                   end_date: datetime.date):
+        """
+        Requests full rates tables of a range of dates from API in chunks of
+        at most time_series_max_days days and saves them in the time-series
+        store. Dates without rates in the responses are saved as empty, so
+        they are not requested again.
+
+        Parameters
+        ----------
+        base : str
+            Base currency (three-letter currency code).
+        start_date : datetime.date
+            The first date of the range.
+        end_date : datetime.date
+            The last date of the range (inclusive).
+
         Returns
         -------
         None
         """
 
+        store = self.__get_time_series_store()
+        chunk = datetime.timedelta(self.time_series_max_days - 1)
+        while start_date <= end_date:
+            chunk_end = min(start_date + chunk, end_date)
+            if start_date == chunk_end:
+                data = self._api_manager.send_historical_request(
+                    start_date, base, status_code=200, priority=True)
+                rates = {start_date: data["rates"]}
+            else:
+                data = self._api_manager.send_timeseries_request(
+                    start_date, chunk_end, base, status_code=200,
+                    priority=True)
+                rates = {self.__parse_date(date): day_rates
+                         for date, day_rates in data["rates"].items()}
+            for offset in range((chunk_end - start_date).days + 1):
+                rates.setdefault(start_date + datetime.timedelta(offset), {})
+            store.save_rates(base, rates)
+            start_date = chunk_end + datetime.timedelta(1)
+
+    def __get_time_series_store(self) -> TimeSeriesStore:
+        if self._time_series_store is None:
+            self._time_series_store = TimeSeriesStore()
+        return self._time_series_store
+
+    @staticmethod
+    def __parse_date(date) -> datetime.date:
+        if isinstance(date, str):
+            return datetime.datetime.strptime(date, "%Y-%m-%d").date()
+        if isinstance(date, datetime.datetime):
+            return date.date()
+        return date
+
+    def __get_merged_data(self, base: str, symbols_list: list) -> list:
+        """
+        Sends one request for the union of symbols of several queries with the
+        same base and splits the response into responses of the queries,
+        saving each of them in cache.
+
+        The union itself is saved in cache only if it is one of the queries:
+        nobody looks up the other unions, so saving them would grow the cache
+        with every composition of a batch. If the request fails, the cached
+        copies of the queries are served, marked as stale.
+
+        Parameters
+        ----------
+        base : str
+            Base currency for comparison (three-letter currency code).
+        symbols_list : list
+            Symbols tuples of the queries.
+
+        Returns
+        -------
+        results : list
+            (symbols, data) pairs for every query.
+        """
+
+        if any(not symbols for symbols in symbols_list):
+            union = ()
+        else:
+            union = tuple(sorted(set(symbol for symbols in symbols_list
+                                     for symbol in symbols)))
+        merged_filename = self.__prepare_filename_for_cache(base=base,
+                                                            symbols=union)
+        filenames = [self.__prepare_filename_for_cache(base=base,
+                                                       symbols=symbols)
+                     for symbols in symbols_list]
+        if merged_filename in filenames:
+            merged = self._single_flight.do(merged_filename, self.__refresh,
+                                            merged_filename, base, *union)
+        else:
+            cached = [self.__get_from_cache(filename)
+                      for filename in filenames]
+            priority = any(data is None or self._access_counter.is_hot(
+                (base.upper(), symbols), self.budget_hot_keys)
+                for symbols, data in zip(symbols_list, cached))
+            try:
+                merged = self._single_flight.do(
+                    merged_filename, self.__send_request, base, *union,
+                    priority=priority)
+            except (RuntimeError, OSError, ValueError) as error:
+                if any(data is None for data in cached):
+                    raise
+                self.logger.warning("Serving stale data of {}: {}".format(
+                    ", ".join(filenames), error))
+                if self._metrics.enabled:
+                    self._metrics.increment(
+                        "exchange_rates_stale_served_total", len(cached))
+                return [(symbols, dict(data, stale=True))
+                        for symbols, data in zip(symbols_list, cached)]
+        results = []
+        for symbols, filename in zip(symbols_list, filenames):
+            if filename == merged_filename:
+                data = merged
+            else:
+                data = derive_rates(merged, base, symbols)
+                # A stale copy must not replace cached entries of the queries.
+                if not merged.get("stale"):
+                    self.__save_in_cache(filename, data)
+            results.append((symbols, data))
+        return results
+
+    def __get_data(self, base: str, symbols: tuple) -> tuple:
+        """
+        Returns fresh data for the base and symbols from cache or from API.
+
+        In the rate-table mode the data is derived from the full rates table
+        of the reference base.
+
+        Parameters
+        ----------
+        base : str
+            Base currency for comparison (three-letter currency code).
+        symbols : tuple
+            A number of currencies for comparison with base one (three-letter
+            currency code for each)
+
+        Returns
+        -------
+        (data, from_cache) : tuple
+            The dict value of the response and True, if it was taken from
+            cache.
+        """
+
+        if self._rate_table_base is not None:
+            table, from_cache = self.__get_data_for_key(
+                self._rate_table_base, ())
+            return derive_rates(table, base, symbols), from_cache
+        return self.__get_data_for_key(base, symbols)
+
+    def __get_data_for_key(self, base: str, symbols: tuple) -> tuple:
+        """
+        Returns fresh data of the cache file for the base and symbols,
+        refreshing it if it is missing or out of date (in a batch with other
+        entries of the base, if batching is enabled).
+
+        Parameters
+        ----------
+        base : str
+            Base currency for comparison (three-letter currency code).
+        symbols : tuple
+            A number of currencies for comparison with base one (three-letter
+            currency code for each)
+
+        Returns
+        -------
+        (data, from_cache) : tuple
+            The dict value of the response and True, if it was taken from
+            cache.
+        """
+
         filename = self.__prepare_filename_for_cache(base=base,
                                                      symbols=symbols)
+        scheduler = self._refresh_scheduler
+        base = base.upper()
+        symbols = tuple(symbol.upper() for symbol in symbols)
+        self._access_counter.record((base, symbols))
+        data = self.__get_from_cache(filename)
+        metrics = self._metrics
+        if data is not None:
+            expires_at = self.__get_expiration_time(filename, data)
+            now = self._clock()
+            if now <= expires_at:
+                if metrics.enabled:
+                    metrics.increment("exchange_rates_cache_lookups_total",
+                                      result="hit")
+                return data, True
+            if scheduler is not None and \
+                    now <= expires_at + scheduler.get_grace():
+                if metrics.enabled:
+                    metrics.increment("exchange_rates_cache_lookups_total",
+                                      result="grace")
+                scheduler.submit(base, symbols)
+                return data, True
+        if metrics.enabled:
+            metrics.increment("exchange_rates_cache_lookups_total",
+                              result="miss" if data is None else "expired")
+        if self._micro_batcher is not None:
+            return self._micro_batcher.do(base, symbols), False
+        return self._single_flight.do(filename, self.__refresh, filename,
+                                      base, *symbols), False
+
+    def __get_from_cache(self, filename: str):
+        """
+        Returns cached data regardless of its relevance.
+
+        Parameters
+        ----------
+        filename : str
+            Cache filename.
+
+        Returns
+        -------
+        data : dict or None
+            Cached data (or the entry of the warm-start snapshot) or None, if
+            it is missing.
+        """
+
+        if not self._metrics.enabled:
+            try:
+                return self._cache_manager.get_from_cache(filename)
+            except FileNotFoundError:
+                return self._warm_entries.get(filename)
+        started = time.perf_counter()
         try:
-            data = self._cache_manager.get_from_cache(filename)
-            if time.time() - data["timestamp"] <= \
-                    self._interval.total_seconds():
-                self.logger.info("Get cached data of {}:".format(
-                    " - ".join(symbols)))
-                self.logger.info(data["rates"])
-            else:
-                data = self.__send_request(base, *symbols)
-                self.logger.info(data["rates"])
-                self._cache_manager.save_in_cache(filename, data)
+            return self._cache_manager.get_from_cache(filename)
         except FileNotFoundError:
-            data = self.__send_request(base, *symbols)
-            self.logger.info(data["rates"])
+            return self._warm_entries.get(filename)
+        finally:
+            self._metrics.observe("exchange_rates_stage_seconds",
+                                  time.perf_counter() - started,
+                                  stage="cache_read")
+
+    def __save_in_cache(self, filename: str, data: dict):
+        """
+        Saves data in cache (the write time is recorded in metrics).
+
+        Parameters
+        ----------
+        filename : str
+            Cache filename.
+        data : dict
+            The dict value of the response.
+
+        Returns
+        -------
+        None
+        """
+
+        if self._warm_entries:
+            self._warm_entries.pop(filename, None)
+        if not self._metrics.enabled:
             self._cache_manager.save_in_cache(filename, data)
+            return
+        started = time.perf_counter()
+        self._cache_manager.save_in_cache(filename, data)
+        self._metrics.observe("exchange_rates_stage_seconds",
+                              time.perf_counter() - started,
+                              stage="cache_write")
+
+    def __get_expiration_time(self, filename: str, data: dict) -> float:
+        """
+        Returns the time when the cached data gets out of date according to
+        _expiry_policy.
+
+        Parameters
+        ----------
+        filename : str
+            Cache filename.
+        data : dict
+            Cached data.
+
+        Returns
+        -------
+        expires_at : float
+            Expiration time (seconds since the epoch).
+        """
+
+        return self._expiry_policy.get_expiration_time(
+            data["timestamp"], data.get("checked_at"))
+
+    def __get_fresh_from_cache(self, filename: str):
+        """
+        Returns cached data, if it is present and it is not out of date
+        according to _expiry_policy.
+
+        Parameters
+        ----------
+        filename : str
+            Cache filename.
+
+        Returns
+        -------
+        data : dict or None
+            Cached data or None, if it is missing or out of date.
+        """
+
+        data = self.__get_from_cache(filename)
+        return data if self.__is_fresh(filename, data) else None
+
+    def __is_fresh(self, filename: str, data) -> bool:
+        """
+        Checks that cached data is present and not out of date.
+
+        Parameters
+        ----------
+        filename : str
+            Cache filename.
+        data : dict or None
+            Cached data.
+
+        Returns
+        -------
+        fresh : bool
+            True if the data is present and not out of date.
+        """
+
+        return data is not None and \
+            self._clock() <= self.__get_expiration_time(filename, data)
+
+    def __refresh(self, filename: str, base: str, *symbols: str,
+                  force=False) -> dict:
+        """
+        Sends a request to API and saves the response in cache.
+
+        Method is called by one caller per cache filename at a time (see
+        SingleFlight), the other concurrent callers share its result. Between
+        processes the refresh is coordinated with the refresh lock of the
+        cache: if another process holds it, the old copy is returned, if
+        there is one, otherwise the lock is awaited. Unless the refresh is
+        forced, the cache is checked once more first, because the previous
+        caller could have refreshed the data just before. If the request
+        fails (including an open circuit) and the refresh is not forced, the
+        old copy is returned marked with the 'stale' key, if there is one.
+        A cached copy is revalidated with a conditional request: if API
+        answers 304 Not Modified, the copy is saved in cache with the
+        'checked_at' key (the time of the check, see BaseExpiryPolicy) and
+        returned.
+
+        Parameters
+        ----------
+        filename : str
+            Cache filename.
+        base : str
+            Base currency for comparison (three-letter currency code).
+        *symbols : str
+            A number of currencies for comparison with base one (three-letter
+            currency code for each)
+        force : bool
+            Whether to refresh the data even if it is not out of date.
+
+        Returns
+        -------
+        data : dict
+            The dict value of the JSON response.
+        """
+
+        cached = self.__get_from_cache(filename)
+        if not force and self.__is_fresh(filename, cached):
+            return cached
+        with self._cache_manager.refresh_lock(
+                filename, blocking=cached is None,
+                timeout=self.refresh_lock_timeout) as acquired:
+            if not acquired and cached is not None:
+                return cached
+            if acquired and not force:
+                cached = self.__get_from_cache(filename)
+                if self.__is_fresh(filename, cached):
+                    return cached
+            # Refreshes of missing and hot entries may use the reserve of the
+            # request budget, the others give way to them.
+            priority = cached is None or self._access_counter.is_hot(
+                (base.upper(), tuple(symbol.upper() for symbol in symbols)),
+                self.budget_hot_keys)
+            validators = cached.get("validators") \
+                if self._revalidate and cached is not None else None
+            try:
+                data = self.__send_request(base, *symbols, priority=priority,
+                                           validators=validators)
+            except (RuntimeError, OSError, ValueError) as error:
+                if force or cached is None:
+                    raise
+                self.logger.warning("Serving stale data of {}: {}".format(
+                    filename, error))
+                if self._metrics.enabled:
+                    self._metrics.increment(
+                        "exchange_rates_stale_served_total")
+                return dict(cached, stale=True)
+            if data is None:
+                if self._metrics.enabled:
+                    self._metrics.increment(
+                        "exchange_rates_not_modified_total")
+                # The check time is kept in the entry, so that the other
+                # clients of the cache see the copy as revalidated too.
+                data = dict(cached, checked_at=self._clock())
+            elif cached is not None and \
+                    data["timestamp"] == cached["timestamp"]:
+                # Unchanged data revalidates the copy as well (for example,
+                # while the provider is late with its update).
+                data["checked_at"] = self._clock()
+            self.__save_in_cache(filename, data)
+        return data
+
+    def start_background_refresh(self, grace=300.0, lead_time=60.0,
+                                 hot_keys=10, poll_interval=1.0):
+        """
+        Enables the stale-while-revalidate mode and starts a RefreshScheduler.
+
+        In this mode an entry which is out of date by no more than 'grace'
+        seconds is returned immediately and refreshed in the background, and
+        the 'hot_keys' most requested entries are refreshed 'lead_time'
+        seconds before they get out of date.
+
+        Parameters
+        ----------
+        grace : float
+            Time (in seconds) after expiration during which a stale entry is
+            still served.
+        lead_time : float
+            Time (in seconds) before expiration when hot entries are
+            refreshed.
+        hot_keys : int
+            The number of the most requested entries refreshed proactively.
+        poll_interval : float
+            Time (in seconds) between checks of hot entries.
+
+        Returns
+        -------
+        _refresh_scheduler : RefreshScheduler
+            Started scheduler (its get_stats method shows the refresh
+            activity).
+        """
+
+        self.stop_background_refresh()
+        self._refresh_scheduler = RefreshScheduler(
+            self, grace=grace, lead_time=lead_time, hot_keys=hot_keys,
+            poll_interval=poll_interval,
+            access_counter=self._access_counter).start()
+        return self._refresh_scheduler
+
+    def stop_background_refresh(self, wait=True):
+        """
+        Stops the RefreshScheduler and disables the stale-while-revalidate
+        mode.
+
+        Parameters
+        ----------
+        wait : bool
+            Whether to wait for the refresh in progress to finish.
+
+        Returns
+        -------
+        None
+        """
+
+        scheduler, self._refresh_scheduler = self._refresh_scheduler, None
+        if scheduler is not None:
+            scheduler.shutdown(wait=wait)
+
+    def close(self):
+        """
+        Stops the background refresh and releases the connection pool and
+        the threads of API requests (they are created again by the next
+        request). The cache is left as it is.
+
+        Returns
+        -------
+        None
+        """
+
+        self.stop_background_refresh()
+        self._api_manager.close()
+
+    def _refresh_entry(self, base: str, symbols: tuple):
+        """
+        Refreshes the cache entry of the base and symbols regardless of its
+        relevance (used by RefreshScheduler).
+        """
+
+        filename = self.__prepare_filename_for_cache(base=base,
+                                                     symbols=symbols)
+        self._single_flight.do(filename, self.__refresh, filename, base,
+                               *symbols, force=True)
+
+    def _get_expiration_time(self, base: str, symbols: tuple):
+        """
+        Returns the expiration time of the cache entry of the base and symbols
+        or None, if it is missing (used by RefreshScheduler).
+        """
+
+        filename = self.__prepare_filename_for_cache(base=base,
+                                                     symbols=symbols)
+        data = self.__get_from_cache(filename)
+        return self.__get_expiration_time(filename, data) \
+            if data is not None else None
+
+    def get_request_budget(self):
+        """
+        Returns the state of the request budget of the access key.
+
+        Returns
+        -------
+        remaining : dict or None
+            The month, the quota, the numbers of used and remaining requests
+            of the month and the tokens of the bucket (see
+            RequestBudget.get_remaining), None - requests are not limited.
+        """
+
+        if self._request_budget is None:
+            return None
+        return self._request_budget.get_remaining()
 
     def clear_cache(self, *symbols: str, base="EUR"):
         """
@@ -199,6 +1160,7 @@ class CurrencyClient:
 
         filename = self.__prepare_filename_for_cache(base=base,
                                                      symbols=symbols)
+        self._warm_entries.pop(filename, None)
         self._cache_manager.clear_cache(filename)
 
     def __prepare_filename_for_cache(self, base: str, symbols: tuple) -> str:
@@ -221,5 +1183,5 @@ class CurrencyClient:
         """
 
         symbols = [arg.upper() for arg in symbols]
-        return "{base}-{symbols}.json".format(base=base,
+        return "{base}-{symbols}.json".format(base=base.upper(),
                                               symbols=",".join(symbols))
@@ -0,0 +1,133 @@
+import threading
+
+
+class _Batch:
+    """Queries collected for one base and the outcome of their request."""
+
+    __slots__ = ("symbols_list", "full", "done", "results", "error")
+
+    def __init__(self):
+        self.symbols_list = []
+        self.full = threading.Event()
+        self.done = threading.Event()
+        self.results = None
+        self.error = None
+
+
+class MicroBatcher:
+    """
+    Merges concurrent queries for the same base into one call.
+
+    The first query of a base (the leader) opens a batch and waits 'window'
+    seconds or until the batch has 'max_batch_size' distinct symbols tuples,
+    the queries which come meanwhile join the batch. Then the leader closes
+    the batch and calls the function once with all its symbols tuples, the
+    other queries wait for it and take their part of the result (or its
+    exception). A query which comes after the batch is closed opens the next
+    one.
+
+    Attributes
+    ----------
+    _function : callable
+        function(base, symbols_list) -> list of (symbols, data) pairs.
+    _window : float
+        Time (in seconds) a batch is open.
+    _max_batch_size : int
+        The maximum number of distinct symbols tuples in a batch.
+
+    Methods
+    -------
+    do(base, symbols)
+        Returns the data for the base and symbols from the call of the batch.
+    get_stats()
+        Returns the numbers of queries and batches.
+    """
+
+    def __init__(self, function, window=0.005, max_batch_size=32):
+        """
+        Constructs all the necessary attributes for the MicroBatcher object.
+
+        Parameters
+        ----------
+        function : callable
+            function(base, symbols_list) -> list of (symbols, data) pairs for
+            every symbols tuple of the list.
+        window : float
+            Time (in seconds) a batch is open.
+        max_batch_size : int
+            The maximum number of distinct symbols tuples in a batch.
+        """
+
+        if window < 0 or max_batch_size < 1:
+            raise ValueError("window must not be negative and max_batch_size "
+                             "must be positive")
+        self._function = function
+        self._window = window
+        self._max_batch_size = max_batch_size
+        self._lock = threading.Lock()
+        self._batches = {}
+        self._stats = {"queries": 0, "batches": 0}
+
+    def do(self, base: str, symbols: tuple):
+        """
+        Returns the data for the base and symbols from the call of the batch
+        the query joins.
+
+        Parameters
+        ----------
+        base : str
+            Base currency (three-letter currency code).
+        symbols : tuple
+            Currency codes.
+
+        Returns
+        -------
+        data
+            The data of the symbols returned by the function.
+        """
+
+        with self._lock:
+            self._stats["queries"] += 1
+            batch = self._batches.get(base)
+            leader = batch is None
+            if leader:
+                batch = _Batch()
+                self._batches[base] = batch
+                self._stats["batches"] += 1
+            if symbols not in batch.symbols_list:
+                batch.symbols_list.append(symbols)
+                if len(batch.symbols_list) >= self._max_batch_size:
+                    # The next query of the base opens a new batch.
+                    del self._batches[base]
+                    batch.full.set()
+        if not leader:
+            batch.done.wait()
+            if batch.error is not None:
+                raise batch.error
+            return batch.results[symbols]
+        batch.full.wait(self._window)
+        with self._lock:
+            if self._batches.get(base) is batch:
+                del self._batches[base]
+        try:
+            batch.results = dict(self._function(base,
+                                                list(batch.symbols_list)))
+        except BaseException as error:
+            batch.error = error
+            raise
+        finally:
+            batch.done.set()
+        return batch.results[symbols]
+
+    def get_stats(self) -> dict:
+        """
+        Returns the numbers of queries and batches (calls of the function).
+
+        Returns
+        -------
+        stats : dict
+            The numbers of queries and batches.
+        """
+
+        with self._lock:
+            return dict(self._stats)
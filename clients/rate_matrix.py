@@ -0,0 +1,193 @@
+try:
+    import numpy
+except ImportError:  # numpy is an optional dependency of bulk conversion
+    numpy = None
+
+UNKNOWN_CODE_MODES = ("raise", "nan")
+_CODE_LENGTH = 3
+_LETTERS = 26
+
+
+class RateMatrix:
+    """
+    Cross-rate matrix of one full rates table, which converts whole arrays of
+    amounts with vectorized indexing.
+
+    matrix[i, j] is the rate of currency j against currency i, so an amount in
+    currency i is converted to currency j as amount * matrix[i, j]. The last
+    row and column belong to unknown currency codes and consist of NaN.
+
+    Attributes
+    ----------
+    base : str
+        Reference base currency of the rates table.
+    timestamp : float
+        The 'timestamp' parameter of the rates table.
+    codes : tuple
+        Currency codes of the rows and columns of the matrix.
+    _index : dict
+        Currency code -> row (column) of the matrix.
+    _lookup : numpy.ndarray
+        Dense table of integer keys of three-letter upper-case codes (see
+        _encode_codes) -> row of the matrix, -1 for unknown codes.
+    _matrix : numpy.ndarray
+        (len(codes) + 1) x (len(codes) + 1) array of cross rates.
+
+    Methods
+    -------
+    convert(amounts, from_codes, to_codes, unknown="raise")
+        Converts amounts from one currency to another row by row.
+    """
+
+    def __init__(self, table: dict):
+        """
+        Builds the matrix of cross rates of the rates table.
+
+        Parameters
+        ----------
+        table : dict
+            Full rates table response (with 'base', 'timestamp' and 'rates'
+            keys).
+
+        Raises
+        ------
+        ImportError
+            Raises if numpy is not installed.
+        """
+
+        if numpy is None:
+            raise ImportError("numpy is required for bulk conversion")
+        reference = table["base"]
+        rates = table["rates"]
+        self.base = reference
+        self.timestamp = table["timestamp"]
+        self.codes = tuple(sorted(set(rates) | {reference}))
+        self._index = {code: position
+                       for position, code in enumerate(self.codes)}
+        vector = numpy.array([1.0 if code == reference else rates[code]
+                              for code in self.codes], dtype=numpy.float64)
+        self._lookup = numpy.full(_LETTERS ** _CODE_LENGTH, -1,
+                                  dtype=numpy.intp)
+        for position, code in enumerate(self.codes):
+            key = _encode_code(code)
+            if key is not None:
+                self._lookup[key] = position
+        size = len(self.codes)
+        self._matrix = numpy.full((size + 1, size + 1), numpy.nan)
+        self._matrix[:size, :size] = vector[numpy.newaxis, :] / \
+            vector[:, numpy.newaxis]
+
+    def convert(self, amounts, from_codes, to_codes, unknown="raise"):
+        """
+        Converts amounts from one currency to another row by row.
+
+        Arguments are broadcast against each other, so one currency code can
+        be passed for all rows.
+
+        Parameters
+        ----------
+        amounts : array-like
+            Amounts (numpy array or any buffer-protocol sequence of numbers).
+        from_codes : array-like or str
+            Currencies of the amounts (three-letter currency codes).
+        to_codes : array-like or str
+            Currencies to convert the amounts to.
+        unknown : str
+            "raise" - raise an error for unknown currency codes, "nan" -
+            return NaN in their rows.
+
+        Returns
+        -------
+        converted : numpy.ndarray
+            Converted amounts (float64).
+
+        Raises
+        ------
+        ValueError
+            Raises if 'unknown' is not one of UNKNOWN_CODE_MODES.
+        RuntimeError
+            Raises if unknown is "raise" and some currency codes are missing
+            in the rates table.
+        """
+
+        if unknown not in UNKNOWN_CODE_MODES:
+            raise ValueError("unknown must be one of: {}".format(
+                ", ".join(UNKNOWN_CODE_MODES)))
+        amounts = numpy.asarray(amounts, dtype=numpy.float64)
+        missing = set()
+        from_positions = self._get_positions(from_codes, missing)
+        to_positions = self._get_positions(to_codes, missing)
+        if missing and unknown == "raise":
+            raise RuntimeError("Unknown currency codes for the rates table of "
+                               "{reference}: {codes}".format(
+                                   reference=self.base,
+                                   codes=", ".join(sorted(missing))))
+        return amounts * self._matrix[from_positions, to_positions]
+
+    def _get_positions(self, codes, missing: set):
+        codes = numpy.asarray(codes)
+        shape = codes.shape
+        codes = codes.reshape(-1)
+        encoded = _encode_codes(codes)
+        if encoded is None:
+            positions = numpy.empty(len(codes), dtype=numpy.intp)
+            unmatched = numpy.ones(len(codes), dtype=bool)
+        else:
+            keys, valid = encoded
+            positions = self._lookup[keys]
+            unmatched = ~valid | (positions < 0)
+        if unmatched.any():
+            # Lower-case, unknown and non-string codes are looked up once per
+            # distinct value.
+            distinct, inverse = numpy.unique(codes[unmatched],
+                                             return_inverse=True)
+            lookup = numpy.empty(len(distinct), dtype=numpy.intp)
+            for number, code in enumerate(distinct):
+                if isinstance(code, bytes):
+                    code = code.decode("ascii")
+                code = str(code).upper()
+                position = self._index.get(code)
+                if position is None:
+                    missing.add(code)
+                    position = len(self.codes)
+                lookup[number] = position
+            positions[unmatched] = lookup[inverse.reshape(-1)]
+        return positions.reshape(shape)
+
+
+def _encode_code(code: str):
+    if len(code) != _CODE_LENGTH or not all("A" <= character <= "Z"
+                                            for character in code):
+        return None
+    key = 0
+    for character in code:
+        key = key * _LETTERS + ord(character) - ord("A")
+    return key
+
+
+def _encode_codes(codes):
+    # Turns three-letter upper-case codes of fixed-width string arrays into
+    # keys of the dense lookup table, so the codes are matched with one
+    # gather instead of a sort or a search of strings. Returns the keys and
+    # the mask of the codes which could be encoded.
+    kind = codes.dtype.kind
+    if kind == "U":
+        char_type = numpy.uint32
+    elif kind == "S":
+        char_type = numpy.uint8
+    else:
+        return None
+    if codes.dtype.itemsize != _CODE_LENGTH * numpy.dtype(
+            char_type).itemsize:
+        return None
+    characters = numpy.ascontiguousarray(codes).view(char_type).reshape(
+        len(codes), _CODE_LENGTH)
+    keys = numpy.zeros(len(codes), dtype=numpy.intp)
+    valid = numpy.ones(len(codes), dtype=bool)
+    for number in range(_CODE_LENGTH):
+        letters = characters[:, number].astype(numpy.intp) - ord("A")
+        valid &= (letters >= 0) & (letters < _LETTERS)
+        keys *= _LETTERS
+        keys += letters
+    keys[~valid] = 0
+    return keys, valid
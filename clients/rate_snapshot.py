@@ -0,0 +1,163 @@
+from array import array
+from functools import lru_cache
+
+
+@lru_cache(maxsize=256)
+def _make_index(codes: tuple) -> dict:
+    # Snapshots of the same currencies share one index.
+    return {code: position for position, code in enumerate(codes)}
+
+
+class RateSnapshot:
+    """
+    Immutable result of CurrencyClient.get_currency.
+
+    Rates are kept in a compact float64 array with a shared code -> position
+    index, so a lookup of one currency is O(1) and a snapshot costs no dict of
+    float objects.
+
+    Attributes
+    ----------
+    base : str
+        Base currency of the rates.
+    timestamp : float
+        The 'timestamp' parameter of the response.
+    date : str
+        The 'date' parameter of the response.
+    from_cache : bool
+        True if the response was taken from cache, False - from API.
+    stale : bool
+        True if the response is an out-of-date cached copy served because
+        the request to API failed.
+    symbols : tuple
+        Currency codes of the rates.
+    rates : dict
+        A new dict of currency code -> rate.
+
+    Methods
+    -------
+    get(code, default=None)
+        Returns the rate of the currency or default.
+    from_response(data, from_cache)
+        Creates a snapshot of the dict value of a response.
+    """
+
+    __slots__ = ("_base", "_timestamp", "_date", "_from_cache", "_stale",
+                 "_codes", "_index", "_values")
+
+    def __init__(self, base: str, timestamp: float, date: str, rates,
+                 from_cache: bool, stale=False):
+        """
+        Constructs all the necessary attributes for the RateSnapshot object.
+
+        Parameters
+        ----------
+        base : str
+            Base currency of the rates.
+        timestamp : float
+            The 'timestamp' parameter of the response.
+        date : str
+            The 'date' parameter of the response.
+        rates : mapping
+            Currency code -> rate.
+        from_cache : bool
+            True if the response was taken from cache.
+        stale : bool
+            True if the response is an out-of-date cached copy.
+        """
+
+        codes = tuple(rates)
+        for name, value in (("_base", base), ("_timestamp", timestamp),
+                            ("_date", date), ("_from_cache", from_cache),
+                            ("_stale", stale), ("_codes", codes),
+                            ("_index", _make_index(codes)),
+                            ("_values", array("d", (rates[code]
+                                                    for code in codes)))):
+            object.__setattr__(self, name, value)
+
+    @classmethod
+    def from_response(cls, data: dict, from_cache: bool):
+        """
+        Creates a snapshot of the dict value of a response. A response
+        marked with the 'stale' key is an out-of-date cached copy.
+
+        Parameters
+        ----------
+        data : dict
+            The dict value of the response.
+        from_cache : bool
+            True if the response was taken from cache.
+
+        Returns
+        -------
+        snapshot : RateSnapshot
+        """
+
+        stale = data.get("stale", False)
+        return cls(data["base"], data["timestamp"], data.get("date"),
+                   data["rates"], from_cache or stale, stale)
+
+    @property
+    def base(self) -> str:
+        return self._base
+
+    @property
+    def timestamp(self) -> float:
+        return self._timestamp
+
+    @property
+    def date(self) -> str:
+        return self._date
+
+    @property
+    def from_cache(self) -> bool:
+        return self._from_cache
+
+    @property
+    def stale(self) -> bool:
+        return self._stale
+
+    @property
+    def symbols(self) -> tuple:
+        return self._codes
+
+    @property
+    def rates(self) -> dict:
+        return dict(zip(self._codes, self._values))
+
+    def get(self, code: str, default=None):
+        position = self._index.get(code)
+        return default if position is None else self._values[position]
+
+    def __getitem__(self, code: str) -> float:
+        return self._values[self._index[code]]
+
+    def __contains__(self, code) -> bool:
+        return code in self._index
+
+    def __iter__(self):
+        return iter(self._codes)
+
+    def __len__(self) -> int:
+        return len(self._codes)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, RateSnapshot):
+            return NotImplemented
+        return (self._base, self._timestamp, self._date, self._codes,
+                self._values) == (other._base, other._timestamp, other._date,
+                                  other._codes, other._values)
+
+    __hash__ = None
+
+    def __setattr__(self, name, value):
+        raise AttributeError("RateSnapshot is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("RateSnapshot is immutable")
+
+    def __repr__(self) -> str:
+        return "RateSnapshot(base={!r}, timestamp={!r}, from_cache={!r}, " \
+               "stale={!r}, rates={!r})".format(
+                   self._base, self._timestamp, self._from_cache, self._stale,
+                   self.rates)
@@ -0,0 +1,47 @@
+def derive_rates(table: dict, base: str, symbols) -> dict:
+    """
+    Derives the response for any base currency and symbols from the full
+    rates table of one reference base (cross-rate triangulation).
+
+    The rate of 'symbol' against 'base' is table[symbol] / table[base], where
+    both rates are against the reference base of the table.
+
+    Parameters
+    ----------
+    table : dict
+        Full rates table response (with 'base' and 'rates' keys).
+    base : str
+        Base currency for comparison (three-letter currency code).
+    symbols : iterable of str
+        Currencies for comparison with base one, empty - all currencies of the
+        table.
+
+    Returns
+    -------
+    data : dict
+        A response of the same structure as the one of the API.
+
+    Raises
+    ------
+    RuntimeError
+        Raises if the base or one of the symbols is missing in the table.
+    """
+
+    reference = table["base"]
+    rates = table["rates"]
+    base = base.upper()
+    symbols = [symbol.upper() for symbol in symbols] or list(rates)
+    unknown = [code for code in [base] + symbols
+               if code != reference and code not in rates]
+    if unknown:
+        raise RuntimeError("Unknown currency codes for the rates table of "
+                           "{reference}: {codes}".format(
+                               reference=reference, codes=", ".join(unknown)))
+    base_rate = 1.0 if base == reference else rates[base]
+    data = dict(table)
+    # Validators belong to the request of the table.
+    data.pop("validators", None)
+    data["base"] = base
+    data["rates"] = {symbol: (1.0 if symbol == reference else rates[symbol]) /
+                     base_rate for symbol in symbols}
+    return data
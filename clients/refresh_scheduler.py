@@ -0,0 +1,246 @@
+import logging
+import queue
+import threading
+import time
+
+from clients.access_counter import AccessCounter
+
+
+class RefreshScheduler:
+    """
+    Background refresher of CurrencyClient cache entries.
+
+    The scheduler refreshes entries submitted by the client (stale entries
+    served within the grace window) and proactively refreshes the hottest
+    keys shortly before they expire. Refreshes are done by one worker thread,
+    a key is queued at most once at a time.
+
+    Attributes
+    ----------
+    logger : class attribute of Logger class
+        An attribute of Logger class for logging information.
+    _client : CurrencyClient
+        Client which entries are refreshed.
+    _grace : float
+        Time (in seconds) after expiration during which a stale entry is
+        still served while it is refreshed.
+    _lead_time : float
+        Time (in seconds) before expiration when hot keys are refreshed.
+    _hot_keys : int
+        The number of the most accessed keys refreshed proactively.
+    _poll_interval : float
+        Time (in seconds) between checks of hot keys.
+    _access_counter : instance attribute of AccessCounter class
+        Decaying access counters of (base, symbols) keys.
+    _pending : set
+        Keys waiting in the queue or being refreshed.
+    _last_refresh : dict
+        (base, symbols) -> time of the last refresh.
+    _backed_off : dict
+        (base, symbols) -> expiration time which the last refresh of the key
+        left within the lead time, the key is not refreshed proactively
+        until its expiration time moves.
+    _stats : dict
+        Counters of the refresh activity.
+
+    Methods
+    -------
+    start()
+        Starts the worker and the scheduler threads.
+    shutdown(wait=True)
+        Stops the threads, pending refreshes are dropped.
+    get_grace()
+        Returns the grace window in seconds.
+    submit(base, symbols, proactive=False)
+        Queues a refresh of the key.
+    get_stats()
+        Returns counters of the refresh activity.
+    """
+
+    logger = logging.getLogger("RefreshScheduler")
+
+    _STOP = object()
+
+    def __init__(self, client, grace=300.0, lead_time=60.0, hot_keys=10,
+                 poll_interval=1.0, access_counter=None):
+        """
+        Constructs all the necessary attributes for the RefreshScheduler
+        object.
+
+        Parameters
+        ----------
+        client : CurrencyClient
+            Client which entries are refreshed.
+        grace : float
+            Time (in seconds) after expiration during which a stale entry is
+            still served while it is refreshed.
+        lead_time : float
+            Time (in seconds) before expiration when hot keys are refreshed.
+        hot_keys : int
+            The number of the most accessed keys refreshed proactively.
+        poll_interval : float
+            Time (in seconds) between checks of hot keys.
+        access_counter : AccessCounter, optional
+            Access counters to find hot keys with, a new AccessCounter with
+            the half-life of poll_interval by default.
+        """
+
+        self._client = client
+        self._grace = grace
+        self._lead_time = lead_time
+        self._hot_keys = hot_keys
+        self._poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._access_counter = access_counter if access_counter is not None \
+            else AccessCounter(half_life=poll_interval)
+        self._pending = set()
+        self._last_refresh = {}
+        self._backed_off = {}
+        self._queue = queue.Queue()
+        self._stopped = threading.Event()
+        self._threads = []
+        self._stats = {"submitted": 0, "proactive": 0, "refreshed": 0,
+                       "failed": 0, "backed_off": 0}
+
+    def start(self):
+        """
+        Starts the worker and the scheduler threads.
+
+        Returns
+        -------
+        self : RefreshScheduler
+        """
+
+        if self._threads:
+            return self
+        self._threads = [
+            threading.Thread(target=self._work, name="rates-refresh-worker",
+                             daemon=True),
+            threading.Thread(target=self._schedule,
+                             name="rates-refresh-scheduler", daemon=True)]
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def shutdown(self, wait=True):
+        """
+        Stops the threads, pending refreshes are dropped.
+
+        Parameters
+        ----------
+        wait : bool
+            Whether to wait for the refresh in progress to finish.
+
+        Returns
+        -------
+        None
+        """
+
+        self._stopped.set()
+        self._queue.put(self._STOP)
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+    def get_grace(self) -> float:
+        return self._grace
+
+    def submit(self, base: str, symbols: tuple, proactive=False):
+        """
+        Queues a refresh of the key (base, symbols), if it is not queued yet.
+
+        Parameters
+        ----------
+        base : str
+            Base currency of the key.
+        symbols : tuple
+            Symbols of the key.
+        proactive : bool
+            True if the refresh is scheduled before expiration.
+
+        Returns
+        -------
+        None
+        """
+
+        key = (base, symbols)
+        with self._lock:
+            if self._stopped.is_set() or key in self._pending:
+                return
+            self._pending.add(key)
+            self._stats["proactive" if proactive else "submitted"] += 1
+        self._queue.put(key)
+
+    def get_stats(self) -> dict:
+        """
+        Returns counters of the refresh activity.
+
+        Returns
+        -------
+        stats : dict
+            The numbers of submitted (stale) and proactive refreshes,
+            successful and failed refreshes, refreshes which did not move the
+            expiration time out of the lead time (backed off) and pending
+            keys.
+        """
+
+        with self._lock:
+            stats = dict(self._stats)
+            stats["pending"] = len(self._pending)
+        return stats
+
+    def _work(self):
+        while True:
+            key = self._queue.get()
+            if key is self._STOP or self._stopped.is_set():
+                return
+            try:
+                self._client._refresh_entry(*key)
+            except Exception as error:
+                self.logger.warning("Refresh of {} failed: {}".format(
+                    key, error))
+                outcome = "failed"
+            else:
+                self.logger.info("Refreshed {}".format(key))
+                outcome = "refreshed"
+            expires_at = self.__get_expiration_time(key) \
+                if outcome == "refreshed" else None
+            with self._lock:
+                self._pending.discard(key)
+                now = time.time()
+                self._last_refresh[key] = now
+                self._stats[outcome] += 1
+                # The data of the provider has not changed (or the interval
+                # is shorter than the lead time): refreshing the key again
+                # every lead time would only burn requests.
+                if expires_at is not None and \
+                        expires_at - now <= self._lead_time:
+                    self._backed_off[key] = expires_at
+                    self._stats["backed_off"] += 1
+                else:
+                    self._backed_off.pop(key, None)
+
+    def _schedule(self):
+        while not self._stopped.wait(self._poll_interval):
+            hot = self._access_counter.get_top(self._hot_keys)
+            now = time.time()
+            for key in hot:
+                if now - self._last_refresh.get(key, 0.0) < self._lead_time:
+                    continue
+                expires_at = self.__get_expiration_time(key)
+                with self._lock:
+                    if key in self._backed_off:
+                        if self._backed_off[key] == expires_at:
+                            continue
+                        del self._backed_off[key]
+                if expires_at is not None and \
+                        expires_at - now <= self._lead_time:
+                    self.submit(*key, proactive=True)
+
+    def __get_expiration_time(self, key: tuple):
+        try:
+            return self._client._get_expiration_time(*key)
+        except Exception as error:
+            self.logger.warning("Expiration check of {} failed: {}".format(
+                key, error))
+            return None
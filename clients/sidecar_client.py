@@ -0,0 +1,234 @@
+import datetime
+import itertools
+import socket
+import threading
+
+from clients.sidecar_protocol import OK, decode_error, decode_snapshot, \
+    decode_time_series, encode_frame, receive_frame
+
+
+class SidecarCurrencyClient:
+    """
+    Thin client of the rate sidecar (see RateSidecarServer), which drops in
+    for CurrencyClient in worker processes: lookups are sent to the sidecar
+    over a Unix domain socket, so the workers of the host share one client,
+    one cache and one refresh cycle. The settings are the ones of the client
+    of the sidecar, set_interval changes them for all workers.
+
+    The client keeps one connection per thread and reconnects once if the
+    connection is broken (all operations are safe to repeat).
+
+    Attributes
+    ----------
+    _socket_path : str
+        Full os path of the Unix domain socket of the sidecar.
+    _timeout : float or None
+        Timeout (in seconds) of socket operations, None - no limit.
+    _rate_matrix : instance attribute of RateMatrix class or None
+        Cross-rate matrix of the last rates table used by convert.
+
+    Methods
+    -------
+    get_currency(*symbols, base="EUR")
+        Same as CurrencyClient.get_currency.
+    get_currencies(queries, max_workers=8)
+        Same as CurrencyClient.get_currencies.
+    get_historical_currency(date, *symbols, base="EUR")
+        Same as CurrencyClient.get_historical_currency.
+    get_time_series(start_date, end_date, *symbols, base="EUR")
+        Same as CurrencyClient.get_time_series.
+    set_interval(days=0, seconds=0, microseconds=0, milliseconds=0,
+    minutes=0, hours=0, weeks=0)
+        Same as CurrencyClient.set_interval.
+    get_interval()
+        Same as CurrencyClient.get_interval.
+    convert(amounts, from_codes, to_codes, unknown="raise")
+        Same as CurrencyClient.convert.
+    clear_cache(*symbols, base="EUR")
+        Same as CurrencyClient.clear_cache.
+    get_request_budget()
+        Same as CurrencyClient.get_request_budget.
+    ping()
+        Checks that the sidecar is serving.
+    close()
+        Closes the connections of the client.
+    """
+
+    def __init__(self, socket_path: str, timeout=None):
+        """
+        Constructs all the necessary attributes for the SidecarCurrencyClient
+        object.
+
+        Parameters
+        ----------
+        socket_path : str
+            Full os path of the Unix domain socket of the sidecar.
+        timeout : float, optional
+            Timeout (in seconds) of socket operations.
+        """
+
+        self._socket_path = socket_path
+        self._timeout = timeout
+        self._rate_matrix = None
+        self._ids = itertools.count()
+        self._local = threading.local()
+        self._connections = set()
+        self._lock = threading.Lock()
+
+    def get_currency(self, *symbols: str, base="EUR"):
+        return decode_snapshot(self.__call("get_currency", base,
+                                           list(symbols)))
+
+    def get_currencies(self, queries, max_workers=8) -> list:
+        queries = [[base, list(symbols)] for base, symbols in queries]
+        return [decode_snapshot(payload) for payload in
+                self.__call("get_currencies", queries, max_workers)]
+
+    def get_historical_currency(self, date, *symbols: str, base="EUR"):
+        if not isinstance(date, str):
+            date = date.strftime("%Y-%m-%d")
+        return decode_snapshot(self.__call("get_historical_currency", date,
+                                           base, list(symbols)))
+
+    def get_time_series(self, start_date, end_date, *symbols: str,
+                        base="EUR"):
+        if not isinstance(start_date, str):
+            start_date = start_date.strftime("%Y-%m-%d")
+        if not isinstance(end_date, str):
+            end_date = end_date.strftime("%Y-%m-%d")
+        return decode_time_series(self.__call(
+            "get_time_series", start_date, end_date, base, list(symbols)))
+
+    def set_interval(self, days=0, seconds=0, microseconds=0, milliseconds=0,
+                     minutes=0, hours=0, weeks=0):
+        interval = datetime.timedelta(days, seconds, microseconds,
+                                      milliseconds, minutes, hours, weeks)
+        self.__call("set_interval", interval.total_seconds())
+
+    def get_interval(self) -> datetime.timedelta:
+        return datetime.timedelta(seconds=self.__call("get_interval"))
+
+    def convert(self, amounts, from_codes, to_codes, unknown="raise"):
+        """
+        Converts arrays of amounts between currencies row by row with the
+        cross-rate matrix of the full rates table of the sidecar (requires
+        numpy, see CurrencyClient.convert).
+
+        Parameters
+        ----------
+        amounts : array-like
+            Amounts (numpy array or any buffer-protocol sequence of numbers).
+        from_codes : array-like or str
+            Currencies of the amounts (three-letter currency codes).
+        to_codes : array-like or str
+            Currencies to convert the amounts to.
+        unknown : str
+            "raise" - raise an error for unknown currency codes, "nan" -
+            return NaN in their rows.
+
+        Returns
+        -------
+        converted : numpy.ndarray
+            Converted amounts (float64).
+        """
+
+        table = self.get_currency()
+        matrix = self._rate_matrix
+        if matrix is None or matrix.base != table.base or \
+                matrix.timestamp != table.timestamp:
+            # Deferred, importing numpy takes about 0.1 s.
+            from clients.rate_matrix import RateMatrix
+            matrix = RateMatrix({"base": table.base,
+                                 "timestamp": table.timestamp,
+                                 "rates": table.rates})
+            self._rate_matrix = matrix
+        return matrix.convert(amounts, from_codes, to_codes, unknown=unknown)
+
+    def clear_cache(self, *symbols: str, base="EUR"):
+        self.__call("clear_cache", base, list(symbols))
+
+    def get_request_budget(self):
+        return self.__call("get_request_budget")
+
+    def ping(self) -> bool:
+        return self.__call("ping")
+
+    def close(self):
+        """
+        Closes the connections of the client (of all threads).
+
+        Returns
+        -------
+        None
+        """
+
+        with self._lock:
+            connections, self._connections = self._connections, set()
+        for connection in connections:
+            connection.close()
+        self._local = threading.local()
+
+    def __call(self, operation: str, *arguments):
+        """
+        Sends a request to the sidecar and returns the result.
+
+        Parameters
+        ----------
+        operation : str
+            Name of the operation.
+        *arguments
+            JSON-serializable arguments of the operation.
+
+        Returns
+        -------
+        result
+            The payload of the response.
+
+        Raises
+        ------
+        RuntimeError, ValueError
+            The error of the operation raised by the sidecar.
+        ConnectionError
+            Raises if the sidecar cannot be reached.
+        """
+
+        request_id = next(self._ids)
+        frame = encode_frame([request_id, operation, list(arguments)])
+        for attempt in range(2):
+            connection = self.__get_connection()
+            try:
+                connection.sendall(frame)
+                response_id, status, payload = receive_frame(connection)
+                break
+            except OSError:
+                self.__drop_connection(connection)
+                if attempt:
+                    raise
+        if response_id != request_id:
+            self.__drop_connection(connection)
+            raise ConnectionError("Unexpected response {} to request "
+                                  "{}".format(response_id, request_id))
+        if status != OK:
+            raise decode_error(payload)
+        return payload
+
+    def __get_connection(self) -> socket.socket:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            connection.settimeout(self._timeout)
+            try:
+                connection.connect(self._socket_path)
+            except OSError:
+                connection.close()
+                raise
+            self._local.connection = connection
+            with self._lock:
+                self._connections.add(connection)
+        return connection
+
+    def __drop_connection(self, connection: socket.socket):
+        self._local.connection = None
+        with self._lock:
+            self._connections.discard(connection)
+        connection.close()
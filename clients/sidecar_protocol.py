@@ -0,0 +1,104 @@
+"""
+Framing of the rate-sidecar protocol.
+
+Every message is a frame: a 4-byte big-endian length followed by a compact
+JSON array of that length. A request is [id, operation, arguments], a
+response is [id, status, payload], where status is OK and payload is the
+result or status is ERROR and payload is [error type name, message]. A
+connection may carry several requests at a time, responses are matched by
+id.
+"""
+import datetime
+import json
+import struct
+from array import array
+
+from apies.base_api.request_budget import QuotaExceededError
+from apies.base_api.resilience import CircuitOpenError, DeadlineExceededError
+from clients.rate_snapshot import RateSnapshot
+from clients.time_series import TimeSeries
+
+HEADER = struct.Struct(">I")
+MAX_FRAME_SIZE = 16 * 1024 * 1024
+OK = 0
+ERROR = 1
+ERRORS = {error.__name__: error for error in (
+    RuntimeError, ValueError, KeyError, FileNotFoundError, CircuitOpenError,
+    DeadlineExceededError, QuotaExceededError)}
+
+
+def encode_frame(message) -> bytes:
+    body = json.dumps(message, separators=(",", ":")).encode("utf-8")
+    return HEADER.pack(len(body)) + body
+
+
+def decode_body(body: bytes):
+    return json.loads(body.decode("utf-8"))
+
+
+def receive_frame(connection):
+    """
+    Receives one frame from a blocking socket.
+
+    Parameters
+    ----------
+    connection : socket.socket
+        Connected socket.
+
+    Returns
+    -------
+    message
+        The decoded JSON array.
+
+    Raises
+    ------
+    ConnectionError
+        Raises if the connection is closed in the middle of the frame or the
+        frame is too large.
+    """
+
+    length, = HEADER.unpack(_receive_exactly(connection, HEADER.size))
+    if length > MAX_FRAME_SIZE:
+        raise ConnectionError("Frame of {} bytes is too large".format(length))
+    return decode_body(_receive_exactly(connection, length))
+
+
+def _receive_exactly(connection, size: int) -> bytes:
+    chunks = []
+    while size:
+        chunk = connection.recv(min(size, 65536))
+        if not chunk:
+            raise ConnectionError("The sidecar closed the connection")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def encode_snapshot(snapshot: RateSnapshot) -> list:
+    return [snapshot.base, snapshot.timestamp, snapshot.date, snapshot.rates,
+            snapshot.from_cache, snapshot.stale]
+
+
+def decode_snapshot(payload: list) -> RateSnapshot:
+    return RateSnapshot(*payload)
+
+
+def encode_time_series(series: TimeSeries) -> list:
+    # NaN (no rate) is written as the NaN token which json reads back.
+    return [series.base, series.start_date.isoformat(), len(series),
+            {code: list(series[code]) for code in series}]
+
+
+def decode_time_series(payload: list) -> TimeSeries:
+    base, start_date, length, columns = payload
+    return TimeSeries(
+        base, datetime.datetime.strptime(start_date, "%Y-%m-%d").date(),
+        length, {code: array("d", values) for code, values in columns.items()})
+
+
+def decode_error(payload: list) -> Exception:
+    name, message = payload
+    error = ERRORS.get(name)
+    if error is None:
+        return RuntimeError("{}: {}".format(name, message))
+    return error(message)
@@ -0,0 +1,353 @@
+"""
+Rate sidecar: one process which owns a CurrencyClient and its cache and
+serves worker processes of the host over a Unix domain socket.
+
+Usage: python -m clients.sidecar_server SOCKET_PATH [--minutes MINUTES]
+[--rate-table-base BASE] [--workers WORKERS] [--max-in-flight N]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import socket
+import stat
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from clients.currency_client import CurrencyClient
+from clients.sidecar_protocol import ERROR, HEADER, MAX_FRAME_SIZE, OK, \
+    decode_body, encode_frame, encode_snapshot, encode_time_series
+
+
+class RateSidecarServer:
+    """
+    Server of the rate sidecar: serves CurrencyClient lookups to
+    SidecarCurrencyClient objects of other processes over a Unix domain
+    socket (see clients.sidecar_protocol).
+
+    Connections are served by an asyncio event loop in a background thread,
+    so thousands of idle and busy connections cost no thread each. Lookups
+    run in a thread pool. A connection may send several requests at a time,
+    at most 'max_in_flight' of them are served (the next frames are not read
+    until one of them is answered, so a client which does not read its
+    responses cannot grow the queue) and every response is written as soon
+    as it is ready. Concurrent misses of all workers are coalesced by the
+    one client (see SingleFlight and MicroBatcher), so the host makes one
+    refresh cycle and keeps one copy of the data.
+
+    Attributes
+    ----------
+    logger : class attribute of Logger class
+        An attribute of Logger class for logging information.
+    _socket_path : str
+        Full os path of the Unix domain socket.
+    _client : CurrencyClient
+        The client which serves the lookups.
+    _owns_client : bool
+        True if the client was created by the server (in that case 'stop'
+        closes it).
+    _max_in_flight : int
+        The maximum number of requests of one connection served at a time.
+    _executor : concurrent.futures.ThreadPoolExecutor
+        Pool of threads which run the lookups.
+
+    Methods
+    -------
+    start()
+        Starts serving in a background thread.
+    stop()
+        Stops the server and removes the socket file.
+    serve_forever()
+        Serves until the process is interrupted.
+    get_stats()
+        Returns the numbers of connections and requests.
+    """
+
+    logger = logging.getLogger("RateSidecarServer")
+
+    def __init__(self, socket_path: str, client=None, max_workers=32,
+                 max_in_flight=16):
+        """
+        Constructs all the necessary attributes for the RateSidecarServer
+        object.
+
+        Parameters
+        ----------
+        socket_path : str
+            Full os path of the Unix domain socket.
+        client : CurrencyClient, optional
+            The client which serves the lookups, CurrencyClient(minutes=60)
+            by default.
+        max_workers : int
+            The maximum number of lookups run at a time.
+        max_in_flight : int
+            The maximum number of requests of one connection served at a
+            time.
+        """
+
+        self._socket_path = socket_path
+        self._owns_client = client is None
+        self._client = client if client is not None else \
+            CurrencyClient(minutes=60)
+        self._max_in_flight = max_in_flight
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._operations = {
+            "ping": lambda: True,
+            "get_currency": self.__get_currency,
+            "get_currencies": self.__get_currencies,
+            "get_historical_currency": self.__get_historical_currency,
+            "get_time_series": self.__get_time_series,
+            "set_interval": self.__set_interval,
+            "get_interval": self.__get_interval,
+            "clear_cache": self.__clear_cache,
+            "get_request_budget": self._client.get_request_budget}
+        self._stats = {"connections": 0, "open_connections": 0,
+                       "requests": 0, "errors": 0}
+        self._connections = {}
+        self._loop = None
+        self._server = None
+        self._thread = None
+        self._start_error = None
+
+    def start(self):
+        """
+        Starts serving in a background thread.
+
+        Returns
+        -------
+        self : RateSidecarServer
+
+        Raises
+        ------
+        RuntimeError
+            Raises if another server is listening on the socket.
+        """
+
+        self.__remove_stale_socket()
+        started = threading.Event()
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.__run, args=(started,),
+                                        name="rate-sidecar", daemon=True)
+        self._thread.start()
+        started.wait()
+        if self._start_error is not None:
+            self._thread.join()
+            raise self._start_error
+        return self
+
+    def stop(self):
+        """
+        Stops the server, waits for the lookups in progress and removes the
+        socket file. The client created by the server is closed.
+
+        Returns
+        -------
+        None
+        """
+
+        if self._thread is None:
+            return
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._thread = None
+        self._executor.shutdown(wait=True)
+        if self._owns_client:
+            self._client.close()
+        try:
+            os.remove(self._socket_path)
+        except FileNotFoundError:
+            pass
+
+    def serve_forever(self):
+        """
+        Serves until the process is interrupted (KeyboardInterrupt).
+
+        Returns
+        -------
+        None
+        """
+
+        self.start()
+        self.logger.info("Serving on {}".format(self._socket_path))
+        try:
+            self._thread.join()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    def get_stats(self) -> dict:
+        """
+        Returns the numbers of accepted and open connections, served requests
+        and requests which failed.
+
+        Returns
+        -------
+        stats : dict
+            Counters of the server.
+        """
+
+        return dict(self._stats)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def __run(self, started: threading.Event):
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._server = self._loop.run_until_complete(
+                asyncio.start_unix_server(self.__serve,
+                                          path=self._socket_path))
+        except OSError as error:
+            self._start_error = error
+            self._loop.close()
+            started.set()
+            return
+        started.set()
+        try:
+            self._loop.run_forever()
+        finally:
+            self._server.close()
+            # Closed connections end their handlers, which wait for the
+            # lookups in progress.
+            for writer in self._connections:
+                writer.close()
+            if self._connections:
+                self._loop.run_until_complete(
+                    asyncio.wait(list(self._connections.values())))
+            self._loop.run_until_complete(self._server.wait_closed())
+            self._loop.close()
+
+    def __remove_stale_socket(self):
+        # A socket file left by a crashed server is removed, a live one is
+        # not taken over.
+        try:
+            mode = os.stat(self._socket_path).st_mode
+        except FileNotFoundError:
+            return
+        if not stat.S_ISSOCK(mode):
+            raise RuntimeError("{} is not a socket".format(self._socket_path))
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(self._socket_path)
+        except ConnectionRefusedError:
+            os.remove(self._socket_path)
+            return
+        finally:
+            probe.close()
+        raise RuntimeError("Another sidecar is listening on {}".format(
+            self._socket_path))
+
+    async def __serve(self, reader, writer):
+        self._stats["connections"] += 1
+        self._stats["open_connections"] += 1
+        closed = self._loop.create_future()
+        self._connections[writer] = closed
+        write_lock = asyncio.Lock()
+        in_flight = asyncio.Semaphore(self._max_in_flight)
+        tasks = set()
+        try:
+            while True:
+                # Back-pressure: a client which pipelines requests without
+                # reading the responses waits in its socket buffers.
+                await in_flight.acquire()
+                length, = HEADER.unpack(await reader.readexactly(HEADER.size))
+                if length > MAX_FRAME_SIZE:
+                    self.logger.warning("Dropped a connection which sent a "
+                                        "frame of {} bytes".format(length))
+                    break
+                body = await reader.readexactly(length)
+                task = asyncio.ensure_future(
+                    self.__respond(body, writer, write_lock))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+                task.add_done_callback(lambda _: in_flight.release())
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            if tasks:
+                await asyncio.wait(tasks)
+            writer.close()
+            del self._connections[writer]
+            closed.set_result(None)
+            self._stats["open_connections"] -= 1
+
+    async def __respond(self, body: bytes, writer, write_lock):
+        self._stats["requests"] += 1
+        request_id = None
+        try:
+            request_id, operation, arguments = decode_body(body)
+            function = self._operations.get(operation)
+            if function is None:
+                raise ValueError("Unknown operation {!r}".format(operation))
+            result = await self._loop.run_in_executor(
+                self._executor, lambda: function(*arguments))
+            response = [request_id, OK, result]
+        except Exception as error:
+            self._stats["errors"] += 1
+            response = [request_id, ERROR, [type(error).__name__,
+                                            str(error)]]
+        async with write_lock:
+            if writer.transport.is_closing():
+                return
+            writer.write(encode_frame(response))
+            try:
+                await writer.drain()
+            except ConnectionError:
+                pass
+
+    def __get_currency(self, base: str, symbols: list) -> list:
+        return encode_snapshot(self._client.get_currency(*symbols, base=base))
+
+    def __get_currencies(self, queries: list, max_workers: int) -> list:
+        return [encode_snapshot(snapshot) for snapshot in
+                self._client.get_currencies(queries, max_workers=max_workers)]
+
+    def __get_historical_currency(self, date: str, base: str,
+                                  symbols: list) -> list:
+        return encode_snapshot(self._client.get_historical_currency(
+            date, *symbols, base=base))
+
+    def __get_time_series(self, start_date: str, end_date: str, base: str,
+                          symbols: list) -> list:
+        return encode_time_series(self._client.get_time_series(
+            start_date, end_date, *symbols, base=base))
+
+    def __set_interval(self, seconds: float):
+        self._client.set_interval(seconds=seconds)
+
+    def __get_interval(self) -> float:
+        return self._client.get_interval().total_seconds()
+
+    def __clear_cache(self, base: str, symbols: list):
+        self._client.clear_cache(*symbols, base=base)
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(
+        description="Serves exchange rates to worker processes of the host "
+                    "over a Unix domain socket.")
+    parser.add_argument("socket_path")
+    parser.add_argument("--minutes", type=int, default=60,
+                        help="interval of requests to API")
+    parser.add_argument("--rate-table-base",
+                        help="reference base of the rate-table mode")
+    parser.add_argument("--workers", type=int, default=32,
+                        help="the maximum number of lookups run at a time")
+    parser.add_argument("--max-in-flight", type=int, default=16,
+                        help="the maximum number of requests of one "
+                             "connection served at a time")
+    arguments = parser.parse_args(arguments)
+    logging.basicConfig(level=logging.WARNING)
+    client = CurrencyClient(minutes=arguments.minutes,
+                            rate_table_base=arguments.rate_table_base)
+    RateSidecarServer(arguments.socket_path, client,
+                      max_workers=arguments.workers,
+                      max_in_flight=arguments.max_in_flight).serve_forever()
+
+
+if __name__ == "__main__":
+    main()
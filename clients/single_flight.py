@@ -0,0 +1,72 @@
+import threading
+
+
+class _Call:
+    """An in-flight call and its outcome."""
+
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key into one call.
+
+    The first caller of a key (the leader) runs the function, the callers
+    which come while it is in flight wait for it and share its result (or its
+    exception).
+
+    Methods
+    -------
+    do(key, function, *args, **kwargs)
+        Runs the function once for all concurrent callers of the key.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, function, *args, **kwargs):
+        """
+        Runs the function once for all concurrent callers of the key.
+
+        Parameters
+        ----------
+        key : hashable
+            Key of the call.
+        function : callable
+            Function to call.
+        *args, **kwargs
+            Arguments of the function.
+
+        Returns
+        -------
+        result
+            The result of the function (of the leader's call).
+        """
+
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = function(*args, **kwargs)
+        except BaseException as error:
+            call.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+        return call.result
@@ -0,0 +1,123 @@
+import datetime
+
+
+class TimeSeries:
+    """
+    Result of CurrencyClient.get_time_series: daily rates of a range of dates
+    as one array per currency.
+
+    Rates are kept as the arrays read from the time-series store, so a range
+    of any length costs one array of floats per currency and no per-day
+    objects. Missing rates are NaN.
+
+    Attributes
+    ----------
+    base : str
+        Base currency of the rates.
+    start_date : datetime.date
+        The first date of the range.
+    end_date : datetime.date
+        The last date of the range (inclusive).
+    symbols : tuple
+        Currency codes of the rates.
+    dates : list
+        Dates of the range (formed on access).
+
+    Methods
+    -------
+    get(code, default=None)
+        Returns the array of rates of the currency or default.
+    get_rates(date)
+        Returns the dict of rates of one date.
+    """
+
+    __slots__ = ("_base", "_start_date", "_length", "_columns")
+
+    def __init__(self, base: str, start_date: datetime.date, length: int,
+                 columns: dict):
+        """
+        Constructs all the necessary attributes for the TimeSeries object.
+
+        Parameters
+        ----------
+        base : str
+            Base currency of the rates.
+        start_date : datetime.date
+            The first date of the range.
+        length : int
+            The number of days in the range.
+        columns : dict
+            Currency code -> array of rates (one float per day).
+        """
+
+        self._base = base
+        self._start_date = start_date
+        self._length = length
+        self._columns = columns
+
+    @property
+    def base(self) -> str:
+        return self._base
+
+    @property
+    def start_date(self) -> datetime.date:
+        return self._start_date
+
+    @property
+    def end_date(self) -> datetime.date:
+        return self._start_date + datetime.timedelta(self._length - 1)
+
+    @property
+    def symbols(self) -> tuple:
+        return tuple(self._columns)
+
+    @property
+    def dates(self) -> list:
+        return [self._start_date + datetime.timedelta(offset)
+                for offset in range(self._length)]
+
+    def get(self, code: str, default=None):
+        return self._columns.get(code.upper(), default)
+
+    def get_rates(self, date: datetime.date) -> dict:
+        """
+        Returns the dict of rates of one date.
+
+        Parameters
+        ----------
+        date : datetime.date
+            A date of the range.
+
+        Returns
+        -------
+        rates : dict
+            Currency code -> rate.
+
+        Raises
+        ------
+        KeyError
+            Raises if the date is out of the range.
+        """
+
+        offset = (date - self._start_date).days
+        if not 0 <= offset < self._length:
+            raise KeyError(date)
+        return {code: values[offset]
+                for code, values in self._columns.items()}
+
+    def __getitem__(self, code: str):
+        return self._columns[code.upper()]
+
+    def __contains__(self, code) -> bool:
+        return isinstance(code, str) and code.upper() in self._columns
+
+    def __iter__(self):
+        return iter(self._columns)
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __repr__(self) -> str:
+        return "TimeSeries(base={!r}, start_date={!r}, end_date={!r}, " \
+               "symbols={!r})".format(self._base, self._start_date,
+                                      self.end_date, self.symbols)
@@ -0,0 +1,110 @@
+"""
+Warm-start snapshots: a file of recent cache entries bundled with a
+deployment, which short-lived processes load at startup (see
+CurrencyClient(warm_start=...)) to serve their first lookups without a
+request to API.
+
+A snapshot is a JSON file (gzip compressed, if its name ends with ".gz"):
+
+    {"created": 1600000000.0, "entries": {"EUR-USD,RUB.json": {...}}}
+
+where the entries are cache filenames and the cached responses. Entries of
+the snapshot are subject to the expiry policy of the client like any cached
+data, so a snapshot older than the interval only provides the validators for
+a conditional first request.
+
+Usage: python -m clients.warm_start OUTPUT [--cache-path PATH]
+[--pattern PATTERN]
+"""
+import argparse
+import fnmatch
+import gzip
+import json
+import time
+
+from cache.base_cache.file_cache import write_file_atomically
+from cache.json_cache import JSONCache
+
+
+def save_snapshot(path: str, cache, pattern="*") -> int:
+    """
+    Writes the entries of the cache to a warm-start snapshot file.
+
+    Parameters
+    ----------
+    path : str
+        Path to the snapshot file (gzip compressed, if it ends with ".gz").
+    cache : JSONCache or SQLiteCache
+        Cache to take the entries from (it must have get_keys).
+    pattern : str
+        Shell-style pattern of the filenames of the entries to take.
+
+    Returns
+    -------
+    count : int
+        The number of entries written.
+    """
+
+    entries = {}
+    for filename in cache.get_keys():
+        if not fnmatch.fnmatchcase(filename, pattern):
+            continue
+        try:
+            entries[filename] = cache.get_from_cache(filename)
+        except FileNotFoundError:
+            continue
+    content = json.dumps({"created": time.time(), "entries": entries},
+                         separators=(",", ":")).encode()
+    if path.endswith(".gz"):
+        content = gzip.compress(content)
+    write_file_atomically(path, lambda snapshot_file: snapshot_file.write(
+        content), mode="wb")
+    return len(entries)
+
+
+def load_snapshot(path: str) -> dict:
+    """
+    Reads the entries of a warm-start snapshot file.
+
+    Parameters
+    ----------
+    path : str
+        Path to the snapshot file.
+
+    Returns
+    -------
+    entries : dict
+        Cache filename -> cached response.
+
+    Raises
+    ------
+    ValueError
+        Raises if the file is not a snapshot.
+    """
+
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rb") as snapshot_file:
+        snapshot = json.loads(snapshot_file.read().decode("utf-8"))
+    if not isinstance(snapshot, dict) or \
+            not isinstance(snapshot.get("entries"), dict):
+        raise ValueError("{} is not a warm-start snapshot".format(path))
+    return snapshot["entries"]
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(
+        description="Writes the entries of the JSON cache to a warm-start "
+                    "snapshot file.")
+    parser.add_argument("output", help="snapshot file (gzip compressed, if "
+                                       "it ends with .gz)")
+    parser.add_argument("--cache-path", help="folder of the JSON cache")
+    parser.add_argument("--pattern", default="*",
+                        help="pattern of the cache filenames to take")
+    arguments = parser.parse_args(arguments)
+    count = save_snapshot(arguments.output, JSONCache(arguments.cache_path),
+                          arguments.pattern)
+    print("{} entries written to {}".format(count, arguments.output))
+
+
+if __name__ == "__main__":
+    main()
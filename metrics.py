@@ -0,0 +1,284 @@
+import bisect
+import threading
+import weakref
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class NullMetrics:
+    """
+    Metrics which record nothing, the default of all components.
+
+    Instrumented code checks 'enabled' before it measures anything, so the
+    disabled path costs one attribute lookup.
+
+    Attributes
+    ----------
+    enabled : bool
+        False - nothing is recorded.
+
+    Methods
+    -------
+    increment(name, value=1.0, **labels)
+        Adds the value to the counter.
+    observe(name, value, **labels)
+        Adds the value to the histogram.
+    register_stats(prefix, get_stats, **labels)
+        Exports the numbers returned by get_stats as gauges.
+    """
+
+    enabled = False
+
+    def increment(self, name: str, value=1.0, **labels):
+        pass
+
+    def observe(self, name: str, value: float, **labels):
+        pass
+
+    def register_stats(self, prefix: str, get_stats, **labels):
+        pass
+
+
+class _Histogram:
+    """Cumulative-bucket histogram of one series."""
+
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self, size: int):
+        self.counts = [0] * size
+        self.sum = 0.0
+        self.count = 0
+
+
+class Metrics(NullMetrics):
+    """
+    In-memory registry of counters and histograms, which exports them in the
+    Prometheus text format.
+
+    A series is a metric name and a set of labels (keyword arguments of
+    increment and observe). Histograms have the same buckets, by default in
+    seconds from 0.5 ms to 10 s. The registry is safe for several threads.
+
+    Attributes
+    ----------
+    enabled : bool
+        True - values are recorded.
+    _buckets : tuple
+        Upper bounds of the histogram buckets.
+    _counters : dict
+        (name, labels) -> value.
+    _histograms : dict
+        (name, labels) -> _Histogram.
+    _stats : dict
+        (prefix, labels) -> weak reference to a get_stats method.
+
+    Methods
+    -------
+    increment(name, value=1.0, **labels)
+        Adds the value to the counter.
+    observe(name, value, **labels)
+        Adds the value to the histogram.
+    get_counter(name, **labels)
+        Returns the value of the counter.
+    get_histogram(name, **labels)
+        Returns the count, the sum and the bucket counts of the histogram.
+    register_stats(prefix, get_stats, **labels)
+        Exports the numbers returned by get_stats as gauges.
+    export_prometheus()
+        Returns all series in the Prometheus text format.
+    """
+
+    enabled = True
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        """
+        Constructs all the necessary attributes for the Metrics object.
+
+        Parameters
+        ----------
+        buckets : tuple
+            Upper bounds of the histogram buckets (ascending).
+        """
+
+        self._buckets = tuple(buckets)
+        self._counters = {}
+        self._histograms = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def increment(self, name: str, value=1.0, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0.0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        position = bisect.bisect_left(self._buckets, value)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = _Histogram(len(self._buckets))
+                self._histograms[key] = histogram
+            if position < len(self._buckets):
+                histogram.counts[position] += 1
+            histogram.sum += value
+            histogram.count += 1
+
+    def get_counter(self, name: str, **labels) -> float:
+        with self._lock:
+            return self._counters.get((name, tuple(sorted(labels.items()))),
+                                      0.0)
+
+    def get_histogram(self, name: str, **labels) -> dict:
+        """
+        Returns the count, the sum and the cumulative bucket counts of the
+        histogram.
+
+        Parameters
+        ----------
+        name : str
+            Name of the metric.
+        **labels
+            Labels of the series.
+
+        Returns
+        -------
+        histogram : dict
+            'count', 'sum' and 'buckets' (upper bound -> the number of values
+            not greater than it).
+        """
+
+        with self._lock:
+            histogram = self._histograms.get(
+                (name, tuple(sorted(labels.items()))))
+            if histogram is None:
+                return {"count": 0, "sum": 0.0, "buckets": {}}
+            counts = list(histogram.counts)
+            result = {"count": histogram.count, "sum": histogram.sum}
+        cumulative = 0
+        buckets = {}
+        for bound, count in zip(self._buckets, counts):
+            cumulative += count
+            buckets[bound] = cumulative
+        result["buckets"] = buckets
+        return result
+
+    def register_stats(self, prefix: str, get_stats, **labels):
+        """
+        Exports the numbers of the dict returned by get_stats (for example,
+        the counters of a cache or the state of a request budget) as gauges
+        '[prefix]_[key]', which are read only on export. The registry keeps
+        a weak reference to the method, a later registration with the same
+        prefix and labels replaces it.
+
+        Parameters
+        ----------
+        prefix : str
+            Prefix of the gauge names.
+        get_stats : callable
+            Bound method which returns a dict of numbers.
+        **labels
+            Labels of the gauges.
+
+        Returns
+        -------
+        None
+        """
+
+        reference = weakref.WeakMethod(get_stats) \
+            if hasattr(get_stats, "__self__") else lambda: get_stats
+        with self._lock:
+            self._stats[(prefix, tuple(sorted(labels.items())))] = reference
+
+    def export_prometheus(self) -> str:
+        """
+        Returns all series in the Prometheus text exposition format.
+
+        Returns
+        -------
+        text : str
+            '# TYPE' lines and samples of every metric.
+        """
+
+        with self._lock:
+            counters = sorted(self._counters.items())
+            stats = sorted(self._stats.items())
+            histograms = sorted((key, (list(histogram.counts), histogram.sum,
+                                       histogram.count))
+                                for key, histogram in
+                                self._histograms.items())
+        lines = []
+        typed = None
+        for (name, labels), value in counters:
+            if name != typed:
+                lines.append("# TYPE {} counter".format(name))
+                typed = name
+            lines.append("{}{} {}".format(name, _format_labels(labels),
+                                          _format_value(value)))
+        for (name, labels), (counts, total, count) in histograms:
+            if name != typed:
+                lines.append("# TYPE {} histogram".format(name))
+                typed = name
+            cumulative = 0
+            for bound, bucket_count in zip(self._buckets, counts):
+                cumulative += bucket_count
+                lines.append("{}_bucket{} {}".format(
+                    name, _format_labels(labels + (("le", repr(bound)),)),
+                    cumulative))
+            lines.append("{}_bucket{} {}".format(
+                name, _format_labels(labels + (("le", "+Inf"),)), count))
+            lines.append("{}_sum{} {}".format(name, _format_labels(labels),
+                                              _format_value(total)))
+            lines.append("{}_count{} {}".format(name, _format_labels(labels),
+                                                count))
+        gauges = {}
+        for (prefix, labels), reference in stats:
+            get_stats = reference()
+            values = get_stats() if get_stats is not None else None
+            for key, value in sorted((values or {}).items()):
+                if isinstance(value, (int, float)) and \
+                        not isinstance(value, bool):
+                    gauges.setdefault("{}_{}".format(prefix, key), []).append(
+                        (labels, value))
+        for name, samples in sorted(gauges.items()):
+            lines.append("# TYPE {} gauge".format(name))
+            for labels, value in samples:
+                lines.append("{}{} {}".format(name, _format_labels(labels),
+                                              _format_value(value)))
+        return "\n".join(lines) + "\n" if lines else ""
+
+
+NULL_METRICS = NullMetrics()
+_default = NULL_METRICS
+
+
+def get_metrics():
+    """
+    Returns the default metrics of components which are created without
+    explicit metrics (NULL_METRICS unless set_metrics is called).
+    """
+
+    return _default
+
+
+def set_metrics(metrics):
+    """
+    Sets the default metrics of components created after the call (None -
+    NULL_METRICS).
+    """
+
+    global _default
+    _default = metrics if metrics is not None else NULL_METRICS
+
+
+def _format_labels(labels: tuple) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join('{}="{}"'.format(
+        key, str(value).replace("\\", "\\\\").replace('"', '\\"').replace(
+            "\n", "\\n")) for key, value in labels) + "}"
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
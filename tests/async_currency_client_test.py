@@ -0,0 +1,98 @@
+import asyncio
+
+import pytest
+
+from apies.base_api.async_http import AsyncConnectionPool
+from apies.exchange_rates_api import ExchangeRatesApi
+from benchmarks.async_stub_server import AsyncStubExchangeRatesServer
+from cache.json_cache import JSONCache
+from clients.async_currency_client import AsyncCurrencyClient
+
+
+class TestAsyncCurrencyClient:
+    """
+    A class of tests of AsyncCurrencyClient against the local asyncio stub
+    server.
+
+    Methods
+    -------
+    test_concurrent_calls(monkeypatch, tmp_path)
+        The method checks coalescing of concurrent refreshes, connection reuse
+        and the limit of concurrent requests.
+    test_bodiless_responses()
+        The method checks that 204 and 304 responses without Content-Length
+        do not wait for the end of a keep-alive connection.
+    """
+
+    @pytest.mark.stub
+    def test_concurrent_calls(self, monkeypatch, tmp_path):
+        monkeypatch.setattr(ExchangeRatesApi, "_key", "stub-access-key")
+        loop = asyncio.new_event_loop()
+
+        async def scenario():
+            server = await AsyncStubExchangeRatesServer(latency=0.05).start()
+            monkeypatch.setenv("SCHEME", server.scheme)
+            monkeypatch.setenv("HOST", server.host)
+            monkeypatch.setenv("API_VERSION", server.api_version)
+            client = AsyncCurrencyClient(
+                minutes=60, cache_manager=JSONCache(str(tmp_path)),
+                max_concurrency=2)
+            try:
+                await asyncio.gather(*[client.get_currency("USD", "RUB")
+                                       for _ in range(10)])
+                assert server.request_count == 1
+
+                await asyncio.gather(*[client.get_currency(base=base)
+                                       for base in ("USD", "RUB", "SEK",
+                                                    "BOB", "GBP", "JPY")])
+                assert server.request_count == 7
+                assert server.max_in_flight <= 2
+                assert server.connection_count <= 2
+
+                await client.get_currency("USD", "RUB")
+                assert server.request_count == 7
+                with pytest.raises(RuntimeError):
+                    await client.get_currency("wrong", "data")
+            finally:
+                await client.close()
+                await server.stop()
+
+        try:
+            loop.run_until_complete(scenario())
+        finally:
+            loop.close()
+
+    @pytest.mark.unit
+    def test_bodiless_responses(self):
+        loop = asyncio.new_event_loop()
+        handled = loop.create_future()
+
+        async def handle(reader, writer):
+            for status in (b"304 Not Modified", b"204 No Content"):
+                while (await reader.readline()) not in (b"\r\n", b""):
+                    pass
+                writer.write(b"HTTP/1.1 " + status + b"\r\nETag: x\r\n\r\n")
+            await reader.read()
+            writer.close()
+            handled.set_result(None)
+
+        async def scenario():
+            server = await asyncio.start_server(handle, "127.0.0.1", 0)
+            port = server.sockets[0].getsockname()[1]
+            pool = AsyncConnectionPool(read_timeout=2.0)
+            try:
+                url = "http://127.0.0.1:{}/v1/latest".format(port)
+                first = await pool.get(url)
+                second = await pool.get(url)
+                assert (first.status_code, second.status_code) == (304, 204)
+                assert first.content == b"" and first.headers["etag"] == "x"
+            finally:
+                await pool.close()
+                await handled
+                server.close()
+                await server.wait_closed()
+
+        try:
+            loop.run_until_complete(scenario())
+        finally:
+            loop.close()
@@ -0,0 +1,119 @@
+import threading
+
+import pytest
+
+from apies.base_api.session import create_session
+from apies.exchange_rates_api import ExchangeRatesApi
+from benchmarks.stub_server import make_rates
+from metrics import Metrics
+
+
+class TestBaseAPI:
+    """
+    A class of tests of BaseAPI transport against the local stub server.
+
+    Methods
+    -------
+    test_session_keeps_connection_alive(stub_server)
+        The method checks that sequential requests reuse one connection.
+    test_session_shared_between_apies(stub_server)
+        The method checks that several API objects and threads share one
+        connection pool.
+    test_compression(stub_server)
+        The method checks that compressed responses cut the bytes on the
+        wire and are counted in metrics.
+    test_conditional_requests(stub_server)
+        The method checks validators of responses and 304 responses to
+        conditional requests.
+    test_requests_after_close(stub_server)
+        The method checks that a closed API object sends hedged requests
+        with a new session and thread pool.
+    """
+
+    @staticmethod
+    def _api(server, **kwargs):
+        return ExchangeRatesApi("latest", server.scheme, server.host,
+                                server.api_version, **kwargs)
+
+    @pytest.mark.stub
+    def test_session_keeps_connection_alive(self, stub_server):
+        api = self._api(stub_server, connect_timeout=1, read_timeout=5)
+        for _ in range(5):
+            data = api.send_exchange_rate_request("USD", "RUB",
+                                                  status_code=200)
+            assert data["base"] == "USD"
+        api.close()
+        assert stub_server.request_count == 5
+        assert stub_server.connection_count == 1
+
+    @pytest.mark.stub
+    def test_session_shared_between_apies(self, stub_server):
+        session = create_session(pool_maxsize=2, pool_block=True)
+        apies = [self._api(stub_server, session=session) for _ in range(4)]
+        threads = [threading.Thread(
+            target=api.send_exchange_rate_request, args=("EUR",),
+            kwargs={"status_code": 200}) for api in apies * 5]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        session.close()
+        assert stub_server.request_count == 20
+        assert stub_server.connection_count <= 2
+
+    @pytest.mark.stub
+    def test_compression(self, stub_server):
+        stub_server.rates = make_rates(170)
+        sizes = {}
+        for compression in (False, True):
+            metrics = Metrics()
+            api = self._api(stub_server, compression=compression,
+                            metrics=metrics)
+            stub_server.reset_counters()
+            data = api.send_exchange_rate_request("EUR", status_code=200)
+            api.close()
+            assert len(data["rates"]) == len(stub_server.rates)
+            assert metrics.get_counter(
+                "exchange_rates_upstream_bytes_total") == \
+                stub_server.bytes_sent
+            sizes[compression] = stub_server.bytes_sent
+        assert sizes[True] < sizes[False] / 2
+        assert metrics.get_counter(
+            "exchange_rates_upstream_decoded_bytes_total") == sizes[False]
+
+    @pytest.mark.stub
+    def test_conditional_requests(self, stub_server):
+        stub_server.update_period = 3600.0
+        api = self._api(stub_server)
+        data = api.send_exchange_rate_request("USD", "RUB", status_code=200)
+        validators = data["validators"]
+        assert validators["etag"] and validators["last_modified"]
+        stub_server.reset_counters()
+        assert api.send_exchange_rate_request(
+            "USD", "RUB", status_code=200, validators=validators) is None
+        assert api.send_exchange_rate_request(
+            "USD", "RUB", status_code=200,
+            validators={"last_modified": validators["last_modified"]}) is None
+        assert stub_server.not_modified_count == 2
+        assert stub_server.bytes_sent == 0
+        changed = api.send_exchange_rate_request(
+            "USD", "SEK", status_code=200, validators=validators)
+        assert list(changed["rates"]) == ["SEK"]
+        stub_server.update_period = None
+        stub_server.clock = lambda: 2000000000.0
+        assert api.send_exchange_rate_request(
+            "USD", "RUB", status_code=200, validators=validators)["rates"]
+        api.close()
+        assert stub_server.not_modified_count == 2
+
+    @pytest.mark.stub
+    def test_requests_after_close(self, stub_server):
+        api = self._api(stub_server, hedge_percentile=0.9,
+                        hedge_min_samples=1, request_timeout=5.0)
+        for _ in range(2):
+            for _ in range(3):
+                api.send_exchange_rate_request("USD", status_code=200)
+            assert api._executor is not None
+            api.close()
+            assert api._executor is None and api._session is None
+        assert stub_server.connection_count == 2
@@ -0,0 +1,87 @@
+import json
+
+import pytest
+
+from clients.batch_lookup import BatchLookup, main
+
+
+class TestBatchLookup:
+    """
+    A class of tests of the streaming JSONL batch lookups.
+
+    Methods
+    -------
+    test_ordered(stub_currency_client, stub_environment)
+        The method checks that results follow the order of the input and
+        repeated queries are served from cache.
+    test_unordered(stub_currency_client, stub_environment)
+        The method checks that every query gets one result in the order of
+        completion.
+    test_errors(stub_currency_client)
+        The method checks that malformed queries and failed lookups yield
+        errors and do not stop the stream.
+    test_main(stub_environment, tmp_path, capsys)
+        The method checks the command-line entry point and its summary.
+    """
+
+    @pytest.mark.stub
+    def test_ordered(self, stub_currency_client, stub_environment):
+        lines = [json.dumps({"base": base, "symbols": ["USD", "RUB"],
+                             "id": number})
+                 for number, base in enumerate(["EUR", "SEK", "EUR"] * 20)]
+        lookup = BatchLookup(stub_currency_client, max_in_flight=4, window=8)
+        results = list(lookup.run(lines))
+        assert [result["id"] for result in results] == list(range(60))
+        assert [result["line"] for result in results] == list(range(1, 61))
+        assert all(result["base"] == ("SEK" if number % 3 == 1 else "EUR") and
+                   sorted(result["rates"]) == ["RUB", "USD"]
+                   for number, result in enumerate(results))
+        assert stub_environment.request_count == 2
+        stats = lookup.get_stats()
+        assert stats["queries"] == 60 and stats["errors"] == 0
+        assert stats["queries_per_s"] > 0
+
+    @pytest.mark.stub
+    def test_unordered(self, stub_currency_client, stub_environment):
+        lines = ['{{"base": "{}", "symbols": "USD,RUB"}}'.format(base)
+                 for base in ["EUR", "SEK", "NOK", "USD"] * 25]
+        lookup = BatchLookup(stub_currency_client, max_in_flight=4, window=4,
+                             ordered=False)
+        results = list(lookup.run(lines))
+        assert sorted(result["line"] for result in results) == \
+            list(range(1, 101))
+        assert stub_environment.request_count == 4
+        assert lookup.get_stats()["queries"] == 100
+
+    @pytest.mark.stub
+    def test_errors(self, stub_currency_client):
+        lines = ['{"symbols": ["USD"]}', "not json", "", "[1, 2]",
+                 '{"base": "EUR", "symbols": ["XXX"], "id": "bad"}',
+                 '{"symbols": 5}', '{"base": "SEK"}', '{"date": 5}',
+                 '{"base": 1}', '{"symbols": ["USD", 2]}',
+                 '{"date": "2020-01-01", "symbols": ["USD"]}']
+        lookup = BatchLookup(stub_currency_client)
+        results = list(lookup.run(lines))
+        assert [result["line"] for result in results] == \
+            [1, 2, 4, 5, 6, 7, 8, 9, 10, 11]
+        assert [("error" in result) for result in results] == \
+            [False, True, True, True, True, False, True, True, True, False]
+        assert results[1]["error"].startswith("ValueError: Malformed query")
+        assert results[3]["id"] == "bad"
+        assert results[6]["error"].startswith("ValueError: Malformed query")
+        assert lookup.get_stats()["errors"] == 7
+
+    @pytest.mark.stub
+    def test_main(self, stub_environment, tmp_path, capsys):
+        input_path = tmp_path / "queries.jsonl"
+        output_path = tmp_path / "results.jsonl"
+        input_path.write_text("\n".join(
+            json.dumps({"base": "EUR", "symbols": ["USD"]})
+            for _ in range(10)) + "\n")
+        main([str(input_path), "--output", str(output_path), "--cache-path",
+              str(tmp_path / "cache"), "--unordered"])
+        results = [json.loads(line) for line in
+                   output_path.read_text().splitlines()]
+        assert len(results) == 10 and stub_environment.request_count == 1
+        summary = json.loads(capsys.readouterr().err)
+        assert summary["queries"] == 10 and summary["errors"] == 0
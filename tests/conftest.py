@@ -1,5 +1,8 @@
 import pytest
 
+from apies.exchange_rates_api import ExchangeRatesApi
+from benchmarks.stub_server import StubExchangeRatesServer
+from cache.json_cache import JSONCache
 from clients.currency_client import CurrencyClient
 
 
@@ -9,3 +12,40 @@ def currency_client():
 
     client = CurrencyClient(minutes=60)
     yield client
+
+
+@pytest.fixture()
+def stub_server(monkeypatch):
+    """
+    Method is used to pass a running local stub of Exchange Rates API to
+    tests.
+    """
+
+    monkeypatch.setattr(ExchangeRatesApi, "_key", "stub-access-key")
+    with StubExchangeRatesServer() as server:
+        yield server
+
+
+@pytest.fixture()
+def stub_environment(stub_server, monkeypatch):
+    """
+    Method is used to point the environment variables of CurrencyClient to the
+    local stub server.
+    """
+
+    monkeypatch.setenv("SCHEME", stub_server.scheme)
+    monkeypatch.setenv("HOST", stub_server.host)
+    monkeypatch.setenv("API_VERSION", stub_server.api_version)
+    yield stub_server
+
+
+@pytest.fixture()
+def stub_currency_client(stub_environment, tmp_path):
+    """
+    Method is used to pass CurrencyClient instance attribute, which works with
+    the local stub server and a temporary cache folder, to tests.
+    """
+
+    client = CurrencyClient(minutes=60,
+                            cache_manager=JSONCache(str(tmp_path / "cache")))
+    yield client
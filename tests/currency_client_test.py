@@ -0,0 +1,262 @@
+import json
+import threading
+import time
+
+import pytest
+
+from cache.json_cache import JSONCache
+from clients.currency_client import CurrencyClient
+from clients.rate_table import derive_rates
+
+
+class TestCurrencyClient:
+    """
+    A class of tests of CurrencyClient against the local stub server.
+
+    Methods
+    -------
+    test_cached_response(stub_currency_client, stub_server)
+        The method checks that a fresh cached response is not requested
+        again.
+    test_concurrent_refresh_is_coalesced(stub_currency_client, stub_server)
+        The method checks that parallel callers of the same expired key make
+        one upstream request.
+    test_rate_table_mode(stub_environment, tmp_path)
+        The method checks that any base and symbols are served from one
+        cached rates table.
+    test_derive_rates()
+        The method checks cross-rate triangulation.
+    test_get_currencies(stub_currency_client, stub_server)
+        The method checks that bulk queries are merged into one request per
+        base and returned in order.
+    test_stale_while_revalidate(stub_environment, tmp_path)
+        The method checks that a stale entry within the grace window is
+        served at once and refreshed in the background.
+    test_proactive_refresh(stub_environment, tmp_path)
+        The method checks that a hot entry is refreshed before expiration.
+    test_proactive_refresh_backoff(stub_environment, tmp_path)
+        The method checks that a hot entry whose refresh does not move its
+        expiration time is not refreshed again.
+    test_micro_batching(stub_environment, tmp_path)
+        The method checks that concurrent calls for the same base are merged
+        into one request and only the entries of the calls are saved.
+    test_revalidation(stub_environment, tmp_path)
+        The method checks that an unchanged entry is revalidated with a
+        conditional request and kept in cache with the time of the check.
+    test_revalidation_refreshes_freshness(stub_environment, tmp_path)
+        The method checks that an entry revalidated by a 304 response is
+        fresh for the next interval, for other clients of the cache too.
+    test_close(stub_environment, tmp_path)
+        The method checks that a closed client stops the background refresh
+        and sends the next request with a new session.
+    """
+
+    @pytest.mark.stub
+    def test_cached_response(self, stub_currency_client, stub_server):
+        first = stub_currency_client.get_currency("USD", "RUB")
+        second = stub_currency_client.get_currency("usd", "rub")
+        assert stub_server.request_count == 1
+        assert not first.from_cache and second.from_cache
+        assert first == second and second.base == "EUR"
+
+    @pytest.mark.stub
+    def test_concurrent_refresh_is_coalesced(self, stub_currency_client,
+                                             stub_server):
+        stub_server.latency = 0.2
+        callers = 16
+        barrier = threading.Barrier(callers)
+
+        def call():
+            barrier.wait()
+            stub_currency_client.get_currency("USD", "RUB", base="SEK")
+
+        threads = [threading.Thread(target=call) for _ in range(callers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert stub_server.request_count == 1
+
+    @pytest.mark.stub
+    def test_rate_table_mode(self, stub_environment, tmp_path):
+        client = CurrencyClient(minutes=60, rate_table_base="EUR",
+                                cache_manager=JSONCache(str(tmp_path)))
+        for symbols, base in [(("RUB", "USD"), "EUR"), (("USD", "RUB"), "EUR"),
+                              (("USD",), "EUR"), ((), "USD")]:
+            client.get_currency(*symbols, base=base)
+        assert stub_environment.request_count == 1
+        with pytest.raises(RuntimeError):
+            client.get_currency("wrong", "data")
+
+    @pytest.mark.unit
+    def test_derive_rates(self):
+        table = {"base": "EUR", "timestamp": 1, "rates": {
+            "EUR": 1.0, "USD": 1.25, "RUB": 100.0}}
+        data = derive_rates(table, "usd", ("rub", "eur"))
+        assert data["base"] == "USD" and data["timestamp"] == 1
+        assert data["rates"] == {"RUB": 80.0, "EUR": 0.8}
+        assert table["base"] == "EUR"
+
+    @pytest.mark.stub
+    def test_get_currencies(self, stub_currency_client, stub_server):
+        queries = [("USD", ("RUB",)), ("EUR", ("SEK", "BOB")),
+                   ("usd", ("rub",)), ("USD", ("SEK", "RUB")), ("EUR", ())]
+        results = stub_currency_client.get_currencies(queries)
+        assert stub_server.request_count == 2
+        assert [snapshot.base for snapshot in results] == [
+            "USD", "EUR", "USD", "USD", "EUR"]
+        assert results[0].symbols == ("RUB",)
+        assert sorted(results[3]) == ["RUB", "SEK"]
+        assert results[1]["SEK"] == results[4]["SEK"]
+        assert not any(snapshot.from_cache for snapshot in results)
+
+        cached = stub_currency_client.get_currencies(queries)
+        assert cached == results
+        assert all(snapshot.from_cache for snapshot in cached)
+        snapshot = stub_currency_client.get_currency("SEK", "RUB", base="USD")
+        assert snapshot.from_cache and snapshot.rates == results[3].rates
+        assert stub_server.request_count == 2
+
+    @staticmethod
+    def _wait_for_refresh(scheduler, timeout=2.0):
+        deadline = time.time() + timeout
+        while scheduler.get_stats()["refreshed"] < 1 and \
+                time.time() < deadline:
+            time.sleep(0.01)
+
+    @pytest.mark.stub
+    def test_stale_while_revalidate(self, stub_environment, tmp_path):
+        client = CurrencyClient(seconds=1,
+                                cache_manager=JSONCache(str(tmp_path)))
+        client.get_currency("USD")
+        time.sleep(2.1)
+        stub_environment.latency = 0.5
+        scheduler = client.start_background_refresh(grace=60, lead_time=0,
+                                                    poll_interval=0.05)
+        started = time.perf_counter()
+        client.get_currency("USD")
+        assert time.perf_counter() - started < 0.25
+        self._wait_for_refresh(scheduler)
+        client.stop_background_refresh()
+        assert stub_environment.request_count == 2
+        assert scheduler.get_stats()["refreshed"] == 1
+
+    @pytest.mark.stub
+    def test_proactive_refresh(self, stub_environment, tmp_path):
+        client = CurrencyClient(seconds=2,
+                                cache_manager=JSONCache(str(tmp_path)))
+        scheduler = client.start_background_refresh(lead_time=5,
+                                                    poll_interval=0.05)
+        client.get_currency("USD")
+        self._wait_for_refresh(scheduler)
+        client.stop_background_refresh()
+        stats = scheduler.get_stats()
+        assert stats["proactive"] == 1 and stats["refreshed"] == 1
+        assert stub_environment.request_count == 2
+
+    @pytest.mark.stub
+    def test_proactive_refresh_backoff(self, stub_environment, tmp_path):
+        # The interval is 0 and the data of the provider does not change.
+        stub_environment.update_period = 3600.0
+        client = CurrencyClient(cache_manager=JSONCache(str(tmp_path)))
+        scheduler = client.start_background_refresh(lead_time=0.05,
+                                                    poll_interval=0.01)
+        client.get_currency("USD")
+        self._wait_for_refresh(scheduler)
+        time.sleep(0.5)
+        client.stop_background_refresh()
+        stats = scheduler.get_stats()
+        assert stats["proactive"] == 1 and stats["backed_off"] == 1
+        assert stub_environment.request_count == 2
+
+    @pytest.mark.stub
+    def test_micro_batching(self, stub_environment, tmp_path):
+        client = CurrencyClient(minutes=60, batch_window=0.05,
+                                cache_manager=JSONCache(str(tmp_path)))
+        queries = [("USD",), ("RUB", "SEK"), ("BOB",), ("USD",)]
+        barrier = threading.Barrier(len(queries))
+        results = [None] * len(queries)
+
+        def call(index):
+            barrier.wait()
+            results[index] = client.get_currency(*queries[index], base="GBP")
+
+        threads = [threading.Thread(target=call, args=(index,))
+                   for index in range(len(queries))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert stub_environment.request_count == 1
+        for symbols, snapshot in zip(queries, results):
+            assert snapshot.symbols == symbols and snapshot.base == "GBP"
+            assert not snapshot.from_cache
+        assert client.get_currency("RUB", "SEK", base="GBP").from_cache
+        assert stub_environment.request_count == 1
+        # Only the entries of the queries are saved, not their union.
+        assert sorted(path.name for path in tmp_path.iterdir()
+                      if not path.name.startswith(".")) == \
+            ["GBP-BOB.json", "GBP-RUB,SEK.json", "GBP-USD.json"]
+
+    @pytest.mark.stub
+    def test_revalidation(self, stub_environment, tmp_path):
+        stub_environment.update_period = 3600.0
+        # A zero interval makes every call a refresh of the entry.
+        client = CurrencyClient(cache_manager=JSONCache(str(tmp_path)))
+        first = client.get_currency("USD", "RUB")
+        entry = tmp_path / "EUR-USD,RUB.json"
+        content = json.loads(entry.read_text())
+        assert content["validators"]["etag"]
+        assert "checked_at" not in content
+        second = client.get_currency("USD", "RUB")
+        assert stub_environment.request_count == 2
+        assert stub_environment.not_modified_count == 1
+        assert second.rates == first.rates and not second.from_cache
+        revalidated = json.loads(entry.read_text())
+        assert revalidated.pop("checked_at") >= content["timestamp"]
+        assert revalidated == content
+        stub_environment.update_period = None
+        client.get_currency("USD", "RUB")
+        assert stub_environment.not_modified_count == 1
+        client = CurrencyClient(cache_manager=JSONCache(str(tmp_path)),
+                                revalidate=False)
+        stub_environment.update_period = 3600.0
+        client.get_currency("USD", "RUB")
+        client.get_currency("USD", "RUB")
+        assert stub_environment.not_modified_count == 1
+
+    @pytest.mark.stub
+    def test_revalidation_refreshes_freshness(self, stub_environment,
+                                              tmp_path):
+        now = [1800000000.0]
+        stub_environment.clock = lambda: now[0]
+        stub_environment.update_period = 3600.0
+        client = CurrencyClient(minutes=10, clock=lambda: now[0],
+                                cache_manager=JSONCache(str(tmp_path)))
+        client.get_currency("USD")
+        now[0] += 15 * 60
+        client.get_currency("USD")
+        assert stub_environment.request_count == 2
+        assert stub_environment.not_modified_count == 1
+        assert client.get_currency("USD").from_cache
+        now[0] += 9 * 60
+        assert client.get_currency("USD").from_cache
+        other = CurrencyClient(minutes=10, clock=lambda: now[0],
+                               cache_manager=JSONCache(str(tmp_path)))
+        assert other.get_currency("USD").from_cache
+        assert stub_environment.request_count == 2
+        now[0] += 2 * 60
+        client.get_currency("USD")
+        assert stub_environment.not_modified_count == 2
+
+    @pytest.mark.stub
+    def test_close(self, stub_environment, tmp_path):
+        client = CurrencyClient(cache_manager=JSONCache(str(tmp_path)))
+        client.start_background_refresh()
+        client.get_currency("USD")
+        client.close()
+        assert client._refresh_scheduler is None
+        assert client._api_manager._session is None
+        client.get_currency("USD")
+        assert stub_environment.request_count == 2
+        client.close()
@@ -0,0 +1,45 @@
+import datetime
+
+import pytest
+
+from cache.expiry_policy import FixedIntervalPolicy, ProviderSchedulePolicy
+
+
+class TestExpiryPolicy:
+    """
+    A class of tests of expiry policies.
+
+    Methods
+    -------
+    test_fixed_interval_policy()
+        The method checks expiration a fixed interval after the timestamp
+        or the last check of the data.
+    test_provider_schedule_policy()
+        The method checks expiration at the next expected provider update.
+    test_provider_schedule_policy_late_provider()
+        The method checks retries while the provider is late.
+    """
+
+    @pytest.mark.unit
+    def test_fixed_interval_policy(self):
+        policy = FixedIntervalPolicy(datetime.timedelta(minutes=60))
+        assert policy.get_expiration_time(1000) == 4600
+        assert policy.get_expiration_time(1000, checked_at=2000) == 5600
+        assert policy.get_expiration_time(1000, checked_at=500) == 4600
+
+    @pytest.mark.unit
+    def test_provider_schedule_policy(self):
+        policy = ProviderSchedulePolicy(
+            offset=datetime.timedelta(minutes=5),
+            publish_delay=datetime.timedelta(seconds=30))
+        assert policy.get_expiration_time(3600 * 10 + 300) == \
+            3600 * 11 + 300 + 30
+        assert policy.get_expiration_time(3600 * 10 + 299) == \
+            3600 * 10 + 300 + 30
+
+    @pytest.mark.unit
+    def test_provider_schedule_policy_late_provider(self):
+        policy = ProviderSchedulePolicy(
+            retry_interval=datetime.timedelta(seconds=20))
+        assert policy.get_expiration_time(3600, checked_at=3700) == 7200
+        assert policy.get_expiration_time(3600, checked_at=7210) == 7230
@@ -0,0 +1,238 @@
+import json
+import multiprocessing
+import os
+import stat
+import threading
+import time
+
+import pytest
+
+from cache.json_cache import JSONCache
+from clients.currency_client import CurrencyClient
+
+
+def _get_currency(cache_path, barrier):
+    client = CurrencyClient(minutes=60, cache_manager=JSONCache(cache_path))
+    barrier.wait()
+    client.get_currency("USD", "RUB")
+
+
+class TestJSONCache:
+    """
+    A class of tests of JSONCache safety for several processes.
+
+    Methods
+    -------
+    test_readers_never_see_partial_files(tmp_path)
+        The method checks that files are replaced atomically and get the
+        permissions of the umask.
+    test_refresh_lock(tmp_path)
+        The method checks that the refresh lock is exclusive.
+    test_one_process_refreshes(stub_environment, tmp_path)
+        The method checks that parallel processes make one upstream request
+        for a missing entry.
+    test_limits_evict_least_recently_used(tmp_path)
+        The method checks the eviction by the number and size of entries.
+    test_ttl_and_sweep(tmp_path)
+        The method checks that expired entries are misses and are swept.
+    test_sweep_picks_up_other_files(tmp_path)
+        The method checks that the index is built from and reconciled with
+        the cache folder.
+    test_bulk_clears(tmp_path)
+        The method checks clear_all, clear_matching and clearing of a missing
+        entry.
+    test_touch(tmp_path)
+        The method checks that a touched entry gets a new write time without
+        being rewritten.
+    test_no_index_without_limits(tmp_path)
+        The method checks that reads and writes of a cache without limits do
+        not scan the cache folder.
+    test_lock_files_are_deleted(tmp_path)
+        The method checks that lock files are deleted with their entries
+        unless the lock is held.
+    """
+
+    @pytest.mark.unit
+    def test_readers_never_see_partial_files(self, tmp_path):
+        cache = JSONCache(str(tmp_path))
+        data = {"rates": {str(index): index for index in range(20000)}}
+        cache.save_in_cache("big.json", data)
+        errors = []
+        stop = threading.Event()
+
+        def read():
+            while not stop.is_set():
+                try:
+                    cache.get_from_cache("big.json")
+                except ValueError as error:
+                    errors.append(error)
+
+        reader = threading.Thread(target=read)
+        reader.start()
+        for _ in range(20):
+            cache.save_in_cache("big.json", data)
+        stop.set()
+        reader.join()
+        assert not errors
+        assert sorted(path.name for path in tmp_path.iterdir()
+                      if not path.name.startswith(".")) == ["big.json"]
+        with open(str(tmp_path / "big.json")) as cache_file:
+            assert json.load(cache_file) == data
+        umask = os.umask(0o022)
+        os.umask(umask)
+        assert stat.S_IMODE(os.stat(str(tmp_path / "big.json")).st_mode) == \
+            0o666 & ~umask
+
+    @pytest.mark.unit
+    def test_refresh_lock(self, tmp_path):
+        cache = JSONCache(str(tmp_path))
+        with cache.refresh_lock("a.json") as acquired:
+            assert acquired
+            with cache.refresh_lock("a.json", blocking=False) as other:
+                assert not other
+            with cache.refresh_lock("a.json", timeout=0.05) as other:
+                assert not other
+            with cache.refresh_lock("b.json", blocking=False) as other:
+                assert other
+        with cache.refresh_lock("a.json", blocking=False) as acquired:
+            assert acquired
+
+    @pytest.mark.stub
+    def test_one_process_refreshes(self, stub_environment, tmp_path):
+        stub_environment.latency = 0.3
+        context = multiprocessing.get_context("fork")
+        barrier = context.Barrier(4)
+        processes = [context.Process(target=_get_currency,
+                                     args=(str(tmp_path), barrier))
+                     for _ in range(4)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        assert [process.exitcode for process in processes] == [0] * 4
+        assert stub_environment.request_count == 1
+
+    @pytest.mark.unit
+    def test_limits_evict_least_recently_used(self, tmp_path):
+        cache = JSONCache(str(tmp_path), max_entries=3)
+        for name in ("a", "b", "c"):
+            cache.save_in_cache(name + ".json", {"name": name})
+        cache.get_from_cache("a.json")
+        cache.save_in_cache("d.json", {"name": "d"})
+        assert cache.get_keys() == ["c.json", "a.json", "d.json"]
+        assert not (tmp_path / "b.json").exists()
+        with pytest.raises(FileNotFoundError):
+            cache.get_from_cache("b.json")
+        size = len(json.dumps({"name": "a"}))
+        cache = JSONCache(str(tmp_path / "bytes"), max_bytes=2 * size)
+        for name in ("a", "b", "c"):
+            cache.save_in_cache(name + ".json", {"name": name})
+        stats = cache.get_stats()
+        assert stats["entries"] == 2 and stats["bytes"] == 2 * size
+        assert stats["evictions"] == 1
+        assert cache.get_keys() == ["b.json", "c.json"]
+
+    @pytest.mark.unit
+    def test_ttl_and_sweep(self, tmp_path):
+        cache = JSONCache(str(tmp_path), ttl=0.1)
+        cache.save_in_cache("a.json", {})
+        assert cache.get_from_cache("a.json") == {}
+        time.sleep(0.15)
+        with pytest.raises(FileNotFoundError):
+            cache.get_from_cache("a.json")
+        assert not (tmp_path / "a.json").exists()
+        cache.save_in_cache("b.json", {})
+        cache.save_in_cache("c.json", {})
+        time.sleep(0.15)
+        assert cache.sweep() == 2
+        assert cache.get_stats()["expirations"] == 3
+        cache = JSONCache(str(tmp_path), ttl=0.05, sweep_interval=0.02)
+        cache.save_in_cache("d.json", {})
+        deadline = time.monotonic() + 2.0
+        while (tmp_path / "d.json").exists() and \
+                time.monotonic() < deadline:
+            time.sleep(0.01)
+        cache.close()
+        assert not (tmp_path / "d.json").exists()
+
+    @pytest.mark.unit
+    def test_sweep_picks_up_other_files(self, tmp_path):
+        (tmp_path / "old.json").write_text("{}")
+        (tmp_path / "cache.sqlite3").write_text("")
+        cache = JSONCache(str(tmp_path), max_entries=2)
+        assert cache.get_keys() == ["old.json"]
+        other = JSONCache(str(tmp_path))
+        other.save_in_cache("new.json", {"a": 1})
+        assert cache.get_from_cache("new.json") == {"a": 1}
+        other.save_in_cache("other.json", {})
+        assert cache.sweep() == 0
+        assert sorted(cache.get_keys()) == ["new.json", "other.json"]
+        assert (tmp_path / "cache.sqlite3").exists()
+
+    @pytest.mark.unit
+    def test_bulk_clears(self, tmp_path):
+        cache = JSONCache(str(tmp_path))
+        for name in ("EUR-USD", "EUR-RUB", "USD-EUR"):
+            cache.save_in_cache(name + ".json", {})
+        cache.clear_cache("missing.json")
+        assert cache.clear_matching("EUR-*") == 2
+        assert cache.get_keys() == ["USD-EUR.json"]
+        cache.clear_all()
+        assert cache.get_keys() == []
+        assert cache.get_stats()["bytes"] == 0
+        assert not list(tmp_path.glob("*.json"))
+
+    @pytest.mark.unit
+    def test_touch(self, tmp_path):
+        cache = JSONCache(str(tmp_path), ttl=0.2)
+        cache.save_in_cache("a.json", {"rates": {}})
+        cache.save_in_cache("b.json", {})
+        time.sleep(0.15)
+        cache.touch("a.json")
+        cache.touch("missing.json")
+        time.sleep(0.1)
+        assert cache.get_from_cache("a.json") == {"rates": {}}
+        with pytest.raises(FileNotFoundError):
+            cache.get_from_cache("b.json")
+        assert cache.get_keys() == ["a.json"]
+
+    @pytest.mark.unit
+    def test_no_index_without_limits(self, tmp_path):
+        JSONCache(str(tmp_path)).save_in_cache("other.json", {})
+        cache = JSONCache(str(tmp_path))
+        cache.save_in_cache("a.json", {"rates": {}})
+        assert cache.get_from_cache("other.json") == {}
+        cache.touch("a.json")
+        cache.clear_cache("missing.json")
+        assert cache._index is None
+        assert sorted(cache.get_keys()) == ["a.json", "other.json"]
+        cache.save_in_cache("b.json", {})
+        cache.clear_cache("other.json")
+        assert sorted(cache.get_keys()) == ["a.json", "b.json"]
+        limited = JSONCache(str(tmp_path), max_entries=10)
+        limited.get_from_cache("a.json")
+        assert len(limited._index) == 2
+
+    @pytest.mark.unit
+    def test_lock_files_are_deleted(self, tmp_path):
+
+        def lock_files():
+            return sorted(path.name for path in tmp_path.iterdir()
+                          if path.name.endswith(".lock"))
+
+        cache = JSONCache(str(tmp_path), max_entries=2)
+        for number in range(5):
+            name = "{}.json".format(number)
+            with cache.refresh_lock(name):
+                cache.save_in_cache(name, {})
+        assert lock_files() == [".3.json.lock", ".4.json.lock"]
+        with cache.refresh_lock("4.json") as acquired:
+            assert acquired
+            cache.clear_all()
+            assert lock_files() == [".4.json.lock"]
+            with cache.refresh_lock("4.json", blocking=False) as other:
+                assert not other
+        with cache.refresh_lock("5.json"):
+            pass
+        assert cache.sweep() == 0
+        assert lock_files() == []
@@ -0,0 +1,56 @@
+import os
+
+import pytest
+
+from cache.json_cache import JSONCache
+from cache.memory_cache import MemoryCache
+
+
+class TestMemoryCache:
+    """
+    A class of tests of MemoryCache in front of JSONCache.
+
+    Methods
+    -------
+    test_fresh_hit_does_not_touch_backing_cache(tmp_path)
+        The method checks that a cached entry is served from memory.
+    test_lru_eviction(tmp_path)
+        The method checks that the least recently used entry is evicted.
+    test_ttl_expiration(tmp_path)
+        The method checks that an entry with expired TTL is re-read.
+    test_clear_cache(tmp_path)
+        The method checks that clearing removes the entry from both layers.
+    """
+
+    @pytest.mark.unit
+    def test_fresh_hit_does_not_touch_backing_cache(self, tmp_path):
+        cache = MemoryCache(JSONCache(str(tmp_path)))
+        cache.save_in_cache("EUR-USD.json", {"rates": {"USD": 1.1}})
+        os.remove(str(tmp_path / "EUR-USD.json"))
+        assert cache.get_from_cache("EUR-USD.json") == {"rates": {"USD": 1.1}}
+        assert cache.get_stats()["hits"] == 1
+
+    @pytest.mark.unit
+    def test_lru_eviction(self, tmp_path):
+        cache = MemoryCache(JSONCache(str(tmp_path)), max_entries=2)
+        for name in ("a.json", "b.json", "c.json"):
+            cache.save_in_cache(name, {"name": name})
+        stats = cache.get_stats()
+        assert stats["entries"] == 2 and stats["evictions"] == 1
+        cache.get_from_cache("a.json")
+        assert cache.get_stats()["misses"] == 1
+
+    @pytest.mark.unit
+    def test_ttl_expiration(self, tmp_path):
+        cache = MemoryCache(JSONCache(str(tmp_path)), ttl=0)
+        cache.save_in_cache("a.json", {"name": "a"})
+        assert cache.get_from_cache("a.json") == {"name": "a"}
+        assert cache.get_stats()["expirations"] == 1
+
+    @pytest.mark.unit
+    def test_clear_cache(self, tmp_path):
+        cache = MemoryCache(JSONCache(str(tmp_path)))
+        cache.save_in_cache("a.json", {"name": "a"})
+        cache.clear_cache("a.json")
+        with pytest.raises(FileNotFoundError):
+            cache.get_from_cache("a.json")
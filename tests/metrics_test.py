@@ -0,0 +1,124 @@
+import datetime
+
+import pytest
+
+from apies.exchange_rates_api import ExchangeRatesApi
+from cache.json_cache import JSONCache
+from cache.memory_cache import MemoryCache
+from clients.currency_client import CurrencyClient
+from metrics import NULL_METRICS, Metrics, get_metrics, set_metrics
+
+
+class TestMetrics:
+    """
+    A class of tests of the metrics layer.
+
+    Methods
+    -------
+    test_registry()
+        The method checks counters, histograms and gauges of registered
+        stats.
+    test_prometheus_format()
+        The method checks the Prometheus text format.
+    test_default_metrics()
+        The method checks that components use the default metrics.
+    test_currency_client(stub_environment, tmp_path)
+        The method checks the metrics of lookups and requests.
+    test_endpoint_labels(stub_server)
+        The method checks that requests of different dates share one
+        series.
+    """
+
+    @pytest.mark.unit
+    def test_registry(self):
+        metrics = Metrics(buckets=(0.1, 1.0))
+        metrics.increment("calls_total", result="hit")
+        metrics.increment("calls_total", 2, result="hit")
+        metrics.observe("latency_seconds", 0.05, stage="http")
+        metrics.observe("latency_seconds", 0.5, stage="http")
+        metrics.observe("latency_seconds", 5.0, stage="http")
+        assert metrics.get_counter("calls_total", result="hit") == 3
+        assert metrics.get_counter("calls_total", result="miss") == 0
+        assert metrics.get_histogram("latency_seconds", stage="http") == {
+            "count": 3, "sum": 5.55, "buckets": {0.1: 1, 1.0: 2}}
+
+        class Source:
+            def get_stats(self):
+                return {"entries": 2, "name": "ignored"}
+
+        source = Source()
+        metrics.register_stats("cache", source.get_stats, backend="a")
+        assert 'cache_entries{backend="a"} 2' in metrics.export_prometheus()
+        del source
+        assert "cache_entries" not in metrics.export_prometheus()
+
+    @pytest.mark.unit
+    def test_prometheus_format(self):
+        metrics = Metrics(buckets=(0.5,))
+        metrics.increment("requests_total", path="latest", status=200)
+        metrics.increment("bytes_total", 1.5)
+        metrics.observe("stage_seconds", 0.25, stage='say "hi"')
+        assert metrics.export_prometheus().splitlines() == [
+            "# TYPE bytes_total counter",
+            "bytes_total 1.5",
+            "# TYPE requests_total counter",
+            'requests_total{path="latest",status="200"} 1',
+            "# TYPE stage_seconds histogram",
+            'stage_seconds_bucket{stage="say \\"hi\\"",le="0.5"} 1',
+            'stage_seconds_bucket{stage="say \\"hi\\"",le="+Inf"} 1',
+            'stage_seconds_sum{stage="say \\"hi\\""} 0.25',
+            'stage_seconds_count{stage="say \\"hi\\""} 1']
+        assert Metrics().export_prometheus() == ""
+
+    @pytest.mark.unit
+    def test_default_metrics(self, tmp_path):
+        assert get_metrics() is NULL_METRICS
+        metrics = Metrics()
+        set_metrics(metrics)
+        try:
+            client = CurrencyClient(minutes=60,
+                                    cache_manager=JSONCache(str(tmp_path)))
+        finally:
+            set_metrics(None)
+        assert client._metrics is metrics
+        assert client._api_manager._metrics is metrics
+        assert get_metrics() is NULL_METRICS
+
+    @pytest.mark.stub
+    def test_currency_client(self, stub_environment, tmp_path):
+        metrics = Metrics()
+        client = CurrencyClient(
+            minutes=60, metrics=metrics,
+            cache_manager=MemoryCache(JSONCache(str(tmp_path))))
+        client.get_currency("USD", "RUB")
+        client.get_currency("USD", "RUB")
+        client.get_currencies([("EUR", ("USD", "RUB")), ("GBP", ("SEK",))])
+        lookups = "exchange_rates_cache_lookups_total"
+        assert metrics.get_counter(lookups, result="miss") == 2
+        assert metrics.get_counter(lookups, result="hit") == 2
+        assert metrics.get_counter(
+            "exchange_rates_upstream_requests_total", endpoint="latest",
+            status=200) == 2
+        assert metrics.get_counter("exchange_rates_key_upstream_requests_total",
+                                   key="EUR-USD,RUB") == 1
+        assert metrics.get_counter("exchange_rates_upstream_bytes_total") > 0
+        for stage in ("url_build", "http", "json_decode", "cache_read",
+                      "cache_write"):
+            assert metrics.get_histogram("exchange_rates_stage_seconds",
+                                         stage=stage)["count"] >= 1
+        text = metrics.export_prometheus()
+        assert 'exchange_rates_cache_hits{backend="MemoryCache"}' in text
+        assert "# TYPE exchange_rates_stage_seconds histogram" in text
+
+    @pytest.mark.stub
+    def test_endpoint_labels(self, stub_server):
+        metrics = Metrics()
+        api = ExchangeRatesApi("latest", stub_server.scheme, stub_server.host,
+                               stub_server.api_version, metrics=metrics)
+        for day in (1, 2):
+            api.send_historical_request(datetime.date(2020, 1, day), "EUR",
+                                        "USD", status_code=200)
+        assert metrics.get_counter("exchange_rates_upstream_requests_total",
+                                   endpoint="historical", status=200) == 2
+        assert "2020-01-01" not in metrics.export_prometheus()
+        api.close()
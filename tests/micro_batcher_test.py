@@ -0,0 +1,82 @@
+import threading
+
+import pytest
+
+from clients.micro_batcher import MicroBatcher
+
+
+class TestMicroBatcher:
+    """
+    A class of tests of MicroBatcher.
+
+    Methods
+    -------
+    test_concurrent_queries_share_a_call()
+        The method checks that queries within the window make one call and
+        get their parts of its result.
+    test_max_batch_size()
+        The method checks that a full batch is closed before the window ends.
+    test_error_is_shared()
+        The method checks that all queries of a batch get the error of the
+        call.
+    """
+
+    @staticmethod
+    def _run(batcher, queries):
+        barrier = threading.Barrier(len(queries))
+        results = [None] * len(queries)
+
+        def call(index):
+            barrier.wait()
+            try:
+                results[index] = batcher.do(*queries[index])
+            except RuntimeError as error:
+                results[index] = error
+
+        threads = [threading.Thread(target=call, args=(index,))
+                   for index in range(len(queries))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    @pytest.mark.unit
+    def test_concurrent_queries_share_a_call(self):
+        calls = []
+
+        def function(base, symbols_list):
+            calls.append((base, sorted(symbols_list)))
+            return [(symbols, base + ":" + ",".join(symbols))
+                    for symbols in symbols_list]
+
+        batcher = MicroBatcher(function, window=0.1)
+        queries = [("EUR", ("USD",)), ("EUR", ("RUB", "SEK")),
+                   ("EUR", ("USD",)), ("USD", ("EUR",))]
+        results = self._run(batcher, queries)
+        assert results == ["EUR:USD", "EUR:RUB,SEK", "EUR:USD", "USD:EUR"]
+        assert sorted(calls) == [("EUR", [("RUB", "SEK"), ("USD",)]),
+                                 ("USD", [("EUR",)])]
+        assert batcher.get_stats() == {"queries": 4, "batches": 2}
+
+    @pytest.mark.unit
+    def test_max_batch_size(self):
+        sizes = []
+
+        def function(base, symbols_list):
+            sizes.append(len(symbols_list))
+            return [(symbols, None) for symbols in symbols_list]
+
+        batcher = MicroBatcher(function, window=5.0, max_batch_size=2)
+        self._run(batcher, [("EUR", (code,)) for code in ("A", "B", "C",
+                                                           "D")])
+        assert sizes == [2, 2]
+
+    @pytest.mark.unit
+    def test_error_is_shared(self):
+        def function(base, symbols_list):
+            raise RuntimeError("upstream failed")
+
+        batcher = MicroBatcher(function, window=0.1)
+        results = self._run(batcher, [("EUR", ("USD",)), ("EUR", ("RUB",))])
+        assert all(isinstance(result, RuntimeError) for result in results)
@@ -0,0 +1,57 @@
+from array import array
+
+import pytest
+
+from clients.rate_matrix import RateMatrix
+
+numpy = pytest.importorskip("numpy")
+
+
+class TestRateMatrix:
+    """
+    A class of tests of RateMatrix and CurrencyClient.convert.
+
+    Methods
+    -------
+    test_convert()
+        The method checks vectorized conversion of arrays and buffers.
+    test_unknown_codes()
+        The method checks the "raise" and "nan" modes of unknown codes.
+    test_client_convert(stub_currency_client, stub_server)
+        The method checks that the matrix is built from one cached rates
+        table and reused.
+    """
+
+    table = {"base": "EUR", "timestamp": 1, "rates": {
+        "USD": 1.25, "RUB": 100.0}}
+
+    @pytest.mark.unit
+    def test_convert(self):
+        matrix = RateMatrix(self.table)
+        converted = matrix.convert(array("d", [10.0, 80.0, 5.0]),
+                                   numpy.array(["EUR", "RUB", "usd"]),
+                                   [b"USD", b"USD", b"EUR"])
+        assert numpy.allclose(converted, [12.5, 1.0, 4.0])
+        assert numpy.allclose(matrix.convert([1, 2], "USD", "USD"), [1, 2])
+
+    @pytest.mark.unit
+    def test_unknown_codes(self):
+        matrix = RateMatrix(self.table)
+        with pytest.raises(RuntimeError):
+            matrix.convert([1.0, 2.0], ["EUR", "XXX"], ["USD", "USD"])
+        converted = matrix.convert([1.0, 2.0], ["EUR", "XXX"], ["USD", "USD"],
+                                   unknown="nan")
+        assert converted[0] == 1.25 and numpy.isnan(converted[1])
+        with pytest.raises(ValueError):
+            matrix.convert([1.0], ["EUR"], ["USD"], unknown="skip")
+
+    @pytest.mark.stub
+    def test_client_convert(self, stub_currency_client, stub_server):
+        amounts = numpy.arange(1000, dtype=numpy.float64)
+        from_codes = numpy.array(["USD", "RUB"] * 500)
+        first = stub_currency_client.convert(amounts, from_codes, "SEK")
+        second = stub_currency_client.convert(amounts, from_codes, "SEK")
+        assert stub_server.request_count == 1
+        assert numpy.array_equal(first, second)
+        rates = stub_currency_client.get_currency("SEK", base="RUB")
+        assert first[1] == pytest.approx(rates["SEK"])
@@ -0,0 +1,45 @@
+import pytest
+
+from clients.rate_snapshot import RateSnapshot
+
+
+class TestRateSnapshot:
+    """
+    A class of tests of RateSnapshot.
+
+    Methods
+    -------
+    test_lookup()
+        The method checks access to the rates and the response parameters.
+    test_immutable()
+        The method checks that a snapshot can not be changed.
+    """
+
+    @pytest.mark.unit
+    def test_lookup(self):
+        data = {"success": True, "timestamp": 1, "base": "EUR",
+                "date": "2021-01-01", "rates": {"USD": 1.25, "RUB": 100.0}}
+        snapshot = RateSnapshot.from_response(data, True)
+        assert snapshot["USD"] == 1.25 and snapshot.get("SEK") is None
+        assert "RUB" in snapshot and len(snapshot) == 2
+        assert list(snapshot) == ["USD", "RUB"]
+        assert snapshot.rates == data["rates"]
+        assert (snapshot.base, snapshot.timestamp, snapshot.date,
+                snapshot.from_cache) == ("EUR", 1, "2021-01-01", True)
+        assert RateSnapshot.from_response(data, False) == snapshot
+        with pytest.raises(KeyError):
+            snapshot["SEK"]
+
+    @pytest.mark.unit
+    def test_immutable(self):
+        snapshot = RateSnapshot("EUR", 1, None, {"USD": 1.25}, False)
+        with pytest.raises(AttributeError):
+            snapshot.base = "USD"
+        with pytest.raises(AttributeError):
+            snapshot.extra = 1
+        with pytest.raises(AttributeError):
+            del snapshot._values
+        snapshot.rates["USD"] = 0.0
+        assert snapshot["USD"] == 1.25
+        with pytest.raises(TypeError):
+            hash(snapshot)
@@ -0,0 +1,80 @@
+import json
+import os
+
+import pytest
+
+from benchmarks.replay import SimulatedClock, make_trace, read_trace, \
+    replay, run
+
+
+class TestReplay:
+    """
+    A class of tests of the trace-replay simulator.
+
+    Methods
+    -------
+    test_trace()
+        The method checks generation and reading of traces.
+    test_replay(stub_server, tmp_path)
+        The method checks the report of a replay on the simulated clock.
+    test_replay_connection_errors(stub_environment, tmp_path)
+        The method checks that lost connections are counted as errors.
+    test_run_restores_environment(monkeypatch, tmp_path)
+        The method checks that a run leaves the address of API in the
+        environment as it was.
+    """
+
+    @pytest.mark.unit
+    def test_trace(self, tmp_path):
+        trace = make_trace(100, 3600.0, start=0.0)
+        assert len(trace) == 100
+        assert all(earlier["t"] <= later["t"]
+                   for earlier, later in zip(trace, trace[1:]))
+        path = tmp_path / "trace.jsonl"
+        path.write_text("\n".join(json.dumps(query) for query in trace))
+        queries = list(read_trace(str(path)))
+        assert queries[0] == (trace[0]["t"], trace[0]["base"],
+                              tuple(trace[0]["symbols"]))
+        clock = SimulatedClock(10.0)
+        clock.set(5.0)
+        clock.advance(1.5)
+        assert clock() == 11.5
+
+    @pytest.mark.stub
+    def test_replay(self, stub_environment, tmp_path):
+        path = tmp_path / "trace.jsonl"
+        path.write_text("\n".join(json.dumps(query) for query in [
+            {"t": 1000.0, "base": "EUR", "symbols": ["USD"]},
+            {"t": 1010.0, "base": "EUR", "symbols": ["USD"]},
+            {"t": 1400.0, "base": "EUR", "symbols": ["USD"]},
+            {"t": 1401.0, "base": "EUR", "symbols": ["XXX"]}]))
+        report = replay(stub_environment, str(path), 300.0, "json", "fixed",
+                        upstream_latency=0.5)
+        assert report["queries"] == 4 and report["errors"] == 1
+        assert report["upstream_requests"] == 3
+        assert report["hit_ratio"] == pytest.approx(1 / 3)
+        assert report["staleness_s"]["max"] == pytest.approx(10.0)
+        assert report["latency"]["max_ms"] >= 500
+
+    @pytest.mark.stub
+    def test_replay_connection_errors(self, stub_environment, tmp_path):
+        path = tmp_path / "trace.jsonl"
+        path.write_text("\n".join(json.dumps(query) for query in [
+            {"t": 1000.0, "base": "EUR", "symbols": ["USD"]},
+            {"t": 1010.0, "base": "EUR", "symbols": ["USD"]}]))
+        stub_environment.inject_faults(drop=True)
+        report = replay(stub_environment, str(path), 300.0, "json", "fixed",
+                        upstream_latency=0.0)
+        assert report["queries"] == 2 and report["errors"] == 1
+
+    @pytest.mark.stub
+    def test_run_restores_environment(self, monkeypatch, tmp_path):
+        path = tmp_path / "trace.jsonl"
+        path.write_text(json.dumps(
+            {"t": 1000.0, "base": "EUR", "symbols": ["USD"]}))
+        monkeypatch.setenv("HOST", "api.example.com")
+        monkeypatch.delenv("API_VERSION", raising=False)
+        report = run(str(path), intervals=[60.0], upstream_latency=0.0)
+        assert report["results"][0]["queries"] == 1
+        assert os.environ["HOST"] == "api.example.com"
+        assert "API_VERSION" not in os.environ
@@ -0,0 +1,157 @@
+import datetime
+import multiprocessing
+
+import pytest
+
+from apies.base_api.request_budget import QuotaExceededError, RequestBudget
+from apies.base_api.resilience import CircuitBreaker, CircuitOpenError
+from apies.exchange_rates_api import ExchangeRatesApi
+from cache.json_cache import JSONCache
+from clients.currency_client import CurrencyClient
+
+# 2026-09-01 00:00 UTC, a month of 30 days (2592000 seconds).
+SEPTEMBER = datetime.datetime(2026, 9, 1,
+                              tzinfo=datetime.timezone.utc).timestamp()
+
+
+def _acquire(state_path, barrier, granted):
+    budget = RequestBudget(quota=1000, burst=10, reserve=0,
+                           state_path=state_path)
+    barrier.wait()
+    for _ in range(10):
+        if budget.try_acquire():
+            with granted.get_lock():
+                granted.value += 1
+
+
+class TestRequestBudget:
+    """
+    A class of tests of RequestBudget and the quota-aware refreshes of
+    CurrencyClient.
+
+    Methods
+    -------
+    test_token_bucket(tmp_path)
+        The method checks the bucket refill and the reserve of priority
+        requests.
+    test_monthly_quota(tmp_path)
+        The method checks that the quota is renewed every month.
+    test_several_processes(tmp_path)
+        The method checks that processes share one budget.
+    test_client_degrades_to_cache(stub_environment, tmp_path)
+        The method checks that cold entries are served from cache when the
+        budget is tight.
+    test_hedged_requests_are_charged(stub_server, tmp_path)
+        The method checks that hedged duplicates take the budget and are not
+        sent when it is exhausted.
+    test_circuit_is_checked_first(stub_server, tmp_path)
+        The method checks that a request rejected by the half-open circuit
+        takes no budget and a denied request does not hold the trial.
+    """
+
+    @pytest.mark.unit
+    def test_token_bucket(self, tmp_path):
+        now = [SEPTEMBER]
+        budget = RequestBudget(quota=2592000, burst=4, reserve=0.25,
+                               state_path=str(tmp_path / "budget.json"),
+                               clock=lambda: now[0])
+        for _ in range(3):
+            assert budget.try_acquire()
+        assert not budget.try_acquire()
+        assert budget.try_acquire(priority=True)
+        assert not budget.try_acquire(priority=True)
+        now[0] += 1.0
+        assert not budget.try_acquire()
+        assert budget.try_acquire(priority=True)
+        remaining = budget.get_remaining()
+        assert remaining["used"] == 5 and remaining["month"] == "2026-09"
+        assert remaining["remaining"] == 2592000 - 5
+
+    @pytest.mark.unit
+    def test_monthly_quota(self, tmp_path):
+        now = [SEPTEMBER]
+        budget = RequestBudget(quota=2, burst=10, reserve=0,
+                               state_path=str(tmp_path / "budget.json"),
+                               clock=lambda: now[0])
+        assert budget.try_acquire() and budget.try_acquire(priority=True)
+        assert not budget.try_acquire(priority=True)
+        assert budget.get_remaining()["remaining"] == 0
+        now[0] += 30 * 86400
+        assert budget.try_acquire()
+        assert budget.get_remaining()["month"] == "2026-10"
+
+    @pytest.mark.unit
+    def test_several_processes(self, tmp_path):
+        context = multiprocessing.get_context("fork")
+        barrier = context.Barrier(4)
+        granted = context.Value("i", 0)
+        processes = [context.Process(target=_acquire, args=(
+            str(tmp_path / "budget.json"), barrier, granted))
+            for _ in range(4)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        assert [process.exitcode for process in processes] == [0] * 4
+        assert granted.value == 10
+
+    @pytest.mark.stub
+    def test_client_degrades_to_cache(self, stub_environment, tmp_path):
+        budget = RequestBudget(quota=1000, burst=2, reserve=0.5,
+                               state_path=str(tmp_path / "budget.json"))
+        client = CurrencyClient(cache_manager=JSONCache(str(tmp_path)),
+                                request_budget=budget)
+        client.budget_hot_keys = 0
+        assert not client.get_currency("USD").stale
+        assert client.get_currency("USD").stale
+        assert not client.get_currency("RUB").stale
+        with pytest.raises(QuotaExceededError):
+            client.get_currency("SEK")
+        assert stub_environment.request_count == 2
+        assert client.get_request_budget()["used"] == 2
+
+    @pytest.mark.stub
+    def test_hedged_requests_are_charged(self, stub_server, tmp_path):
+        # With 6 tokens the duplicate of the 6th (slow) request is not sent.
+        for burst, requests in ((7, 7), (6, 6)):
+            budget = RequestBudget(
+                quota=1000, burst=burst, reserve=0,
+                state_path=str(tmp_path / "{}.json".format(burst)))
+            api = ExchangeRatesApi(
+                "latest", stub_server.scheme, stub_server.host,
+                stub_server.api_version, request_budget=budget,
+                hedge_percentile=0.9, hedge_min_samples=5, request_timeout=5.0)
+            stub_server.reset_counters()
+            for _ in range(5):
+                api.send_exchange_rate_request("USD", status_code=200)
+            stub_server.inject_faults(delay=0.5)
+            api.send_exchange_rate_request("USD", status_code=200)
+            assert stub_server.request_count == requests
+            assert budget.get_remaining()["used"] == requests
+            api.close()
+
+    @pytest.mark.stub
+    def test_circuit_is_checked_first(self, stub_server, tmp_path):
+        now = [0.0]
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10.0,
+                                 clock=lambda: now[0])
+        budget = RequestBudget(quota=1000, burst=2, reserve=0,
+                               state_path=str(tmp_path / "budget.json"))
+        api = ExchangeRatesApi(
+            "latest", stub_server.scheme, stub_server.host,
+            stub_server.api_version, request_budget=budget,
+            circuit_breaker=breaker)
+        breaker.record_failure()
+        now[0] += 10.0
+        # Another caller sends the trial request of the half-open circuit.
+        assert breaker.allow_request()
+        with pytest.raises(CircuitOpenError):
+            api.send_exchange_rate_request("USD", status_code=200)
+        assert budget.get_remaining()["used"] == 0
+        breaker.cancel_request()
+        assert budget.try_acquire() and budget.try_acquire()
+        with pytest.raises(QuotaExceededError):
+            api.send_exchange_rate_request("USD", status_code=200)
+        assert breaker.allow_request()
+        assert stub_server.request_count == 0
+        api.close()
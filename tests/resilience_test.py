@@ -0,0 +1,106 @@
+import time
+
+import pytest
+
+from apies.base_api.resilience import CircuitBreaker, CircuitOpenError, \
+    DeadlineExceededError, LatencyTracker
+from apies.exchange_rates_api import ExchangeRatesApi
+from cache.json_cache import JSONCache
+from clients.currency_client import CurrencyClient
+
+
+class TestResilience:
+    """
+    A class of tests of deadlines, hedging and the circuit breaker against
+    the fault-injecting local stub server.
+
+    Methods
+    -------
+    test_circuit_breaker()
+        The method checks transitions between the states of the circuit.
+    test_latency_tracker()
+        The method checks percentiles of recorded latencies.
+    test_deadline(stub_server)
+        The method checks that a slow request is abandoned at the deadline.
+    test_hedged_request(stub_server)
+        The method checks that a duplicate of a slow request is answered.
+    test_stale_fallback(stub_environment, tmp_path)
+        The method checks that the cached copy is served, marked as stale,
+        while API fails and the circuit is open.
+    """
+
+    @staticmethod
+    def _api(server, **kwargs):
+        return ExchangeRatesApi("latest", server.scheme, server.host,
+                                server.api_version, **kwargs)
+
+    @pytest.mark.unit
+    def test_circuit_breaker(self):
+        now = [0.0]
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10.0,
+                                 clock=lambda: now[0])
+        breaker.record_failure()
+        assert breaker.allow_request() and breaker.get_state() == "closed"
+        breaker.record_failure()
+        assert not breaker.allow_request() and breaker.get_state() == "open"
+        now[0] = 10.0
+        assert breaker.allow_request() and not breaker.allow_request()
+        breaker.record_failure()
+        assert breaker.get_state() == "open"
+        now[0] = 20.0
+        assert breaker.allow_request()
+        breaker.record_success()
+        assert breaker.get_state() == "closed" and breaker.allow_request()
+
+    @pytest.mark.unit
+    def test_latency_tracker(self):
+        tracker = LatencyTracker(window=10)
+        assert tracker.get_percentile(0.9) is None
+        for latency in range(20):
+            tracker.record(latency)
+        assert tracker.get_percentile(0.9) == 18
+        assert tracker.get_percentile(0.5, min_samples=11) is None
+
+    @pytest.mark.stub
+    def test_deadline(self, stub_server):
+        api = self._api(stub_server, request_timeout=0.2)
+        stub_server.inject_faults(delay=1.0)
+        started = time.monotonic()
+        with pytest.raises(DeadlineExceededError):
+            api.send_exchange_rate_request("USD", status_code=200)
+        assert time.monotonic() - started < 0.5
+        assert api.send_exchange_rate_request(
+            "USD", status_code=200)["base"] == "USD"
+        api.close()
+
+    @pytest.mark.stub
+    def test_hedged_request(self, stub_server):
+        api = self._api(stub_server, hedge_percentile=0.9,
+                        hedge_min_samples=5, request_timeout=5.0)
+        for _ in range(5):
+            api.send_exchange_rate_request("USD", status_code=200)
+        stub_server.inject_faults(delay=2.0)
+        started = time.monotonic()
+        api.send_exchange_rate_request("USD", status_code=200)
+        assert time.monotonic() - started < 1.0
+        assert stub_server.request_count == 7
+        api.close()
+
+    @pytest.mark.stub
+    def test_stale_fallback(self, stub_environment, tmp_path):
+        client = CurrencyClient(
+            cache_manager=JSONCache(str(tmp_path)),
+            circuit_breaker=CircuitBreaker(failure_threshold=2,
+                                           reset_timeout=60.0))
+        fresh = client.get_currency("USD")
+        assert not fresh.stale
+        stub_environment.inject_faults(count=None, status=503)
+        for _ in range(2):
+            snapshot = client.get_currency("USD")
+            assert snapshot.stale and snapshot.from_cache
+            assert snapshot.rates == fresh.rates
+        assert stub_environment.request_count == 3
+        assert client.get_currency("USD").stale
+        assert stub_environment.request_count == 3
+        with pytest.raises(CircuitOpenError):
+            client.get_currency("RUB")
@@ -0,0 +1,167 @@
+import datetime
+import math
+import socket
+import threading
+import time
+
+import pytest
+
+from cache.json_cache import JSONCache
+from cache.timeseries_store import TimeSeriesStore
+from clients.currency_client import CurrencyClient
+from clients.sidecar_client import SidecarCurrencyClient
+from clients.sidecar_protocol import OK, decode_error, encode_frame, \
+    receive_frame
+from clients.sidecar_server import RateSidecarServer
+
+
+@pytest.fixture()
+def sidecar(stub_environment, tmp_path):
+    """Method is used to pass a running sidecar server to tests."""
+
+    client = CurrencyClient(
+        minutes=60, cache_manager=JSONCache(str(tmp_path / "cache")),
+        time_series_store=TimeSeriesStore(str(tmp_path / "series")))
+    with RateSidecarServer(str(tmp_path / "rates.sock"), client) as server:
+        yield server
+
+
+class TestSidecar:
+    """
+    A class of tests of the rate sidecar server and its thin client.
+
+    Methods
+    -------
+    test_protocol()
+        The method checks framing and mapping of errors.
+    test_clients_share_the_cache(sidecar, stub_environment, tmp_path)
+        The method checks that several thin clients are served from one
+        cache.
+    test_concurrent_connections(sidecar, stub_environment, tmp_path)
+        The method checks that many concurrent connections make one upstream
+        request.
+    test_time_series_and_interval(sidecar, stub_environment, tmp_path)
+        The method checks get_time_series, set_interval and get_interval of
+        the thin client.
+    test_errors_and_reconnect(sidecar, tmp_path)
+        The method checks that errors of lookups are raised by the thin
+        client and a broken connection is replaced.
+    test_socket_is_not_taken_over(sidecar, tmp_path)
+        The method checks that a second server does not replace a live one.
+    test_pipelined_requests_are_bounded(stub_environment, tmp_path)
+        The method checks that a connection has a bounded number of requests
+        in flight and the owned client is stopped.
+    """
+
+    @pytest.mark.unit
+    def test_protocol(self):
+        frame = encode_frame([1, "ping", []])
+        assert frame[:4] == b"\x00\x00\x00\x0d" and frame[4:] == \
+            b'[1,"ping",[]]'
+        assert isinstance(decode_error(["ValueError", "bad"]), ValueError)
+        error = decode_error(["OSError", "gone"])
+        assert type(error) is RuntimeError and str(error) == "OSError: gone"
+
+    @pytest.mark.stub
+    def test_clients_share_the_cache(self, sidecar, stub_environment,
+                                     tmp_path):
+        first = SidecarCurrencyClient(str(tmp_path / "rates.sock"))
+        second = SidecarCurrencyClient(str(tmp_path / "rates.sock"))
+        assert first.ping()
+        fetched = first.get_currency("USD", "RUB", base="SEK")
+        cached = second.get_currency("usd", "rub", base="sek")
+        assert not fetched.from_cache and cached.from_cache
+        assert fetched == cached and cached.base == "SEK"
+        assert stub_environment.request_count == 1
+        results = second.get_currencies([("SEK", ("USD", "RUB")),
+                                         ("USD", ("EUR",))])
+        assert results[0] == fetched and results[1].symbols == ("EUR",)
+        assert stub_environment.request_count == 2
+        second.clear_cache("USD", "RUB", base="SEK")
+        assert not first.get_currency("USD", "RUB", base="SEK").from_cache
+        assert first.get_request_budget() is None
+        first.close()
+        second.close()
+
+    @pytest.mark.stub
+    def test_concurrent_connections(self, sidecar, stub_environment,
+                                    tmp_path):
+        stub_environment.latency = 0.2
+        client = SidecarCurrencyClient(str(tmp_path / "rates.sock"))
+        callers = 32
+        barrier = threading.Barrier(callers)
+        results = []
+
+        def call():
+            barrier.wait()
+            results.append(client.get_currency("USD", base="GBP"))
+
+        threads = [threading.Thread(target=call) for _ in range(callers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        client.close()
+        assert len(results) == callers and len(set(
+            snapshot["USD"] for snapshot in results)) == 1
+        assert stub_environment.request_count == 1
+        stats = sidecar.get_stats()
+        assert stats["connections"] == callers and stats["requests"] == \
+            callers
+
+    @pytest.mark.stub
+    def test_time_series_and_interval(self, sidecar, stub_environment,
+                                      tmp_path):
+        client = SidecarCurrencyClient(str(tmp_path / "rates.sock"))
+        start = datetime.date(2020, 3, 1)
+        series = client.get_time_series(start, "2020-03-10", "usd", "RUB")
+        local = sidecar._client.get_time_series(start, "2020-03-10", "USD",
+                                                "RUB")
+        assert stub_environment.request_count == 1
+        assert series.base == "EUR" and series.start_date == start
+        assert len(series) == 10 and series.symbols == ("USD", "RUB")
+        assert list(series["USD"]) == list(local["USD"])
+        assert all(not math.isnan(value) for value in series["RUB"])
+        assert client.get_interval() == datetime.timedelta(minutes=60)
+        client.set_interval(minutes=5, seconds=30)
+        assert sidecar._client.get_interval() == \
+            datetime.timedelta(minutes=5, seconds=30)
+        assert client.get_interval() == datetime.timedelta(seconds=330)
+        client.close()
+
+    @pytest.mark.stub
+    def test_errors_and_reconnect(self, sidecar, tmp_path):
+        client = SidecarCurrencyClient(str(tmp_path / "rates.sock"))
+        with pytest.raises(RuntimeError):
+            client.get_currency("XXX")
+        connection = next(iter(client._connections))
+        connection.shutdown(2)
+        assert client.ping()
+        assert sidecar.get_stats()["errors"] == 1
+        client.close()
+
+    @pytest.mark.stub
+    def test_socket_is_not_taken_over(self, sidecar, tmp_path):
+        with pytest.raises(RuntimeError):
+            RateSidecarServer(str(tmp_path / "rates.sock"),
+                              CurrencyClient(minutes=60)).start()
+
+    @pytest.mark.stub
+    def test_pipelined_requests_are_bounded(self, stub_environment, tmp_path):
+        stub_environment.latency = 0.3
+        socket_path = str(tmp_path / "rates.sock")
+        server = RateSidecarServer(socket_path, max_in_flight=2).start()
+        server._client.start_background_refresh()
+        connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        connection.connect(socket_path)
+        connection.sendall(b"".join(
+            encode_frame([number, "get_currency", ["EUR", [code]]])
+            for number, code in enumerate(["USD", "RUB", "SEK", "NOK"])))
+        time.sleep(0.1)
+        assert server.get_stats()["requests"] == 2
+        responses = [receive_frame(connection) for _ in range(4)]
+        assert sorted(response[0] for response in responses) == [0, 1, 2, 3]
+        assert all(response[1] == OK for response in responses)
+        connection.close()
+        server.stop()
+        assert server._client._refresh_scheduler is None
@@ -0,0 +1,67 @@
+import pytest
+
+from cache.memory_cache import MemoryCache
+from cache.snapshot_cache import SnapshotCache
+
+
+class TestSnapshotCache:
+    """
+    A class of tests of SnapshotCache.
+
+    Methods
+    -------
+    test_round_trip(tmp_path)
+        The method checks that a response is read back from a snapshot.
+    test_replaced_snapshot(tmp_path)
+        The method checks that a replaced snapshot is mapped again, while the
+        old data stays readable.
+    test_extra_parameters(tmp_path)
+        The method checks that the other parameters of a response (the
+        validators) are kept.
+    test_memory_layer(tmp_path)
+        The method checks that MemoryCache with a size limit can keep
+        snapshots.
+    """
+
+    data = {"success": True, "timestamp": 1600000000, "base": "EUR",
+            "date": "2020-09-13", "rates": {"USD": 1.18, "RUB": 89.5,
+                                            "EUR": 1.0}}
+
+    @pytest.mark.unit
+    def test_round_trip(self, tmp_path):
+        cache = SnapshotCache(str(tmp_path))
+        cache.save_in_cache("EUR-.json", self.data)
+        data = cache.get_from_cache("EUR-.json")
+        assert dict(data, rates=dict(data["rates"])) == self.data
+        assert data["rates"]["RUB"] == 89.5 and "SEK" not in data["rates"]
+        assert cache.get_from_cache("EUR-.json") is data
+        cache.clear_cache("EUR-.json")
+        with pytest.raises(FileNotFoundError):
+            cache.get_from_cache("EUR-.json")
+
+    @pytest.mark.unit
+    def test_replaced_snapshot(self, tmp_path):
+        cache = SnapshotCache(str(tmp_path))
+        cache.save_in_cache("EUR-.json", self.data)
+        old = cache.get_from_cache("EUR-.json")
+        cache.save_in_cache("EUR-.json", dict(self.data, rates={"USD": 2.0}))
+        new = cache.get_from_cache("EUR-.json")
+        assert dict(new["rates"]) == {"USD": 2.0}
+        assert old["rates"]["USD"] == 1.18
+
+    @pytest.mark.unit
+    def test_extra_parameters(self, tmp_path):
+        cache = SnapshotCache(str(tmp_path))
+        data = dict(self.data, validators={"etag": "x"}, stale=False)
+        cache.save_in_cache("EUR-.json", data)
+        read = cache.get_from_cache("EUR-.json")
+        assert read["validators"] == {"etag": "x"} and read["stale"] is False
+        assert dict(read, rates=dict(read["rates"])) == data
+
+    @pytest.mark.unit
+    def test_memory_layer(self, tmp_path):
+        cache = MemoryCache(SnapshotCache(str(tmp_path)), max_bytes=1000)
+        cache.save_in_cache("EUR-.json", self.data)
+        cache.invalidate()
+        assert cache.get_from_cache("EUR-.json")["rates"]["USD"] == 1.18
+        assert cache.get_stats()["bytes"] > 0
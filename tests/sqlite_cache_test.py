@@ -0,0 +1,76 @@
+import multiprocessing
+
+import pytest
+
+from cache.json_cache import JSONCache
+from cache.sqlite_cache import SQLiteCache
+
+
+def _write_entries(database_path, worker):
+    cache = SQLiteCache(database_path)
+    for index in range(50):
+        cache.save_in_cache("{}-{}.json".format(worker, index),
+                            {"timestamp": index, "rates": {}})
+    cache.close()
+
+
+class TestSQLiteCache:
+    """
+    A class of tests of SQLiteCache.
+
+    Methods
+    -------
+    test_single_entries(tmp_path)
+        The method checks saving, getting and deleting of one entry.
+    test_bulk_operations(tmp_path)
+        The method checks bulk saving, getting, expiry sweeps and clearing.
+    test_import_json_folder(tmp_path)
+        The method checks migration from a JSONCache folder.
+    test_several_processes(tmp_path)
+        The method checks concurrent writes of several processes.
+    """
+
+    @pytest.mark.unit
+    def test_single_entries(self, tmp_path):
+        cache = SQLiteCache(str(tmp_path / "cache.sqlite3"))
+        cache.save_in_cache("EUR-USD.json", {"timestamp": 1, "rates": {}})
+        assert cache.get_from_cache("EUR-USD.json")["timestamp"] == 1
+        cache.clear_cache("EUR-USD.json")
+        with pytest.raises(FileNotFoundError):
+            cache.get_from_cache("EUR-USD.json")
+        # A missing entry is ignored, as in the file caches.
+        cache.clear_cache("EUR-USD.json")
+
+    @pytest.mark.unit
+    def test_bulk_operations(self, tmp_path):
+        cache = SQLiteCache(str(tmp_path / "cache.sqlite3"))
+        cache.save_many({str(index): {"timestamp": index}
+                         for index in range(2000)})
+        assert len(cache.get_many(str(index)
+                                  for index in range(1990, 2010))) == 10
+        assert cache.clear_expired(1000) == 1000
+        assert len(cache.get_keys()) == 1000
+        assert cache.clear_all() == 1000
+
+    @pytest.mark.unit
+    def test_import_json_folder(self, tmp_path):
+        json_cache = JSONCache(str(tmp_path / "json"))
+        json_cache.save_in_cache("EUR-USD.json", {"timestamp": 1})
+        json_cache.save_in_cache("USD-.json", {"timestamp": 2})
+        cache = SQLiteCache(str(tmp_path / "cache.sqlite3"))
+        assert cache.import_json_folder(str(tmp_path / "json")) == 2
+        assert cache.get_from_cache("USD-.json") == {"timestamp": 2}
+
+    @pytest.mark.unit
+    def test_several_processes(self, tmp_path):
+        database_path = str(tmp_path / "cache.sqlite3")
+        SQLiteCache(database_path)
+        processes = [multiprocessing.Process(target=_write_entries,
+                                             args=(database_path, worker))
+                     for worker in range(4)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        assert [process.exitcode for process in processes] == [0] * 4
+        assert len(SQLiteCache(database_path).get_keys()) == 200
@@ -0,0 +1,91 @@
+import datetime
+import math
+
+import pytest
+
+from cache.json_cache import JSONCache
+from cache.timeseries_store import TimeSeriesStore
+from clients.currency_client import CurrencyClient
+
+
+class TestTimeSeries:
+    """
+    A class of tests of TimeSeriesStore and the historical queries of
+    CurrencyClient.
+
+    Methods
+    -------
+    test_store(tmp_path)
+        The method checks missing ranges, append-only writes and reads of
+        the store.
+    test_incremental_backfill(stub_environment, tmp_path)
+        The method checks that only the missing dates are requested.
+    test_rate_table_mode(stub_environment, tmp_path)
+        The method checks that series of any base are derived from the
+        series of the reference base.
+    """
+
+    @staticmethod
+    def _make_client(tmp_path, **kwargs):
+        return CurrencyClient(
+            minutes=60, cache_manager=JSONCache(str(tmp_path / "cache")),
+            time_series_store=TimeSeriesStore(str(tmp_path / "series")),
+            **kwargs)
+
+    @pytest.mark.unit
+    def test_store(self, tmp_path):
+        store = TimeSeriesStore(str(tmp_path))
+        day = datetime.date(2020, 1, 1)
+        assert store.get_missing_ranges("EUR", day, day) == [(day, day)]
+        store.save_rates("eur", {day + datetime.timedelta(2): {"USD": 1.1},
+                                 day + datetime.timedelta(3): {"USD": 1.2,
+                                                               "RUB": 80.0}})
+        store.save_rates("EUR", {day + datetime.timedelta(2): {"USD": 5.0}})
+        assert store.get_missing_ranges(
+            "EUR", day, day + datetime.timedelta(5)) == [
+            (day, day + datetime.timedelta(1)),
+            (day + datetime.timedelta(4), day + datetime.timedelta(5))]
+        present, columns = store.get_rates(
+            "EUR", day + datetime.timedelta(1), day + datetime.timedelta(4))
+        assert present == b"\0\1\1\0"
+        assert sorted(columns) == ["EUR", "RUB", "USD"]
+        assert list(columns["USD"][1:3]) == [1.1, 1.2]
+        assert math.isnan(columns["USD"][0]) and math.isnan(columns["RUB"][1])
+        with pytest.raises(ValueError):
+            store.get_missing_ranges("EUR", datetime.date(1990, 1, 1), day)
+
+    @pytest.mark.stub
+    def test_incremental_backfill(self, stub_environment, tmp_path):
+        client = self._make_client(tmp_path)
+        start = datetime.date(2020, 3, 1)
+        series = client.get_time_series(start, "2020-03-10", "usd", "RUB")
+        assert stub_environment.request_count == 1
+        assert len(series) == 10 and series.symbols == ("USD", "RUB")
+        assert "usd" in series and "USD" in series and "SEK" not in series
+        assert series["USD"][4] == pytest.approx(
+            stub_environment.get_historical_rate(
+                start + datetime.timedelta(4), "USD"))
+
+        client.get_time_series(start, "2020-03-10", "SEK")
+        client.get_time_series("2020-03-05", "2020-03-06")
+        assert stub_environment.request_count == 1
+        client.get_time_series("2020-02-20", "2020-03-12", "USD")
+        assert stub_environment.request_count == 3
+        snapshot = client.get_historical_currency("2020-03-11", "USD")
+        assert stub_environment.request_count == 3
+        assert snapshot.date == "2020-03-11" and snapshot.base == "EUR"
+
+        with pytest.raises(ValueError):
+            client.get_time_series(start, datetime.date.today())
+        with pytest.raises(RuntimeError):
+            client.get_time_series(start, start, "XXX")
+
+    @pytest.mark.stub
+    def test_rate_table_mode(self, stub_environment, tmp_path):
+        client = self._make_client(tmp_path, rate_table_base="EUR")
+        date = datetime.date(2020, 3, 1)
+        usd = client.get_time_series(date, date, "RUB", base="USD")
+        eur = client.get_time_series(date, date, "RUB", "USD")
+        assert stub_environment.request_count == 1
+        assert usd["RUB"][0] == pytest.approx(eur["RUB"][0] / eur["USD"][0])
+        assert usd.get_rates(date) == {"RUB": usd["RUB"][0]}
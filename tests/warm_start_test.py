@@ -0,0 +1,95 @@
+import os
+import stat
+import subprocess
+import sys
+
+import pytest
+
+from apies.exchange_rates_api import ExchangeRatesApi
+from cache.json_cache import JSONCache
+from clients.currency_client import CurrencyClient
+from clients.warm_start import load_snapshot, save_snapshot
+
+
+class TestWarmStart:
+    """
+    A class of tests of the lazy construction of CurrencyClient and its
+    warm start from a snapshot.
+
+    Methods
+    -------
+    test_import_is_light()
+        The method checks that importing CurrencyClient loads neither
+        requests nor numpy.
+    test_lazy_construction(tmp_path, monkeypatch)
+        The method checks that construction creates neither the cache folder
+        nor the session and the access key is read on request.
+    test_snapshot_files(tmp_path)
+        The method checks writing and reading of plain and compressed
+        snapshots and the permissions of the files.
+    test_warm_start(stub_environment, tmp_path)
+        The method checks that the snapshot serves the first lookups and its
+        validators make the first refresh conditional.
+    """
+
+    @pytest.mark.unit
+    def test_import_is_light(self):
+        output = subprocess.check_output(
+            [sys.executable, "-c", "import sys; "
+                                   "import clients.currency_client; "
+                                   "print('requests' in sys.modules, "
+                                   "'numpy' in sys.modules)"],
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        assert output.split() == [b"False", b"False"]
+
+    @pytest.mark.unit
+    def test_lazy_construction(self, tmp_path, monkeypatch):
+        cache_path = tmp_path / "cache"
+        client = CurrencyClient(minutes=60,
+                                cache_manager=JSONCache(str(cache_path)))
+        assert not cache_path.exists()
+        assert client._api_manager._session is None
+        monkeypatch.setattr(ExchangeRatesApi, "_key", None)
+        monkeypatch.setenv("ACCESS_KEY", "late-key")
+        assert ExchangeRatesApi.get_key() == "late-key"
+        client._cache_manager.save_in_cache("a.json", {})
+        assert (cache_path / "a.json").exists()
+
+    @pytest.mark.unit
+    def test_snapshot_files(self, tmp_path):
+        cache = JSONCache(str(tmp_path / "cache"))
+        cache.save_in_cache("EUR-.json", {"base": "EUR", "rates": {}})
+        cache.save_in_cache("SEK-USD.json", {"base": "SEK", "rates": {}})
+        umask = os.umask(0o022)
+        os.umask(umask)
+        for name in ("snapshot.json", "snapshot.json.gz"):
+            path = str(tmp_path / name)
+            assert save_snapshot(path, cache) == 2
+            assert load_snapshot(path)["SEK-USD.json"]["base"] == "SEK"
+            assert stat.S_IMODE(os.stat(path).st_mode) == 0o666 & ~umask
+        assert save_snapshot(str(tmp_path / "eur.json"), cache, "EUR-*") == 1
+        (tmp_path / "bad.json").write_text("[]")
+        with pytest.raises(ValueError):
+            load_snapshot(str(tmp_path / "bad.json"))
+
+    @pytest.mark.stub
+    def test_warm_start(self, stub_environment, tmp_path):
+        stub_environment.update_period = 3600.0
+        populated = JSONCache(str(tmp_path / "populated"))
+        CurrencyClient(minutes=60, cache_manager=populated).get_currency(
+            "USD", "RUB")
+        snapshot_path = str(tmp_path / "snapshot.json.gz")
+        save_snapshot(snapshot_path, populated)
+        stub_environment.reset_counters()
+        cache_path = tmp_path / "fresh"
+        client = CurrencyClient(minutes=60, warm_start=snapshot_path,
+                                cache_manager=JSONCache(str(cache_path)))
+        snapshot = client.get_currency("USD", "RUB")
+        assert snapshot.from_cache and stub_environment.request_count == 0
+        assert not cache_path.exists()
+        # An out-of-date snapshot is revalidated and saved in cache.
+        client = CurrencyClient(warm_start=snapshot_path,
+                                cache_manager=JSONCache(str(cache_path)))
+        assert client.get_currency("USD", "RUB").rates == snapshot.rates
+        assert stub_environment.not_modified_count == 1
+        assert (cache_path / "EUR-USD,RUB.json").exists()